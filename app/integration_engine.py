@@ -28,6 +28,7 @@ from app.integrations.netsuite import NetSuiteConnector
 from app.integrations.hubspot import HubSpotConnector
 from app.integrations.xero import XeroConnector
 from app.kernel.providers.codellama import CodeLlamaProvider
+from app.plugin_generation import PluginGenerator
 from zona.plugin_manager import reload_plugins
 from app.utils.security import limiter, verify_api_key
 
@@ -80,6 +81,20 @@ def decrypt_value(value: str) -> str:
         return value
 
 
+PLUGIN_DIR = Path(__file__).resolve().parent.parent / "zona" / "plugins"
+
+# Plugins are generated in the background; the generated code is memoized in
+# ``PLUGIN_CACHE_DIR`` so other workers and repeated requests reuse it.
+plugin_generator = PluginGenerator(
+    lambda system, schema: generate_plugin_code(system, schema),
+    plugin_dir=PLUGIN_DIR,
+    cache_dir=Path(
+        os.getenv("PLUGIN_CACHE_DIR", str(Path.home() / ".cache" / "zona" / "plugins"))
+    ),
+    reload=reload_plugins,
+)
+
+
 class IntegrationRequest(BaseModel):
     system: str
     api_key: str
@@ -122,21 +137,28 @@ async def add_integration(payload: IntegrationRequest) -> dict:
     except Exception:
         pass
 
-    # Attempt to auto‑generate a plugin using CodeLlama.  This step is best
-    # effort only; failures are silently ignored so that missing model files do
-    # not prevent the integration from being added during tests.
-    try:
-        if os.getenv("CODELLAMA_MODEL") and hasattr(connector, "get_api_schema"):
-            schema = connector.get_api_schema()  # type: ignore[call-arg]
-            plugin_code = generate_plugin_code(payload.system, schema)
-            plugin_dir = Path(__file__).resolve().parent.parent / "zona" / "plugins"
-            plugin_dir.mkdir(parents=True, exist_ok=True)
-            (plugin_dir / f"{payload.system}_plugin.py").write_text(plugin_code)
-            reload_plugins()
-    except Exception:  # pragma: no cover - optional feature
-        pass
+    result = {"message": f"{payload.system} integration added", "token": token}
+
+    # Auto‑generate a plugin using CodeLlama in the background.  Progress is
+    # reported by ``GET /integrations/jobs/{job_id}``; failures (for example
+    # missing model files) do not affect the integration itself.
+    model = os.getenv("CODELLAMA_MODEL")
+    if model and hasattr(connector, "get_api_schema"):
+        job = plugin_generator.submit(
+            payload.system.lower(), connector.get_api_schema, model  # type: ignore[attr-defined]
+        )
+        result["plugin_job"] = job.id
+
+    return result
+
 
-    return {"message": f"{payload.system} integration added", "token": token}
+@router.get("/jobs/{job_id}")
+async def plugin_job_status(job_id: str) -> dict:
+    """Return the status of a background plugin generation job."""
+    job = plugin_generator.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
 @router.get("/scan")
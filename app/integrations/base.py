@@ -1,6 +1,36 @@
+from typing import Any
+
+import httpx
+
+from app.integrations.transport import get_client
+from app.utils.tracing import inject_headers, span
+
+
 class BaseConnector:
     """Minimal interface for integration connectors."""
 
+    timeout: float = 5.0
+
     def authenticate(self) -> str:
         """Return an access token or raise an error."""
         raise NotImplementedError
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send an HTTP request on behalf of the connector.
+
+        The call is recorded as a tracing span and the active trace is
+        propagated to the remote system through a ``traceparent`` header.
+        Requests share pooled clients (see :mod:`app.integrations.transport`).
+        """
+
+        with span(
+            "connector.request",
+            connector=type(self).__name__,
+            method=method.upper(),
+            url=url,
+        ) as active:
+            kwargs["headers"] = inject_headers(kwargs.get("headers"))
+            client = get_client(url, self.timeout)
+            response = await getattr(client, method.lower())(url, **kwargs)
+            active.set_attribute("status_code", getattr(response, "status_code", None))
+            return response
@@ -20,12 +20,12 @@ class HubSpotConnector(BaseConnector):
     async def fetch_contacts(self, limit: int = 100) -> List[dict]:
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/crm/v3/objects/contacts",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={"limit": limit},
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/crm/v3/objects/contacts",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"limit": limit},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("results", [])
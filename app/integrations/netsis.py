@@ -15,11 +15,11 @@ class NetsisConnector(BaseConnector):
 
     async def authenticate(self) -> str:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/login",
-                    headers={"X-API-Key": self.api_key},
-                )
+            response = await self._request(
+                "post",
+                f"{self.base_url}/login",
+                headers={"X-API-Key": self.api_key},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("token", "")
@@ -29,12 +29,12 @@ class NetsisConnector(BaseConnector):
     async def fetch_invoices(self, start_date: str, end_date: str) -> List[dict]:
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/invoices",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={"start_date": start_date, "end_date": end_date},
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/invoices",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"start_date": start_date, "end_date": end_date},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("invoices", [])
@@ -15,11 +15,11 @@ class QuickBooksConnector(BaseConnector):
 
     async def authenticate(self) -> str:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/oauth/v1/tokens",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                )
+            response = await self._request(
+                "post",
+                f"{self.base_url}/oauth/v1/tokens",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("access_token", "")
@@ -29,12 +29,12 @@ class QuickBooksConnector(BaseConnector):
     async def fetch_invoices(self, start_date: str, end_date: str) -> List[dict]:
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/v3/company/invoices",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={"start_date": start_date, "end_date": end_date},
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/v3/company/invoices",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"start_date": start_date, "end_date": end_date},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("invoices", [])
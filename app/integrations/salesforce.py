@@ -29,15 +29,15 @@ class SalesforceConnector(BaseConnector):
     async def authenticate(self) -> str:
         """Return an OAuth access token from Salesforce."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/services/oauth2/token",
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                    },
-                )
+            response = await self._request(
+                "post",
+                f"{self.base_url}/services/oauth2/token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
             response.raise_for_status()
             return response.json()["access_token"]
         except httpx.HTTPError as exc:  # pragma: no cover - network
@@ -47,14 +47,14 @@ class SalesforceConnector(BaseConnector):
         """Fetch leads created after ``start_date`` (ISO formatted)."""
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/services/data/v52.0/query",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={
-                        "q": f"SELECT Id,Name FROM Lead WHERE CreatedDate > {start_date}"
-                    },
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/services/data/v52.0/query",
+                headers={"Authorization": f"Bearer {token}"},
+                params={
+                    "q": f"SELECT Id,Name FROM Lead WHERE CreatedDate > {start_date}"
+                },
+            )
             response.raise_for_status()
             return response.json().get("records", [])
         except httpx.HTTPError as exc:  # pragma: no cover - network
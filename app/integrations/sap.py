@@ -15,11 +15,11 @@ class SAPConnector(BaseConnector):
 
     async def authenticate(self) -> str:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/oauth/token",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                )
+            response = await self._request(
+                "post",
+                f"{self.base_url}/oauth/token",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("access_token", "")
@@ -29,12 +29,12 @@ class SAPConnector(BaseConnector):
     async def fetch_invoices(self, start_date: str, end_date: str) -> List[dict]:
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/invoices",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={"from": start_date, "to": end_date},
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/api/invoices",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"from": start_date, "to": end_date},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("invoices", [])
@@ -0,0 +1,160 @@
+"""Shared HTTP clients for integration connectors.
+
+Opening an ``httpx.AsyncClient`` per call pays DNS, TCP and TLS setup on every
+request.  :func:`get_client` instead keeps one long-lived client per event
+loop and origin (scheme, host and port), so keep-alive connections are reused
+across calls and connectors.  Clients are bound to the loop that created them,
+hence the per-loop registry.
+
+Synchronous callers use :func:`run_sync` rather than ``asyncio.run``, which
+would create a new loop, and so new clients and connections, on every call.
+It runs coroutines on one background loop per process, whose clients are
+closed when the process exits.
+
+Pool limits are read from ``CONNECTOR_MAX_CONNECTIONS``,
+``CONNECTOR_MAX_KEEPALIVE`` and ``CONNECTOR_KEEPALIVE_EXPIRY``.  HTTP/2 is
+negotiated when the optional ``h2`` package is installed, unless
+``CONNECTOR_HTTP2=false``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.utils.metrics import counter, gauge
+
+_REQUESTS = counter(
+    "zona_connector_requests_total", "Connector HTTP requests sent, by origin."
+)
+_CONNECTIONS = counter(
+    "zona_connector_connections_total",
+    "Connector connections opened, by origin; requests minus connections were reused.",
+)
+_CLIENTS = gauge("zona_connector_clients", "Open shared connector HTTP clients.")
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+# Background loop of this process for :func:`run_sync`, and the pid owning it.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+
+T = TypeVar("T")
+
+
+def http2_enabled() -> bool:
+    if os.getenv("CONNECTOR_HTTP2", "true").lower() in {"0", "false", "no"}:
+        return False
+    return importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("CONNECTOR_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("CONNECTOR_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("CONNECTOR_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _event_hooks(origin: str) -> Dict[str, list]:
+    async def trace(event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.started":
+            _CONNECTIONS.inc(origin=origin)
+
+    async def on_request(request: httpx.Request) -> None:
+        _REQUESTS.inc(origin=origin)
+        request.extensions["trace"] = trace
+
+    return {"request": [on_request]}
+
+
+def get_client(url: str, timeout: float) -> Any:
+    """Return the shared client for the origin of ``url`` on the running loop."""
+    loop = asyncio.get_running_loop()
+    origin = origin_of(url)
+    # ``httpx.AsyncClient`` is looked up on each call so it can be replaced.
+    client_class = httpx.AsyncClient
+    key = (origin, timeout, client_class)
+    with _lock:
+        clients = _clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None or getattr(client, "is_closed", False):
+            client = clients[key] = client_class(
+                timeout=timeout,
+                limits=_limits(),
+                http2=http2_enabled(),
+                event_hooks=_event_hooks(origin),
+            )
+            _CLIENTS.set(sum(len(c) for c in _clients.values()))
+    return client
+
+
+async def aclose_all() -> None:
+    """Close the shared clients of the running loop, e.g. on shutdown."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_clients.pop(loop, {}).values())
+        _CLIENTS.set(sum(len(c) for c in _clients.values()))
+    for client in clients:
+        close = getattr(client, "aclose", None)
+        if close is not None:
+            await close()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+    with _lock:
+        # A forked worker inherits the loop object but not its thread.
+        if _loop is None or _loop_pid != os.getpid():
+            _loop, _loop_pid = asyncio.new_event_loop(), os.getpid()
+            threading.Thread(
+                target=_loop.run_forever, name="zona-connector-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """Run ``awaitable`` on the process's connector loop and return its result.
+
+    Clients and their keep-alive connections are reused across calls.  The
+    caller's context variables, such as the active trace, are propagated.
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() cannot be called from the connector loop")
+    return asyncio.run_coroutine_threadsafe(awaitable, loop).result()
+
+
+@atexit.register
+def _close_background_loop() -> None:
+    global _loop
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            return
+        loop, _loop = _loop, None
+    try:
+        asyncio.run_coroutine_threadsafe(aclose_all(), loop).result(timeout=5)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+
+
+__all__ = ["aclose_all", "get_client", "http2_enabled", "origin_of", "run_sync"]
@@ -15,14 +15,14 @@ class XeroConnector(BaseConnector):
 
     async def authenticate(self) -> str:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/oauth/token",
-                    data={
-                        "client_id": self.api_key,
-                        "grant_type": "client_credentials",
-                    },
-                )
+            response = await self._request(
+                "post",
+                f"{self.base_url}/oauth/token",
+                data={
+                    "client_id": self.api_key,
+                    "grant_type": "client_credentials",
+                },
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("access_token", "")
@@ -32,12 +32,12 @@ class XeroConnector(BaseConnector):
     async def fetch_invoices(self, start_date: str) -> List[dict]:
         token = await self.authenticate()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api.xro/2.0/Invoices",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={"DateFrom": start_date},
-                )
+            response = await self._request(
+                "get",
+                f"{self.base_url}/api.xro/2.0/Invoices",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"DateFrom": start_date},
+            )
             response.raise_for_status()
             data = response.json()
             return data.get("Invoices", [])
@@ -0,0 +1,6 @@
+"""Durable offline processing of large prompt workloads."""
+
+from .runner import JobRunner
+from .store import JobItem, JobStore
+
+__all__ = ["JobItem", "JobRunner", "JobStore"]
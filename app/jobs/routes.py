@@ -0,0 +1,98 @@
+"""FastAPI routes for submitting and inspecting offline prompt jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.jobs.runner import JobRunner
+from app.utils.license import LicenseManager
+from app.utils.security import limiter, verify_api_key
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    dependencies=[Depends(verify_api_key), Depends(limiter)],
+)
+
+PREMIUM_PROVIDERS = {"gemini", "vertexai"}
+MAX_JOB_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "100000"))
+
+
+def _runner(request: Request) -> JobRunner:
+    runner = getattr(request.app.state, "job_runner", None)
+    if runner is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+    return runner
+
+
+def _parse_jsonl(body: bytes) -> list[dict]:
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body is not valid UTF-8") from None
+    items: list[dict] = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise HTTPException(
+                status_code=400, detail=f"Line {lineno}: invalid JSON ({exc.msg})"
+            ) from None
+        except (ValueError, RecursionError):
+            # e.g. integers over the conversion limit or deeply nested arrays.
+            raise HTTPException(status_code=400, detail=f"Line {lineno}: invalid JSON") from None
+        if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+            raise HTTPException(status_code=400, detail=f"Line {lineno}: missing 'prompt'")
+        items.append(item)
+    return items
+
+
+@router.post("")
+async def submit_job(request: Request, provider: str = "openai") -> dict:
+    """Queue a JSON lines body of ``{"prompt": ...}`` objects for processing."""
+    # Parsing and inserting up to ``JOB_MAX_ITEMS`` rows would block the loop.
+    items = await asyncio.to_thread(_parse_jsonl, await request.body())
+    if not items:
+        raise HTTPException(status_code=400, detail="No prompts submitted")
+    if len(items) > MAX_JOB_ITEMS:
+        raise HTTPException(status_code=413, detail="Too many prompts in one job")
+
+    runner = _runner(request)
+    providers = {str(item.get("provider") or provider).lower() for item in items}
+    unknown = sorted(name for name in providers if not runner.accepts(name))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown provider: {', '.join(unknown)}")
+    if providers & PREMIUM_PROVIDERS:
+        LicenseManager.require_license(request.headers.get(LicenseManager.HEADER_NAME))
+
+    job_id = await asyncio.to_thread(runner.store.create_job, provider.lower(), items)
+    runner.notify()
+    return {"job_id": job_id, "total": len(items)}
+
+
+@router.get("/{job_id}")
+async def job_status(request: Request, job_id: str) -> dict:
+    status = _runner(request).store.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+
+@router.get("/{job_id}/results")
+async def job_results(request: Request, job_id: str) -> StreamingResponse:
+    """Download per-prompt results as JSON lines, in submission order."""
+    store = _runner(request).store
+    if store.job_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        store.export_results(job_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.jsonl"'},
+    )
@@ -0,0 +1,250 @@
+"""Background workers that drain the offline job queue."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Container, Dict, List, Optional
+
+from app.jobs.store import JobItem, JobStore
+from app.utils.admission import AdmissionRejected, AdmissionScheduler
+from app.utils.metrics import counter, histogram
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_JOB_ITEMS = counter(
+    "zona_job_items_total", "Offline job items processed, by provider and outcome."
+)
+_JOB_ITEM_SECONDS = histogram(
+    "zona_job_item_seconds", "Time spent answering a single offline job item."
+)
+
+
+def parse_provider_rates(value: str | None) -> Dict[str, float]:
+    """Parse ``"openai=5,gemini=1.5"`` into a provider to requests/second map."""
+    rates: Dict[str, float] = {}
+    for part in (value or "").split(","):
+        name, sep, rate = part.partition("=")
+        if sep and name.strip() and rate.strip():
+            rates[name.strip().lower()] = float(rate)
+    return rates
+
+
+class TokenBucket:
+    """Simple async token bucket limiting calls to ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Return the seconds until a token is available (``0`` if one is)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep(self.wait_time())
+
+
+class JobRunner:
+    """Process queued prompts with bounded concurrency and retries.
+
+    ``handler(provider, prompt)`` is called in a worker thread for every item.
+    At most ``concurrency`` items run at once and each provider listed in
+    ``provider_rates`` is capped at the given number of calls per second.
+    Items of a provider whose bucket is empty are left in the queue so other
+    providers' items are not held up behind them.  Failed items are retried
+    with exponential backoff up to ``max_attempts``.  ``providers``, when
+    given, lists the providers the handler supports; items of other providers
+    are rejected instead of retried.  When an ``admission`` scheduler is given,
+    every call waits for a ``batch`` slot so offline work yields to interactive
+    traffic.  The store lease of a running item is renewed until it finishes.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[str, str], str],
+        *,
+        concurrency: int = 4,
+        provider_rates: Optional[Dict[str, float]] = None,
+        max_attempts: int = 3,
+        retry_delay: float = 2.0,
+        poll_interval: float = 0.5,
+        admission: AdmissionScheduler | None = None,
+        providers: Optional[Container[str]] = None,
+    ) -> None:
+        self.store = store
+        self.providers = providers
+        self.admission = admission
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._buckets = {
+            name: TokenBucket(rate) for name, rate in (provider_rates or {}).items() if rate > 0
+        }
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    @classmethod
+    def from_env(
+        cls,
+        store: JobStore,
+        handler: Callable[[str, str], str],
+        *,
+        admission: AdmissionScheduler | None = None,
+        providers: Optional[Container[str]] = None,
+    ) -> "JobRunner":
+        return cls(
+            store,
+            handler,
+            admission=admission,
+            providers=providers,
+            concurrency=int(os.getenv("JOB_WORKERS", "4")),
+            provider_rates=parse_provider_rates(os.getenv("JOB_PROVIDER_RATES")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Requeue interrupted items and launch the worker tasks."""
+        if self._tasks:
+            return
+        await asyncio.to_thread(self.store.recover)
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"zona-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel workers; in-flight items are returned to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def accepts(self, provider: str) -> bool:
+        """Return whether items for ``provider`` can be processed."""
+        return self.providers is None or provider in self.providers
+
+    def notify(self) -> None:
+        """Wake idle workers after new work has been submitted."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await self._step()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A store error (e.g. a locked or unavailable database) must not
+                # silently stop the worker; back off and try again.
+                logger.exception("Job worker failed; retrying")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _step(self) -> None:
+        waits = {name: bucket.wait_time() for name, bucket in self._buckets.items()}
+        throttled = [name for name, wait in waits.items() if wait > 0]
+        item = await asyncio.to_thread(self.store.claim_next, throttled)
+        if item is None:
+            assert self._wakeup is not None
+            self._wakeup.clear()
+            timeout = min([self.poll_interval] + [waits[name] for name in throttled])
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+        try:
+            await self._process(item)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(self.store.release, item))
+            raise
+
+    async def _call_handler(self, item: JobItem) -> str:
+        """Run the handler for ``item``, renewing its lease while it runs."""
+        call = asyncio.ensure_future(asyncio.to_thread(self.handler, item.provider, item.prompt))
+        try:
+            while True:
+                done, _ = await asyncio.wait({call}, timeout=self.store.lease_seconds / 3)
+                if done:
+                    return call.result()
+                await asyncio.to_thread(self.store.renew, item)
+        finally:
+            call.cancel()
+
+    async def _process(self, item: JobItem) -> None:
+        if not self.accepts(item.provider):
+            await asyncio.to_thread(
+                self.store.fail, item, f"Unknown provider: {item.provider}", None
+            )
+            _JOB_ITEMS.inc(provider="unknown", outcome="failed")
+            return
+        bucket = self._buckets.get(item.provider)
+        if bucket is not None and not bucket.try_acquire():
+            # Another worker took the last token since the item was claimed.
+            await asyncio.to_thread(self.store.release, item)
+            return
+        if self.admission is not None:
+            try:
+                await self.admission.acquire(f"job:{item.job_id}", "batch")
+            except AdmissionRejected:
+                await asyncio.to_thread(self.store.release, item)
+                await asyncio.sleep(self.poll_interval)
+                return
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            with span("job.item", job_id=item.job_id, index=item.index, provider=item.provider):
+                result = await self._call_handler(item)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as exc:
+            attempts = item.attempts + 1
+            retry_at = None
+            if attempts < self.max_attempts:
+                outcome = "retry"
+                retry_at = time.time() + self.retry_delay * (2 ** (attempts - 1))
+            else:
+                outcome = "failed"
+            await asyncio.to_thread(self.store.fail, item, str(exc), retry_at)
+        else:
+            await asyncio.to_thread(self.store.complete, item, result)
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+            _JOB_ITEMS.inc(provider=item.provider, outcome=outcome)
+            _JOB_ITEM_SECONDS.observe(time.perf_counter() - start, provider=item.provider)
+
+
+__all__ = ["JobRunner", "TokenBucket", "parse_provider_rates"]
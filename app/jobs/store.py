@@ -0,0 +1,272 @@
+"""SQLite backed persistence for offline prompt jobs.
+
+Each job is a batch of independent prompts.  Every prompt is stored as an item
+row whose status moves from ``pending`` to ``running`` and finally to ``done``
+or ``failed``.  Results are committed item by item, so the table itself acts as
+the checkpoint.  A claimed item records its owner and a lease expiry, renewed
+while it runs; several workers may share one database, and an item whose lease
+expired (its worker crashed) is claimed again and resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_UNCLAIMED = "claimed_by=NULL, lease_until=NULL"
+
+
+@dataclass
+class JobItem:
+    """A single prompt claimed for processing."""
+
+    job_id: str
+    index: int
+    provider: str
+    prompt: str
+    attempts: int
+
+
+class JobStore:
+    """Durable queue of prompt jobs stored in a SQLite database."""
+
+    def __init__(
+        self, path: str = ":memory:", *, owner: Optional[str] = None, lease_seconds: float = 300.0
+    ) -> None:
+        self.path = path
+        # Identifies this process' claims among workers sharing the database.
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    total INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    ref TEXT,
+                    provider TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, idx)
+                );
+                CREATE INDEX IF NOT EXISTS job_items_pending
+                    ON job_items (status, available_at);
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+            for column, decl in (("claimed_by", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE job_items ADD COLUMN {column} {decl}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS job_items_leases ON job_items (status, lease_until)"
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Submission and inspection
+    def create_job(self, provider: str, items: Iterable[Dict[str, Any]]) -> str:
+        """Persist a new job and return its identifier.
+
+        ``items`` are mappings with a ``prompt`` and optional ``provider`` and
+        ``id`` (an opaque client reference echoed back in the results).
+        """
+        job_id = uuid.uuid4().hex
+        rows = [
+            (
+                job_id,
+                idx,
+                None if item.get("id") is None else str(item["id"]),
+                str(item.get("provider") or provider).lower(),
+                item["prompt"],
+            )
+            for idx, item in enumerate(items)
+        ]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs(id, provider, created, total) VALUES(?, ?, ?, ?)",
+                (job_id, provider, time.time(), len(rows)),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items(job_id, idx, ref, provider, prompt)"
+                " VALUES(?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return job_id
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return progress counters for ``job_id`` or ``None`` if unknown."""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT provider, created, total FROM jobs WHERE id=?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM job_items WHERE job_id=? GROUP BY status",
+                    (job_id,),
+                ).fetchall()
+            )
+        status: Dict[str, Any] = {
+            "job_id": job_id,
+            "provider": job["provider"],
+            "created": job["created"],
+            "total": job["total"],
+        }
+        for key in ("pending", "running", "done", "failed"):
+            status[key] = counts.get(key, 0)
+        if status["pending"] or status["running"]:
+            started = status["done"] or status["failed"] or status["running"]
+            status["status"] = "running" if started else "queued"
+        else:
+            status["status"] = "completed_with_errors" if status["failed"] else "completed"
+        return status
+
+    def iter_results(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield the state of every item of ``job_id`` in submission order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, ref, status, result, error FROM job_items"
+                " WHERE job_id=? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        for row in rows:
+            entry: Dict[str, Any] = {"index": row["idx"], "status": row["status"]}
+            if row["ref"] is not None:
+                entry["id"] = row["ref"]
+            if row["status"] == "done":
+                entry["response"] = row["result"]
+            elif row["status"] == "failed":
+                entry["error"] = row["error"]
+            yield entry
+
+    def export_results(self, job_id: str) -> Iterator[str]:
+        """Yield the results of ``job_id`` as JSON lines."""
+        for entry in self.iter_results(job_id):
+            yield json.dumps(entry, ensure_ascii=False) + "\n"
+
+    # ------------------------------------------------------------------
+    # Worker API
+    def claim_next(self, exclude_providers: Iterable[str] = ()) -> Optional[JobItem]:
+        """Atomically claim the oldest runnable item for this owner and return it.
+
+        Runnable items are ``pending`` ones and ``running`` ones whose lease
+        expired.
+        """
+        excluded = list(exclude_providers)
+        now = time.time()
+        query = (
+            "SELECT job_id, idx, provider, prompt, attempts FROM job_items"
+            " WHERE ((status='pending' AND available_at<=?)"
+            " OR (status='running' AND lease_until<?))"
+        )
+        params: List[Any] = [now, now]
+        if excluded:
+            query += f" AND provider NOT IN ({','.join('?' * len(excluded))})"
+            params.extend(excluded)
+        query += " ORDER BY available_at, rowid LIMIT 1"
+        with self._lock:
+            # ``BEGIN IMMEDIATE`` keeps other processes from claiming the same row.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(query, params).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE job_items SET status='running', claimed_by=?, lease_until=?"
+                        " WHERE job_id=? AND idx=?",
+                        (self.owner, now + self.lease_seconds, row["job_id"], row["idx"]),
+                    )
+            finally:
+                self._conn.commit()
+            if row is None:
+                return None
+        return JobItem(
+            job_id=row["job_id"],
+            index=row["idx"],
+            provider=row["provider"],
+            prompt=row["prompt"],
+            attempts=row["attempts"],
+        )
+
+    def _update_claimed(self, item: JobItem, assignments: str, params: Iterable[Any]) -> bool:
+        # Only the current owner may update an item; a lost lease is a no-op.
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE job_items SET {assignments}"
+                " WHERE job_id=? AND idx=? AND status='running' AND claimed_by=?",
+                (*params, item.job_id, item.index, self.owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def complete(self, item: JobItem, result: str) -> bool:
+        """Checkpoint a successful result; return ``False`` if the claim was lost."""
+        return self._update_claimed(
+            item,
+            f"status='done', result=?, error=NULL, attempts=attempts+1, {_UNCLAIMED}",
+            (result,),
+        )
+
+    def fail(self, item: JobItem, error: str, retry_at: Optional[float] = None) -> bool:
+        """Record a failed attempt, rescheduling the item if ``retry_at`` is set."""
+        status = "pending" if retry_at is not None else "failed"
+        return self._update_claimed(
+            item,
+            f"status=?, error=?, attempts=attempts+1, available_at=?, {_UNCLAIMED}",
+            (status, error, retry_at or 0),
+        )
+
+    def release(self, item: JobItem) -> bool:
+        """Return a claimed item to the queue without counting an attempt."""
+        return self._update_claimed(item, f"status='pending', {_UNCLAIMED}", ())
+
+    def renew(self, item: JobItem) -> bool:
+        """Extend the lease of a claimed item; return ``False`` if it was lost."""
+        return self._update_claimed(item, "lease_until=?", (time.time() + self.lease_seconds,))
+
+    def recover(self) -> int:
+        """Requeue items left ``running`` by crashed workers, i.e. with expired leases.
+
+        Items claimed by live workers sharing the database are left alone.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE job_items SET status='pending', {_UNCLAIMED}"
+                " WHERE status='running' AND (lease_until IS NULL OR lease_until<?)",
+                (time.time(),),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:  # pragma: no cover - best effort cleanup
+                pass
+
+
+__all__ = ["JobItem", "JobStore"]
@@ -0,0 +1,114 @@
+"""Request deadlines and cooperative cancellation for chat turns.
+
+A :class:`Deadline` is attached to the current context by
+:meth:`ZonaKernel.dispatch_provider` and read back wherever a blocking call is
+made, so the remaining time budget reaches the provider without changing the
+signature of every provider function.  The deadline can also be cancelled from
+another thread, e.g. when the HTTP client disconnects, in which case the kernel
+abandons the provider call and discards the turn.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_POLL_INTERVAL = 0.05
+
+
+class TurnCancelled(Exception):
+    """Raised when a chat turn is abandoned before the provider answered."""
+
+
+class DeadlineExceeded(TurnCancelled):
+    """Raised when the request deadline passes before the turn completes."""
+
+
+class Deadline:
+    """Point in time after which a request should be abandoned."""
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def remaining(self, default: Optional[float] = None) -> Optional[float]:
+        """Seconds left before expiry, capped by ``default`` when given."""
+        if self.expires_at is None:
+            return default
+        left = max(0.0, self.expires_at - time.monotonic())
+        return left if default is None else min(left, default)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the request; safe to call from any thread."""
+        self.reason = reason
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise if the request was cancelled or has run out of time."""
+        if self._cancelled.is_set():
+            raise TurnCancelled(self.reason or "cancelled")
+        if self.expired:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def wait(self, future: "Future[T]") -> T:
+        """Wait for ``future`` unless the deadline expires or is cancelled first."""
+        while True:
+            self.check()
+            timeout = self.remaining(_POLL_INTERVAL)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeout:
+                continue
+
+
+_CURRENT_DEADLINE: ContextVar[Optional[Deadline]] = ContextVar(
+    "zona_deadline", default=None
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the request being processed, if any."""
+    return _CURRENT_DEADLINE.get()
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make ``deadline`` the current deadline for the ``with`` block."""
+    token = _CURRENT_DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT_DEADLINE.reset(token)
+
+
+def provider_timeout(default: float) -> float:
+    """Return the timeout a provider should use for its next network call."""
+    deadline = _CURRENT_DEADLINE.get()
+    if deadline is None:
+        return default
+    return deadline.remaining(default) or 0.0
+
+
+__all__ = [
+    "Deadline",
+    "DeadlineExceeded",
+    "TurnCancelled",
+    "current_deadline",
+    "provider_timeout",
+    "use_deadline",
+]
@@ -1,5 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# Session of the chat turn being answered.  Set by the kernel around provider
+# calls so providers keeping per-conversation state (e.g. the Code Llama KV
+# cache) can key it without changing ``generate_response``'s signature.
+_CURRENT_SESSION: ContextVar[Optional[str]] = ContextVar("zona_session", default=None)
+
+
+def current_session() -> Optional[str]:
+    """Return the session id of the turn being answered, if any."""
+    return _CURRENT_SESSION.get()
+
+
+@contextmanager
+def use_session(session_id: Optional[str]) -> Iterator[Optional[str]]:
+    """Make ``session_id`` the current session for the ``with`` block."""
+    token = _CURRENT_SESSION.set(session_id)
+    try:
+        yield session_id
+    finally:
+        _CURRENT_SESSION.reset(token)
 
 
 class BaseProvider(ABC):
@@ -0,0 +1,124 @@
+"""Dynamic batching for local model inference.
+
+A local model answers one padded batch of prompts in little more time than a
+single prompt, so running each concurrent request as its own ``pipeline(...)``
+call wastes the CPU.  :class:`BatchScheduler` collects requests submitted from
+many threads and hands them to a ``run_batch`` callable in one go.  A batch is
+dispatched as soon as it holds ``max_batch_size`` requests or ``max_wait``
+seconds after its first request arrived, whichever comes first, so
+``max_wait`` bounds the latency added for throughput.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.utils.metrics import histogram
+
+_BATCH_SIZE = histogram(
+    "zona_batch_size",
+    "Requests per local inference batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+_QUEUE_SECONDS = histogram(
+    "zona_batch_queue_seconds", "Time requests waited to join an inference batch."
+)
+
+_STOP = object()
+
+
+class BatchScheduler:
+    """Group concurrent requests into batches run by a worker thread."""
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Sequence[Any]],
+        *,
+        max_batch_size: int = 8,
+        max_wait: float = 0.005,
+        name: str = "batch",
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, item: Any) -> Any:
+        """Queue ``item`` and block until its batch has been processed."""
+        return self.submit_async(item).result()
+
+    def submit_async(self, item: Any) -> "Future[Any]":
+        future: "Future[Any]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Batch scheduler is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=f"zona-{self.name}", daemon=True
+                )
+                self._worker.start()
+            self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+            self._queue.put(_STOP)
+        if worker is not None:
+            worker.join()
+
+    def _collect(self, first: Tuple[Any, Future, float]) -> Tuple[List[Tuple[Any, Future, float]], bool]:
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            # Skip requests whose callers have given up.
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            now = time.monotonic()
+            for _, _, queued in batch:
+                _QUEUE_SECONDS.observe(now - queued, scheduler=self.name)
+            _BATCH_SIZE.observe(len(batch), scheduler=self.name)
+            try:
+                results = list(self.run_batch([item for item, _, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"Batch returned {len(results)} results for {len(batch)} requests"
+                    )
+            except BaseException as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+__all__ = ["BatchScheduler"]
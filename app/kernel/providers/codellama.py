@@ -1,30 +1,248 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple
 
 try:
-    from transformers import pipeline
+    from transformers import AutoTokenizer, pipeline
 except Exception:  # pragma: no cover - optional dependency
+    AutoTokenizer = None  # type: ignore[assignment]
     pipeline = None  # type: ignore[assignment]
 
-from .base_provider import BaseProvider
+from app.utils.metrics import counter, histogram
+
+from .base_provider import BaseProvider, current_session
+from .batching import BatchScheduler
+from .kv_cache import PrefixKVCache, generate_with_prefix_cache
+from .model_registry import ModelRegistry, model_registry
+from .quantization import load_quantized_model, normalize_mode
+
+DEFAULT_MODEL = "codellama/CodeLlama-7b-hf"
+
+# Schedulers are shared by every provider instance using the same model and
+# generation settings, so concurrent requests end up in the same batch.
+_SCHEDULERS: Dict[Tuple[Any, ...], BatchScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+# Prefix KV caches, one per loaded model (``None`` when disabled).
+_KV_CACHES: Dict[Tuple[Any, ...], PrefixKVCache | None] = {}
+
+logger = logging.getLogger(__name__)
+
+_KV_MISMATCHES = counter(
+    "zona_kv_cache_mismatches_total",
+    "Cached generations that differed from uncached generation during verification.",
+)
+
+_GENERATED_TOKENS = counter(
+    "zona_generated_tokens_total", "Tokens generated by local models."
+)
+_TOKENS_PER_SECOND = histogram(
+    "zona_generation_tokens_per_second",
+    "Generation throughput of local model calls.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+def load_pipeline(model_name: str, quantize: str | None = None, **pipeline_kwargs: Any) -> Any:
+    """Build a ``text-generation`` pipeline for ``model_name``.
+
+    With ``quantize="int8"`` the model is dynamically quantized for CPU
+    inference (see :mod:`app.kernel.providers.quantization`).
+    """
+    if pipeline is None:
+        raise RuntimeError("transformers library is not installed")
+    if quantize:
+        model = load_quantized_model(model_name, quantize)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("text-generation", model=model, tokenizer=tokenizer, **pipeline_kwargs)
+    return pipeline("text-generation", model=model_name, **pipeline_kwargs)
+
+
+def _new_tokens(pipe: Any, prompt: str, text: str) -> int:
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is None:
+        return 0
+    generated = text[len(prompt):] if text.startswith(prompt) else text
+    return len(tokenizer(generated, add_special_tokens=False)["input_ids"])
+
+
+def record_throughput(
+    pipe: Any, prompts: Sequence[str], outputs: Sequence[str], elapsed: float, mode: str
+) -> float:
+    """Record generated tokens for a call and return its tokens per second."""
+    tokens = sum(_new_tokens(pipe, p, o) for p, o in zip(prompts, outputs))
+    if not tokens or elapsed <= 0:
+        return 0.0
+    rate = tokens / elapsed
+    _GENERATED_TOKENS.inc(tokens, mode=mode)
+    _TOKENS_PER_SECOND.observe(rate, mode=mode)
+    return rate
+
+
+def preload_models(registry: ModelRegistry | None = None) -> None:
+    """Load the models listed in ``PRELOAD_MODELS`` (comma separated)."""
+    names = [n.strip() for n in os.getenv("PRELOAD_MODELS", "").split(",") if n.strip()]
+    (registry or model_registry).preload(names, load_pipeline)
+
+
+def generate_batch(
+    pipe: Any, prompts: Sequence[str], max_length: int, mode: str = "full"
+) -> List[str]:
+    """Run ``prompts`` through ``pipe`` as one left-padded batch."""
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is not None:
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = pipe.model.config.eos_token_id
+        # Decoder-only models must be padded on the left to continue the text.
+        tokenizer.padding_side = "left"
+    start = time.perf_counter()
+    results = pipe(list(prompts), max_length=max_length, batch_size=len(prompts))
+    outputs = [result[0]["generated_text"] for result in results]
+    record_throughput(pipe, prompts, outputs, time.perf_counter() - start, mode)
+    return outputs
 
 
 class CodeLlamaProvider(BaseProvider):
-    """Provider that uses a local Code Llama model via ``transformers``."""
+    """Provider that uses a local Code Llama model via ``transformers``.
+
+    The pipeline is obtained from the shared :class:`ModelRegistry`, so the
+    model is loaded once per process rather than once per provider instance.
+    Concurrent requests are grouped by a :class:`BatchScheduler` into batches
+    of up to ``max_batch_size`` prompts (``CODELLAMA_MAX_BATCH``), waiting at
+    most ``batch_wait_ms`` (``CODELLAMA_BATCH_WAIT_MS``) for a batch to fill.
+    A ``max_batch_size`` of 1 disables batching.
+
+    ``quantize="int8"`` (or ``CODELLAMA_QUANTIZE=int8``) runs a dynamically
+    quantized copy of the model on CPU instead of the full-precision weights.
 
-    def __init__(self, model: str | None = None, **pipeline_kwargs: Any) -> None:
+    When ``CODELLAMA_KV_CACHE_MB`` is set (or ``kv_cache`` is given), prompts
+    reuse the attention cache of the longest previously processed prefix,
+    typically the earlier turns of the same conversation.  Entries are keyed by
+    the session of the chat turn (see
+    :func:`~app.kernel.providers.base_provider.current_session`) unless
+    ``cache_key`` is passed to :meth:`generate_response`.  Cached generation
+    runs one prompt at a time and bypasses the batch scheduler, so with the KV
+    cache enabled ``max_batch_size`` has no effect: it suits long multi-turn
+    sessions, batching suits many concurrent short prompts.
+    ``verify_kv_cache`` (``CODELLAMA_KV_CACHE_VERIFY``) also runs uncached
+    generation and falls back to it on any difference.
+    """
+
+    def __init__(
+        self,
+        model: str | None = None,
+        *,
+        registry: ModelRegistry | None = None,
+        max_batch_size: int | None = None,
+        batch_wait_ms: float | None = None,
+        quantize: str | None = None,
+        kv_cache: PrefixKVCache | None = None,
+        verify_kv_cache: bool | None = None,
+        **pipeline_kwargs: Any,
+    ) -> None:
         if pipeline is None:
             raise RuntimeError("transformers library is not installed")
-        model_name = model or "codellama/CodeLlama-7b-hf"
-        self.pipeline = pipeline(
-            "text-generation", model=model_name, **pipeline_kwargs
-        )
+        self.model_name = model or DEFAULT_MODEL
+        if quantize is None:
+            quantize = os.getenv("CODELLAMA_QUANTIZE")
+        self.quantize = normalize_mode(quantize)
+        if self.quantize:
+            pipeline_kwargs["quantize"] = self.quantize
+        self.pipeline_kwargs = pipeline_kwargs
+        self.registry = registry or model_registry
+        if max_batch_size is None:
+            max_batch_size = int(os.getenv("CODELLAMA_MAX_BATCH", "8"))
+        if batch_wait_ms is None:
+            batch_wait_ms = float(os.getenv("CODELLAMA_BATCH_WAIT_MS", "5"))
+        self.max_batch_size = max_batch_size
+        self.batch_wait_ms = batch_wait_ms
+        if kv_cache is None:
+            kv_cache = self._shared_kv_cache()
+        self.kv_cache = kv_cache
+        if verify_kv_cache is None:
+            verify_kv_cache = os.getenv("CODELLAMA_KV_CACHE_VERIFY", "false").lower() in {
+                "1",
+                "true",
+                "yes",
+            }
+        self.verify_kv_cache = verify_kv_cache
+
+    @property
+    def pipeline(self) -> Any:
+        return self.registry.get(self.model_name, load_pipeline, **self.pipeline_kwargs)
 
     def generate_response(self, messages: List[Dict[str, str]] | str, **kwargs: Any) -> str:  # type: ignore[override]
         if isinstance(messages, list):
             prompt = "\n".join(m.get("content", "") for m in messages)
         else:
             prompt = str(messages)
-        result = self.pipeline(prompt, max_length=kwargs.get("max_tokens", 1000))
-        return result[0]["generated_text"]
+        max_length = kwargs.get("max_tokens", 1000)
+        if self.kv_cache is not None:
+            cache_key = kwargs.get("cache_key") or current_session()
+            return self._generate_cached(prompt, max_length, cache_key)
+        if self.max_batch_size > 1:
+            return self._scheduler(max_length).submit(prompt)
+        with self.registry.use(self.model_name, load_pipeline, **self.pipeline_kwargs) as pipe:
+            start = time.perf_counter()
+            result = pipe(prompt, max_length=max_length)
+            text = result[0]["generated_text"]
+            record_throughput(pipe, [prompt], [text], time.perf_counter() - start, self.mode)
+        return text
+
+    def _generate_cached(self, prompt: str, max_length: int, cache_key: Any) -> str:
+        with self.registry.use(self.model_name, load_pipeline, **self.pipeline_kwargs) as pipe:
+            start = time.perf_counter()
+            text = generate_with_prefix_cache(
+                pipe.model, pipe.tokenizer, prompt, self.kv_cache, key=cache_key, max_length=max_length
+            )
+            record_throughput(pipe, [prompt], [text], time.perf_counter() - start, self.mode)
+            if self.verify_kv_cache:
+                expected = pipe(prompt, max_length=max_length)[0]["generated_text"]
+                if expected != text:
+                    _KV_MISMATCHES.inc(mode=self.mode)
+                    logger.warning("Prefix KV cache output differed for %s; cache cleared", self.model_name)
+                    self.kv_cache.clear()
+                    return expected
+        return text
+
+    def _shared_kv_cache(self) -> PrefixKVCache | None:
+        key = (self.registry, self.registry.make_key(self.model_name, self.pipeline_kwargs))
+        with _SCHEDULERS_LOCK:
+            if key not in _KV_CACHES:
+                _KV_CACHES[key] = PrefixKVCache.from_env(name=self.model_name)
+            return _KV_CACHES[key]
+
+    @property
+    def mode(self) -> str:
+        """Label of the inference mode, ``full`` or the quantization mode."""
+        return self.quantize or "full"
+
+    def _scheduler(self, max_length: int) -> BatchScheduler:
+        key = (
+            self.registry,
+            self.registry.make_key(self.model_name, self.pipeline_kwargs),
+            max_length,
+            self.max_batch_size,
+            self.batch_wait_ms,
+        )
+        with _SCHEDULERS_LOCK:
+            scheduler = _SCHEDULERS.get(key)
+            if scheduler is None:
+                registry, name, options = self.registry, self.model_name, self.pipeline_kwargs
+                mode = self.mode
+
+                def run_batch(prompts: List[str]) -> List[str]:
+                    with registry.use(name, load_pipeline, **options) as pipe:
+                        return generate_batch(pipe, prompts, max_length, mode)
+
+                scheduler = BatchScheduler(
+                    run_batch,
+                    max_batch_size=self.max_batch_size,
+                    max_wait=self.batch_wait_ms / 1000,
+                    name="codellama",
+                )
+                _SCHEDULERS[key] = scheduler
+            return scheduler
@@ -0,0 +1,220 @@
+"""Reuse of attention key/value caches across turns of local models.
+
+Each chat turn sends the whole conversation to a local model, but everything
+except the newest messages was already processed in the previous turn.
+:class:`PrefixKVCache` keeps the ``past_key_values`` of recent generations
+together with the token ids they cover.  A new prompt looks up the entry
+sharing its longest token prefix, preferring the entry stored under the same
+``key`` (usually the session), and only the remaining tokens are run through
+the model.
+
+Entries are evicted least recently used first once their combined size exceeds
+``budget`` bytes.  Caches are copied on lookup because generation extends them
+in place.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, List, Optional, Sequence
+
+from app.utils.metrics import counter, gauge
+
+_LOOKUPS = counter("zona_kv_cache_lookups_total", "Prefix KV-cache lookups by result.")
+_REUSED_TOKENS = counter(
+    "zona_kv_cache_reused_tokens_total", "Prompt tokens served from the prefix KV cache."
+)
+_CACHE_BYTES = gauge("zona_kv_cache_bytes", "Estimated memory held by prefix KV caches.")
+
+
+def estimate_cache_size(cache: Any) -> int:
+    """Sum the bytes of every tensor held by a ``past_key_values`` object."""
+    layers = getattr(cache, "key_cache", None)
+    if layers is not None:
+        tensors = list(layers) + list(getattr(cache, "value_cache", []))
+    elif hasattr(cache, "to_legacy_cache"):
+        tensors = [t for layer in cache.to_legacy_cache() for t in layer]
+    else:
+        tensors = [t for layer in cache for t in layer]
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def common_prefix_length(a: Sequence[int], b: Sequence[int]) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+@dataclass
+class CacheEntry:
+    key: Hashable
+    token_ids: List[int]
+    cache: Any
+    size: int
+    last_used: float
+
+
+@dataclass
+class CacheHit:
+    """A private copy of a cached prefix, cropped to ``length`` tokens."""
+
+    key: Hashable
+    cache: Any
+    length: int
+
+
+class PrefixKVCache:
+    """LRU store of key/value caches indexed by the token prefix they cover."""
+
+    def __init__(
+        self,
+        budget: int,
+        *,
+        min_prefix: int = 8,
+        sizeof: Callable[[Any], int] = estimate_cache_size,
+        name: str = "default",
+    ) -> None:
+        self.budget = budget
+        self.min_prefix = min_prefix
+        self.name = name
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._total = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str = "default") -> Optional["PrefixKVCache"]:
+        """Return a cache sized by ``CODELLAMA_KV_CACHE_MB``, or ``None`` if unset."""
+        budget_mb = float(os.getenv("CODELLAMA_KV_CACHE_MB", "0"))
+        if budget_mb <= 0:
+            return None
+        return cls(int(budget_mb * 1024 * 1024), name=name)
+
+    @property
+    def size(self) -> int:
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, token_ids: Sequence[int], key: Hashable = None) -> Optional[CacheHit]:
+        """Return a copy of the cache with the longest prefix of ``token_ids``.
+
+        At least one token of ``token_ids`` is always left uncached so the
+        model has an input to produce the next token from.
+        """
+        with self._lock:
+            if key is not None and key in self._entries:
+                candidates = [self._entries[key]]
+            else:
+                candidates = list(self._entries.values())
+            best, best_length = None, 0
+            for entry in candidates:
+                length = common_prefix_length(entry.token_ids, token_ids)
+                if length > best_length:
+                    best, best_length = entry, length
+            usable = min(best_length, len(token_ids) - 1)
+            if best is None or usable < self.min_prefix:
+                _LOOKUPS.inc(cache=self.name, result="miss")
+                return None
+            best.last_used = time.monotonic()
+            self._entries.move_to_end(best.key)
+            source, stored = best.cache, len(best.token_ids)
+
+        cache = copy.deepcopy(source)
+        if usable < stored:
+            if not hasattr(cache, "crop"):
+                _LOOKUPS.inc(cache=self.name, result="miss")
+                return None
+            cache.crop(usable)
+        _LOOKUPS.inc(cache=self.name, result="hit")
+        _REUSED_TOKENS.inc(usable, cache=self.name)
+        return CacheHit(best.key, cache, usable)
+
+    def store(self, token_ids: Sequence[int], cache: Any, key: Hashable = None) -> Hashable:
+        """Keep ``cache`` (covering ``token_ids``) under ``key``, replacing it."""
+        size = self._sizeof(cache)
+        with self._lock:
+            if key is None:
+                key = ("auto", next(self._ids))
+            self._remove(key)
+            if size <= self.budget:
+                self._entries[key] = CacheEntry(key, list(token_ids), cache, size, time.monotonic())
+                self._total += size
+                while self._total > self.budget and self._entries:
+                    self._remove(next(iter(self._entries)))
+            _CACHE_BYTES.set(self._total, cache=self.name)
+        return key
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+            _CACHE_BYTES.set(self._total, cache=self.name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+            _CACHE_BYTES.set(0, cache=self.name)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= entry.size
+
+
+def generate_with_prefix_cache(
+    model: Any,
+    tokenizer: Any,
+    prompt: str,
+    cache: PrefixKVCache,
+    *,
+    key: Hashable = None,
+    **generate_kwargs: Any,
+) -> str:
+    """Generate a continuation of ``prompt``, reusing a cached prefix if any.
+
+    The returned text matches the ``generated_text`` of a ``text-generation``
+    pipeline: the prompt followed by the decoded new tokens.
+    """
+    import torch
+    from transformers import DynamicCache
+
+    encoded = tokenizer(prompt, return_tensors="pt")
+    input_ids = encoded["input_ids"]
+    token_ids = input_ids[0].tolist()
+    hit = cache.lookup(token_ids, key=key)
+    past = hit.cache if hit is not None else DynamicCache()
+    with torch.no_grad():
+        output = model.generate(
+            input_ids,
+            attention_mask=encoded.get("attention_mask"),
+            past_key_values=past,
+            **generate_kwargs,
+        )
+    sequence = output[0].tolist()
+    store_key = key if key is not None else (hit.key if hit is not None else None)
+    cache.store(sequence[: past.get_seq_length()], past, key=store_key)
+
+    text = tokenizer.decode(sequence, skip_special_tokens=True)
+    prompt_length = len(tokenizer.decode(token_ids, skip_special_tokens=True))
+    return prompt + text[prompt_length:]
+
+
+__all__ = [
+    "CacheHit",
+    "PrefixKVCache",
+    "common_prefix_length",
+    "estimate_cache_size",
+    "generate_with_prefix_cache",
+]
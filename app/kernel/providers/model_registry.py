@@ -0,0 +1,239 @@
+"""Process-wide registry of locally loaded models.
+
+Loading a local model (e.g. a 7B Code Llama ``transformers`` pipeline) takes
+minutes and gigabytes of memory, so providers must not do it per request.  The
+:class:`ModelRegistry` loads each model once, either lazily on first use or at
+startup through :meth:`ModelRegistry.preload`, and shares it between callers.
+
+Loaded models are tracked with their load time, estimated resident size and
+last use.  Models idle for longer than ``idle_ttl`` can be unloaded with
+:meth:`ModelRegistry.unload_idle`, and when a new load would exceed
+``memory_budget`` the least recently used idle models are evicted first.
+Models currently in use (see :meth:`ModelRegistry.use`) are never unloaded.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.utils.metrics import counter, gauge, histogram
+
+Loader = Callable[..., Any]
+
+_LOADS = counter("zona_model_loads_total", "Local model loads by model.")
+_LOAD_SECONDS = histogram("zona_model_load_seconds", "Time spent loading local models.")
+_RESIDENT_BYTES = gauge("zona_model_resident_bytes", "Estimated memory held by loaded models.")
+
+
+def estimate_model_size(model: Any) -> int:
+    """Best-effort estimate of the bytes held by a loaded model."""
+    for candidate in (model, getattr(model, "model", None)):
+        if candidate is None:
+            continue
+        footprint = getattr(candidate, "get_memory_footprint", None)
+        if callable(footprint):
+            try:
+                return int(footprint())
+            except Exception:
+                pass
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            try:
+                return sum(p.numel() * p.element_size() for p in parameters())
+            except Exception:
+                pass
+    return 0
+
+
+def _release_accelerator_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and getattr(torch, "cuda", None) is not None:
+        try:
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:  # pragma: no cover - depends on the runtime
+            pass
+
+
+@dataclass
+class ModelEntry:
+    """A model held by the registry."""
+
+    key: str
+    name: str
+    model: Any
+    load_seconds: float
+    size_bytes: int
+    loaded_at: float
+    last_used: float
+    users: int = 0
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "key": self.key,
+            "load_seconds": round(self.load_seconds, 3),
+            "size_bytes": self.size_bytes,
+            "idle_seconds": round(0.0 if self.users else now - self.last_used, 3),
+            "in_use": self.users,
+        }
+
+
+class ModelRegistry:
+    """Load local models once and share them between callers."""
+
+    def __init__(
+        self,
+        *,
+        memory_budget: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        budget_mb = os.getenv("MODEL_MEMORY_BUDGET_MB")
+        idle_ttl = os.getenv("MODEL_IDLE_TTL_SECONDS")
+        return cls(
+            memory_budget=int(float(budget_mb) * 1024 * 1024) if budget_mb else None,
+            idle_ttl=float(idle_ttl) if idle_ttl else None,
+        )
+
+    @staticmethod
+    def make_key(name: str, options: Dict[str, Any]) -> str:
+        if not options:
+            return name
+        return name + "|" + ",".join(f"{k}={options[k]!r}" for k in sorted(options))
+
+    @contextmanager
+    def use(self, name: str, loader: Loader, **options: Any) -> Iterator[Any]:
+        """Yield the model ``name``, loading it with ``loader`` if needed.
+
+        The model cannot be unloaded while the ``with`` block runs.
+        """
+        entry = self._acquire(name, loader, options)
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = self._clock()
+
+    def get(self, name: str, loader: Loader, **options: Any) -> Any:
+        """Return the model ``name`` without pinning it."""
+        with self.use(name, loader, **options) as model:
+            return model
+
+    def preload(self, names: Iterable[str], loader: Loader, **options: Any) -> None:
+        for name in names:
+            self.get(name, loader, **options)
+
+    def _acquire(self, name: str, loader: Loader, options: Dict[str, Any]) -> ModelEntry:
+        key = self.make_key(name, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.users += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Loads of different models may run concurrently; callers asking for
+        # the same model wait for the first load instead of repeating it.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.users += 1
+                    return entry
+            self.unload_idle()
+            start = time.perf_counter()
+            model = loader(name, **options)
+            elapsed = time.perf_counter() - start
+            size = estimate_model_size(model)
+            now = self._clock()
+            entry = ModelEntry(key, name, model, elapsed, size, now, now, users=1)
+            with self._lock:
+                self._entries[key] = entry
+                self._load_locks.pop(key, None)
+                evicted = self._evict_over_budget()
+            _LOADS.inc(model=name)
+            _LOAD_SECONDS.observe(elapsed, model=name)
+            _RESIDENT_BYTES.set(size, model=key)
+            if evicted:
+                _release_accelerator_memory()
+            return entry
+
+    def _evict_over_budget(self) -> List[ModelEntry]:
+        """Drop least recently used idle models until within budget."""
+        evicted: List[ModelEntry] = []
+        if self.memory_budget is None:
+            return evicted
+        total = sum(e.size_bytes for e in self._entries.values())
+        for entry in sorted(self._entries.values(), key=lambda e: e.last_used):
+            if total <= self.memory_budget:
+                break
+            if entry.users:
+                continue
+            self._drop(entry)
+            total -= entry.size_bytes
+            evicted.append(entry)
+        return evicted
+
+    def _drop(self, entry: ModelEntry) -> None:
+        self._entries.pop(entry.key, None)
+        _RESIDENT_BYTES.set(0, model=entry.key)
+
+    def unload(self, key: str) -> bool:
+        """Unload a model by registry key unless it is in use."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.users:
+                return False
+            self._drop(entry)
+        _release_accelerator_memory()
+        return True
+
+    def unload_idle(self) -> List[str]:
+        """Unload models unused for longer than ``idle_ttl``."""
+        if self.idle_ttl is None:
+            return []
+        now = self._clock()
+        with self._lock:
+            idle = [
+                e for e in self._entries.values()
+                if not e.users and now - e.last_used > self.idle_ttl
+            ]
+            for entry in idle:
+                self._drop(entry)
+        if idle:
+            _release_accelerator_memory()
+        return [e.key for e in idle]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            return [e.summary(now) for e in self._entries.values()]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+# Shared by every provider in the process.
+model_registry = ModelRegistry.from_env()
+
+
+__all__ = ["ModelEntry", "ModelRegistry", "estimate_model_size", "model_registry"]
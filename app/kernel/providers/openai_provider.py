@@ -3,6 +3,8 @@ from typing import Dict, List
 
 from openai import OpenAI
 
+from app.kernel.deadline import provider_timeout
+
 from .base_provider import BaseProvider
 
 
@@ -21,7 +23,7 @@ class OpenAIProvider(BaseProvider):
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                timeout=30,
+                timeout=provider_timeout(30),
             )
         except Exception as exc:  # pragma: no cover - handle network/API errors
             raise RuntimeError(
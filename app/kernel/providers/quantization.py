@@ -0,0 +1,145 @@
+"""Quantized CPU inference for local ``transformers`` models.
+
+``int8`` mode applies PyTorch dynamic quantization to every ``nn.Linear`` layer
+of a causal language model.  Weights are stored as int8 and activations are
+quantized on the fly, which roughly quarters the memory used by the linear
+layers and speeds up CPU matrix multiplications.
+
+Converting a 7B model takes a while and needs the full-precision weights in
+memory, so the quantized ``state_dict`` is saved to ``CODELLAMA_QUANTIZED_DIR``
+(default ``~/.cache/zona/quantized``).  Later startups build the model from its
+config with parameters on the ``meta`` device, so no full-precision weights are
+allocated, swap in empty quantized ``Linear`` layers and load the tensors with
+``weights_only=True``, so a file in that directory cannot run code.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("int8",)
+
+
+def normalize_mode(mode: Optional[str]) -> Optional[str]:
+    """Return a supported quantization mode, or ``None`` for full precision."""
+    if mode is None or mode.strip().lower() in {"", "none", "fp32", "full"}:
+        return None
+    mode = mode.strip().lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+    return mode
+
+
+def cache_dir() -> Path:
+    default = Path.home() / ".cache" / "zona" / "quantized"
+    return Path(os.getenv("CODELLAMA_QUANTIZED_DIR", str(default)))
+
+
+def quantized_path(model_name: str, mode: str, directory: Optional[Path] = None) -> Path:
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name)
+    return (directory or cache_dir()) / f"{safe_name}.{mode}.pt"
+
+
+def _quantize(model: Any) -> Any:
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    model.eval()
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+@contextmanager
+def _empty_weights() -> Iterator[None]:
+    """Create module parameters on the ``meta`` device; buffers stay on the CPU.
+
+    The equivalent of ``accelerate.init_empty_weights(include_buffers=False)``.
+    """
+    import torch
+
+    register = torch.nn.Module.register_parameter
+
+    def register_on_meta(module: Any, name: str, param: Any) -> None:
+        register(module, name, param)
+        if param is not None:
+            module._parameters[name] = torch.nn.Parameter(
+                param.to("meta"), requires_grad=param.requires_grad
+            )
+
+    torch.nn.Module.register_parameter = register_on_meta
+    try:
+        yield
+    finally:
+        torch.nn.Module.register_parameter = register
+
+
+def _quantized_skeleton(model: Any) -> Any:
+    """Replace the ``nn.Linear`` layers of ``model`` as :func:`_quantize` does.
+
+    The new layers hold empty int8 weights, to be filled by ``load_state_dict``.
+    """
+    import torch
+    from torch.ao.nn.quantized.dynamic import Linear as QuantizedLinear
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if type(child) is torch.nn.Linear:
+                setattr(
+                    module,
+                    name,
+                    QuantizedLinear(
+                        child.in_features,
+                        child.out_features,
+                        bias_=child.bias is not None,
+                        dtype=torch.qint8,
+                    ),
+                )
+    return model.eval()
+
+
+def load_quantized_model(model_name: str, mode: str = "int8", directory: Optional[Path] = None) -> Any:
+    """Return ``model_name`` quantized with ``mode``, converting it only once."""
+    try:
+        import torch
+        from transformers import AutoConfig, AutoModelForCausalLM
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("Quantized inference requires torch and transformers") from exc
+
+    path = quantized_path(model_name, mode, directory)
+    if path.exists():
+        try:
+            state_dict = torch.load(path, weights_only=True)
+            config = AutoConfig.from_pretrained(model_name)
+            with _empty_weights():
+                model = AutoModelForCausalLM.from_config(config)
+            model = _quantized_skeleton(model)
+            model.load_state_dict(state_dict, assign=True)
+            if any(param.is_meta for param in model.parameters()):
+                raise ValueError("the file does not hold every weight of the model")
+            return model
+        except Exception as exc:
+            logger.warning("Discarding unreadable quantized model %s: %s", path, exc)
+            path.unlink(missing_ok=True)
+
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    quantized = _quantize(model)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    torch.save(quantized.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return quantized
+
+
+__all__ = [
+    "QUANTIZATION_MODES",
+    "cache_dir",
+    "load_quantized_model",
+    "normalize_mode",
+    "quantized_path",
+]
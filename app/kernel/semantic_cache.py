@@ -0,0 +1,214 @@
+"""Semantic near-duplicate response cache.
+
+Prompts are embedded with a CPU-only hashing vectorizer (word unigrams plus
+character trigrams, no model download required) and compared against a
+fixed-size NumPy matrix of cached prompt vectors.  Because vectors are L2
+normalised, one matrix-vector product yields the cosine similarity to every
+cached entry; the best match is returned when it clears the configured
+threshold.  Entries expire after a TTL and, once the cache is full, the least
+recently used entry is overwritten.
+
+The cache is opt-in (``SEMANTIC_CACHE_ENABLED``).  Entries are scoped to the
+session that produced them unless ``SEMANTIC_CACHE_SCOPE=global``, since a
+reply such as an invoice total is only valid for its owner, and are dropped
+when their session is cleared; see :meth:`SemanticCache.from_env` for the
+available settings.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import hashlib
+import threading
+import time
+import zlib
+from typing import Callable, List, Optional
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - library missing
+    np = None  # type: ignore[assignment]
+
+from app.utils.metrics import counter
+
+_CACHE_REQUESTS = counter(
+    "zona_semantic_cache_requests_total", "Semantic cache lookups by result."
+)
+
+SCOPES = ("session", "global")
+
+# Separates the provider from the session in session-scoped namespaces.
+_SESSION_SEPARATOR = "\x00"
+
+_TOKEN_RE = re.compile(r"[0-9a-zçğıöşü]+")
+
+# Function words that carry little meaning for matching paraphrases.
+STOPWORDS = frozenset(
+    """
+    a an and are be can could do does for from give how i in is it me my of on
+    or our please s show tell that the this to us was we what whats which you
+    your bana bir bu da de ne mi mı nedir
+    """.split()
+)
+
+
+def _normalize_token(token: str) -> str:
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+class HashingVectorizer:
+    """Map text to a fixed-size, L2 normalised vector via feature hashing."""
+
+    def __init__(self, dim: int = 1024, char_ngram: int = 3, char_weight: float = 0.5) -> None:
+        if np is None:
+            raise RuntimeError("numpy library is not installed")
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.char_weight = char_weight
+
+    def tokens(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        return [_normalize_token(w) for w in words if w not in STOPWORDS]
+
+    def _add(self, vec, feature: str, weight: float) -> None:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vec[digest % self.dim] += sign * weight
+
+    def transform(self, text: str):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in self.tokens(text):
+            self._add(vec, "w:" + token, 1.0)
+            padded = f"#{token}#"
+            grams = [
+                padded[i : i + self.char_ngram]
+                for i in range(max(1, len(padded) - self.char_ngram + 1))
+            ]
+            for gram in grams:
+                self._add(vec, "c:" + gram, self.char_weight / len(grams))
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec /= norm
+        return vec
+
+
+class SemanticCache:
+    """Cache responses keyed by the meaning of the prompt."""
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.9,
+        ttl: float = 3600.0,
+        capacity: int = 1024,
+        scope: str = "session",
+        vectorizer: HashingVectorizer | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown semantic cache scope: {scope}")
+        self.scope = scope
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((capacity, self.vectorizer.dim), dtype=np.float32)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._namespaces = np.full(capacity, -1, dtype=np.int64)
+        self._sessions = np.full(capacity, -1, dtype=np.int64)
+        self._responses: List[Optional[str]] = [None] * capacity
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache | None":
+        """Build a cache from ``SEMANTIC_CACHE_*`` variables, or ``None`` if disabled."""
+        enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in {"1", "true", "yes"}
+        if not enabled or np is None:
+            return None
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            capacity=int(os.getenv("SEMANTIC_CACHE_CAPACITY", "1024")),
+            scope=os.getenv("SEMANTIC_CACHE_SCOPE", "session").lower(),
+        )
+
+    def namespace_for(self, provider: str, session_id: str) -> str:
+        """Return the namespace of a turn of ``session_id`` on ``provider``."""
+        if self.scope == "global":
+            return provider
+        return f"{provider}{_SESSION_SEPARATOR}{session_id}"
+
+    @staticmethod
+    def _namespace_id(namespace: str) -> int:
+        # Hashed rather than numbered so per-session namespaces need no registry.
+        digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") >> 1
+
+    def lookup(self, prompt: str, namespace: str = "") -> Optional[str]:
+        """Return the cached response for a prompt similar to ``prompt``."""
+        vec = self.vectorizer.transform(prompt)
+        now = self._clock()
+        ns = self._namespace_id(namespace)
+        with self._lock:
+            live = (self._expires > now) & (self._namespaces == ns)
+            if not live.any() or not vec.any():
+                _CACHE_REQUESTS.inc(result="miss")
+                return None
+            scores = self._vectors @ vec
+            scores[~live] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                _CACHE_REQUESTS.inc(result="miss")
+                return None
+            self._last_used[best] = now
+            _CACHE_REQUESTS.inc(result="hit")
+            return self._responses[best]
+
+    def store(self, prompt: str, response: str, namespace: str = "") -> None:
+        """Cache ``response`` for ``prompt``, evicting an entry if needed."""
+        vec = self.vectorizer.transform(prompt)
+        if not vec.any():
+            return
+        now = self._clock()
+        with self._lock:
+            free = np.flatnonzero(self._expires <= now)
+            slot = int(free[0]) if free.size else int(np.argmin(self._last_used))
+            self._vectors[slot] = vec
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._namespaces[slot] = self._namespace_id(namespace)
+            self._sessions[slot] = self._session_id(namespace)
+            self._responses[slot] = response
+
+    @classmethod
+    def _session_id(cls, namespace: str) -> int:
+        _, separator, session_id = namespace.partition(_SESSION_SEPARATOR)
+        return cls._namespace_id(session_id) if separator else -1
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop the entries produced by ``session_id``, e.g. when it is cleared."""
+        with self._lock:
+            owned = self._sessions == self._namespace_id(session_id)
+            self._expires[owned] = 0
+            self._namespaces[owned] = -1
+            self._sessions[owned] = -1
+            for slot in np.flatnonzero(owned):
+                self._responses[slot] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires[:] = 0
+            self._namespaces[:] = -1
+            self._sessions[:] = -1
+            self._responses = [None] * self.capacity
+
+    def __len__(self) -> int:
+        return int((self._expires > self._clock()).sum())
+
+
+__all__ = ["HashingVectorizer", "SemanticCache"]
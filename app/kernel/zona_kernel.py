@@ -1,11 +1,57 @@
-from typing import Callable, Dict, List
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.kernel.providers import BaseProvider
+from app.kernel.providers.base_provider import use_session
 from app.kernel.providers.openai_provider import OpenAIProvider
 from app.kernel.providers.vertexai_provider import VertexAIProvider
 from app.kernel.providers.gemini_provider import GeminiProvider
+from app.kernel.deadline import Deadline, TurnCancelled, current_deadline, use_deadline
+from app.kernel.semantic_cache import SemanticCache
 from app.storage.memory_store import MemoryStore
-from zona.plugin_manager import handle_plugin_command
+from app.utils.metrics import counter, track_stage
+from app.utils.profiling import profile_call
+from app.utils.tracing import span, traced
+from zona.plugin_manager import (
+    ahandle_plugin_command,
+    handle_plugin_command,
+    is_side_effect_free,
+    split_commands,
+)
+
+
+# Provider calls made under a deadline run here so the kernel can stop waiting
+# for them; an abandoned call finishes in the background and is discarded.
+_PROVIDER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PROVIDER_THREADS", "32")),
+    thread_name_prefix="zona-provider",
+)
+
+# Plugins run here when no event loop is bound to the kernel (see
+# ``ZonaKernel.bind_loop``).  Side-effect-free plugins are started while the
+# user is still being asked to confirm the command.
+_PLUGIN_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECULATIVE_PLUGIN_THREADS", "4")),
+    thread_name_prefix="zona-plugin",
+)
+
+_SPECULATION = counter(
+    "zona_plugin_speculation_total",
+    "Speculative plugin runs by how their result was used.",
+)
+
+
+def provider_label(provider: BaseProvider) -> str:
+    """Return a short metric label for ``provider`` (e.g. ``openai``)."""
+    name = type(provider).__name__
+    if name.endswith("Provider") and name != "Provider":
+        name = name[: -len("Provider")]
+    return name.lower()
 
 
 class ZonaKernel:
@@ -17,6 +63,9 @@ class ZonaKernel:
         *,
         max_messages: int | None = 20,
         max_total_length: int | None = None,
+        semantic_cache: SemanticCache | None = None,
+        cache_max_context: int | None = None,
+        recall_k: int | None = None,
     ) -> None:
         self.provider = provider or OpenAIProvider()
         self.store = MemoryStore()
@@ -24,16 +73,48 @@ class ZonaKernel:
         self.max_messages = max_messages
         self.max_total_length = max_total_length
         self.pending_actions: Dict[str, str] = {}
+        # Chat turns run in concurrent worker threads; this lock guards
+        # ``memory``, ``pending_actions``, ``speculative_runs`` and saving
+        # memory, but is not held while a provider or plugin runs.
+        self.lock = threading.RLock()
+        # session -> (command, future, started) for speculative plugin runs
+        self.speculative_runs: Dict[str, Tuple[str, Future, float]] = {}
+        self.speculation_ttl = float(os.getenv("SPECULATIVE_PLUGIN_TTL", "60"))
+        # Longest wait for a plugin result when the turn has no deadline.
+        self.plugin_timeout = float(os.getenv("ZONA_PLUGIN_TIMEOUT", "30"))
+        # Event loop plugins are awaited on; set by the server at startup.
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Session-scoped caches are consulted on every turn; a global cache
+        # only for prompts arriving with at most ``cache_max_context`` earlier
+        # messages in the session, as later turns depend on the conversation.
+        if semantic_cache is None:
+            semantic_cache = SemanticCache.from_env()
+        self.semantic_cache = semantic_cache
+        if cache_max_context is None:
+            cache_max_context = int(os.getenv("SEMANTIC_CACHE_MAX_CONTEXT", "0"))
+        self.cache_max_context = cache_max_context
+        # Number of older turns recalled from long-term memory and sent to the
+        # provider in addition to the recent window.
+        if recall_k is None:
+            recall_k = int(os.getenv("LONG_TERM_RECALL_K", "3"))
+        self.recall_k = recall_k
 
         self.providers: Dict[str, Callable[..., str]] = {
             "openai": self.openai_chat,
             "gemini": self.gemini_chat,
             "vertexai": self.vertexai_chat,
         }
+        # Factories used for stateless completions (see :meth:`complete`).
+        self.provider_factories: Dict[str, Callable[[], BaseProvider]] = {
+            "openai": OpenAIProvider,
+            "gemini": GeminiProvider,
+            "vertexai": VertexAIProvider,
+        }
 
     def obfuscate(self, text: str) -> str:
         return text[::-1]
 
+    @traced("ZonaKernel.chat")
     def chat(
         self,
         provider: BaseProvider,
@@ -43,16 +124,22 @@ class ZonaKernel:
         obfuscate_output: bool = False,
     ) -> str:
         stripped = prompt.strip()
+        label = provider_label(provider)
 
-        if session_id in self.pending_actions:
-            confirmation = stripped.lower()
-            if confirmation in {"yes", "y"}:
-                command = self.pending_actions.pop(session_id)
-                return handle_plugin_command(command)
-            if confirmation in {"no", "n"}:
+        with self.lock:
+            command = self.pending_actions.get(session_id)
+            if command is not None:
+                confirmation = stripped.lower()
+                if confirmation in {"no", "n"}:
+                    self.pending_actions.pop(session_id)
+                    self._discard_speculation(session_id, "cancelled")
+                    return "Cancelled."
+                if confirmation not in {"yes", "y"}:
+                    return "Please reply 'yes' or 'no'."
                 self.pending_actions.pop(session_id)
-                return "Cancelled."
-            return "Please reply 'yes' or 'no'."
+        if command is not None:
+            with track_stage("plugin", label):
+                return self._run_confirmed_plugin(session_id, command)
 
         if stripped == "!clear":
             self.clear_memory(session_id)
@@ -61,23 +148,173 @@ class ZonaKernel:
             self.clear_memory()
             return "All memory cleared."
         if stripped.startswith("!"):
-            self.pending_actions[session_id] = stripped
+            with self.lock:
+                self.pending_actions[session_id] = stripped
+                self._speculate(session_id, stripped)
+            pipelines = split_commands(stripped)
+            if len(pipelines) > 1 or len(pipelines[0]) > 1:
+                listing = "\n".join(f"- `{' | '.join(steps)}`" for steps in pipelines)
+                return f"Run these plugin commands?\n{listing}\n(yes/no)"
             name, *args = stripped[1:].split(maxsplit=1)
             args_str = args[0] if args else ""
             return f"Run plugin `{name}` with args `{args_str}`? (yes/no)"
 
-        history = self.memory.setdefault(session_id, [])
-        history.append({"role": "user", "content": prompt})
-        self._trim_history(history)
+        user_message = {"role": "user", "content": prompt}
+        with self.lock:
+            history = self.memory.setdefault(session_id, [])
+            cacheable = self.semantic_cache is not None and (
+                self.semantic_cache.scope == "session"
+                or len(history) <= self.cache_max_context
+            )
+            history.append(user_message)
+            with track_stage("trim_history", label):
+                self._trim_history(history)
+            window = list(history)
 
-        content = provider.generate_response(history)
+        content = None
+        if cacheable:
+            namespace = self.semantic_cache.namespace_for(label, session_id)
+            with track_stage("semantic_cache", label):
+                content = self.semantic_cache.lookup(stripped, namespace=namespace)
+        if content is None:
+            try:
+                with track_stage("recall", label):
+                    context = self._with_recall(session_id, stripped, window)
+                with track_stage("provider", label), span("provider.generate_response", provider=label):
+                    with use_session(session_id):
+                        content = self._generate(provider, context, current_deadline())
+            except TurnCancelled:
+                # Forget the turn entirely so no half-finished exchange is kept.
+                with self.lock:
+                    history[:] = [m for m in history if m is not user_message]
+                    if not history and self.memory.get(session_id) is history:
+                        self.memory.pop(session_id)
+                raise
+            if cacheable:
+                self.semantic_cache.store(stripped, content, namespace=namespace)
 
-        history.append({"role": "assistant", "content": content})
-        self._trim_history(history)
-        self.store.save_memory(self.memory)
+        assistant_message = {"role": "assistant", "content": content}
+        with self.lock:
+            history.append(assistant_message)
+            self.store.append_turn(session_id, [user_message, assistant_message])
+            with track_stage("trim_history", label):
+                self._trim_history(history)
+            with track_stage("save_memory", label):
+                self.store.save_memory(self.memory)
 
         return self.obfuscate(content) if obfuscate_output else content
 
+    def _with_recall(
+        self, session_id: str, query: str, history: List[dict[str, str]]
+    ) -> List[dict[str, str]]:
+        """Prepend relevant turns that fell out of the recent window."""
+        if not self.recall_k:
+            return history
+        turns = self.store.recall(session_id, query, self.recall_k, exclude=history)
+        return [message for turn in turns for message in turn] + history
+
+    def _speculate(self, session_id: str, command: str) -> None:
+        """Start ``command`` early if its plugin has no side effects."""
+        self._expire_speculations()
+        if not is_side_effect_free(command):
+            return
+        future = self._submit_plugin(session_id, command)
+        self.speculative_runs[session_id] = (command, future, time.monotonic())
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Run plugins as coroutines on ``loop`` (``None`` to use threads)."""
+        self.loop = loop
+
+    async def adispatch(self, command: str, context: Optional[dict] = None) -> Optional[str]:
+        """Run plugin ``command`` asynchronously on the current event loop."""
+        return await ahandle_plugin_command(command, context)
+
+    def _submit_plugin(self, session_id: str, command: str) -> Future:
+        """Start ``command`` and return a future of its result.
+
+        Plugins receive ``session_id`` in their context, e.g. to scope cached
+        results per user.
+
+        Chat turns run in worker threads, so with a bound loop the plugin is
+        scheduled there with :meth:`adispatch` and I/O-bound plugins of
+        different sessions run concurrently.  Context variables (tracing,
+        deadline) are carried over in both cases.
+        """
+        plugin_context = {"session_id": session_id}
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                return asyncio.run_coroutine_threadsafe(
+                    self.adispatch(command, plugin_context), loop
+                )
+        context = contextvars.copy_context()
+        return _PLUGIN_EXECUTOR.submit(
+            context.run, handle_plugin_command, command, plugin_context
+        )
+
+    def _run_confirmed_plugin(self, session_id: str, command: str) -> str | None:
+        with self.lock:
+            speculation = self.speculative_runs.pop(session_id, None)
+        if speculation is not None:
+            spec_command, future, started = speculation
+            if spec_command == command and time.monotonic() - started <= self.speculation_ttl:
+                _SPECULATION.inc(result="used")
+                return self._wait_for_plugin(command, future)
+            future.cancel()
+            _SPECULATION.inc(result="expired")
+        if self.loop is None:
+            return handle_plugin_command(command, {"session_id": session_id})
+        return self._wait_for_plugin(command, self._submit_plugin(session_id, command))
+
+    def _wait_for_plugin(self, command: str, future: Future) -> str | None:
+        """Return the result of ``future`` within the turn's deadline.
+
+        Without a deadline the wait is capped at ``plugin_timeout``.  The
+        plugin is cancelled when the wait is abandoned.
+        """
+        deadline = current_deadline()
+        try:
+            if deadline is None or deadline.expires_at is None:
+                return future.result(timeout=self.plugin_timeout)
+            return deadline.wait(future)
+        except FutureTimeout:
+            future.cancel()
+            return f"\u23F1\uFE0F Plugin command `{command}` timed out after {self.plugin_timeout:g}s."
+        except TurnCancelled:
+            future.cancel()
+            raise
+
+    def _discard_speculation(self, session_id: str, reason: str) -> None:
+        speculation = self.speculative_runs.pop(session_id, None)
+        if speculation is not None:
+            speculation[1].cancel()
+            _SPECULATION.inc(result=reason)
+
+    def _expire_speculations(self) -> None:
+        now = time.monotonic()
+        for sid, (_, _, started) in list(self.speculative_runs.items()):
+            if now - started > self.speculation_ttl:
+                self._discard_speculation(sid, "expired")
+
+    def _generate(
+        self,
+        provider: BaseProvider,
+        history: List[dict[str, str]],
+        deadline: Deadline | None,
+    ) -> str:
+        if deadline is None:
+            return provider.generate_response(history)
+        deadline.check()
+        context = contextvars.copy_context()
+        future = _PROVIDER_EXECUTOR.submit(
+            context.run, profile_call, provider.generate_response, list(history)
+        )
+        return deadline.wait(future)
+
     def dispatch_provider(
         self,
         name: str,
@@ -85,16 +322,48 @@ class ZonaKernel:
         session_id: str = "default",
         *,
         obfuscate_output: bool = False,
+        deadline: Deadline | None = None,
     ) -> str:
-        """Dispatch chat request to a provider-specific method by name."""
+        """Dispatch chat request to a provider-specific method by name.
+
+        When ``deadline`` is given, the provider call is abandoned with
+        :class:`~app.kernel.deadline.TurnCancelled` once it expires or is
+        cancelled, and the turn is not written to memory.
+        """
         provider_func = self.providers.get(name.lower())
         if provider_func is None:
             raise ValueError(f"Unknown provider: {name}")
-        return provider_func(prompt, session_id=session_id, obfuscate_output=obfuscate_output)
+        with use_deadline(deadline):
+            return provider_func(prompt, session_id=session_id, obfuscate_output=obfuscate_output)
+
+    def complete(self, name: str, prompt: str) -> str:
+        """Answer a single prompt without touching session memory or plugins.
+
+        Used for offline batch workloads where every prompt is independent.
+        """
+        factory = self.provider_factories.get(name.lower())
+        if factory is None:
+            raise ValueError(f"Provider {name} does not support stateless completion")
+        provider = factory()
+        label = provider_label(provider)
+        with track_stage("provider", label), span("provider.generate_response", provider=label):
+            return provider.generate_response([{"role": "user", "content": prompt}])
+
+    def add_provider(
+        self,
+        name: str,
+        func: Callable[..., str],
+        *,
+        factory: Callable[[], BaseProvider] | None = None,
+    ) -> None:
+        """Register a new provider at runtime.
 
-    def add_provider(self, name: str, func: Callable[..., str]) -> None:
-        """Register a new provider at runtime."""
+        ``factory`` optionally builds a :class:`BaseProvider` so the provider
+        can also serve stateless completions.
+        """
         self.providers[name.lower()] = func
+        if factory is not None:
+            self.provider_factories[name.lower()] = factory
 
     def openai_chat(self, prompt: str, session_id: str = "default", *, obfuscate_output: bool = False) -> str:
         provider = OpenAIProvider()
@@ -118,12 +387,19 @@ class ZonaKernel:
                 total -= len(removed["content"])
 
     def clear_memory(self, session_id: str | None = None) -> None:
-        if session_id is None:
-            self.memory.clear()
-            self.store.clear_memory()
-        else:
-            self.memory.pop(session_id, None)
-            self.store.save_memory(self.memory)
+        with self.lock:
+            if session_id is None:
+                self.memory.clear()
+                self.store.clear_memory()
+            else:
+                self.memory.pop(session_id, None)
+                self.store.forget_session(session_id)
+                self.store.save_memory(self.memory)
+        if self.semantic_cache is not None:
+            if session_id is None:
+                self.semantic_cache.clear()
+            else:
+                self.semantic_cache.forget_session(session_id)
 
     def close(self) -> None:
         """Release resources held by the kernel."""
@@ -1,20 +1,49 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from contextlib import asynccontextmanager
+import time
+import types
+from contextlib import asynccontextmanager, nullcontext, suppress
 from pathlib import Path
 
 import logging
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from app.integration_engine import router as integration_router
+from app.integration_engine import plugin_generator, router as integration_router
+from app.integrations.transport import aclose_all as close_connector_clients
+from app.jobs import JobRunner, JobStore
+from app.jobs.routes import router as jobs_router
+from app.kernel.providers.codellama import preload_models
+from app.kernel.providers.model_registry import model_registry
+from app.kernel.deadline import Deadline, DeadlineExceeded, TurnCancelled
 from app.kernel.zona_kernel import ZonaKernel
 from app.utils.license import LicenseManager
 from app.utils.logger import log_interaction
-from app.utils.security import limiter, verify_api_key
+from app.utils import metrics, tracing
+from app.utils.admission import AdmissionRejected, AdmissionScheduler
+from app.utils.memory_usage import (
+    AllocationTracker,
+    deep_sizeof,
+    module_state_sizeof,
+    structure_report,
+    top_sessions,
+)
+from app.utils.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, Profiler, profile_call
+from app.utils.security import (
+    ADMIN_KEY_HEADER,
+    API_KEY_HEADER,
+    is_admin_key,
+    is_api_key,
+    limiter,
+    verify_admin_key,
+    verify_api_key,
+)
+from zona.plugin_manager import get_plugin_manager
 from zona.utils.config import ConfigError, load_config
 
 
@@ -34,12 +63,138 @@ except ConfigError as exc:
 # Varsayılan provider ayarı
 DEFAULT_PROVIDER = os.getenv("DEFAULT_PROVIDER", "openai").lower()
 
+# Request deadlines: clients may shorten (but not exceed) the server maximum
+# through the ``X-Request-Timeout`` header, expressed in seconds.
+TIMEOUT_HEADER = "X-Request-Timeout"
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "60"))
+MAX_REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "300"))
+
+# Provider calls are admitted through a weighted fair queue. Requests are
+# grouped into flows by session (or by API key) and tagged with a priority
+# class taken from the ``X-Priority`` header.
+PRIORITY_HEADER = "X-Priority"
+ADMISSION_FLOW_KEY = os.getenv("ADMISSION_FLOW_KEY", "session").lower()
+admission = AdmissionScheduler.from_env()
+
+# WebSocket chat: clients authenticate within ``WS_AUTH_TIMEOUT_SECONDS``,
+# connections idle for ``WS_IDLE_TIMEOUT_SECONDS`` are closed, at most
+# ``WS_MAX_PENDING`` prompts may wait behind the one being answered, and
+# replies are streamed in frames of ``WS_CHUNK_SIZE`` characters.
+WS_AUTH_TIMEOUT = float(os.getenv("WS_AUTH_TIMEOUT_SECONDS", "10"))
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "300"))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "8"))
+WS_CHUNK_SIZE = int(os.getenv("WS_CHUNK_SIZE", "1024"))
+
+# When positive, plugin files and the allow list are polled every
+# ``PLUGIN_WATCH_INTERVAL_SECONDS`` and changed plugins are hot reloaded.
+PLUGIN_WATCH_INTERVAL = float(os.getenv("PLUGIN_WATCH_INTERVAL_SECONDS", "0"))
+
+# Requests are profiled when an admin sends ``X-Zona-Profile`` or when sampled
+# through ``PROFILE_SAMPLE_PERCENT``; see ``/admin/profiles``.
+profiler = Profiler.from_env()
+# tracemalloc is only started once an admin asks for allocation growth.
+allocation_tracker = AllocationTracker()
+
+
+_MEMORY_SESSIONS = metrics.gauge(
+    "zona_memory_sessions", "Sessions currently held in kernel memory."
+)
+_MEMORY_MESSAGES = metrics.gauge(
+    "zona_memory_messages", "Messages currently held in kernel memory."
+)
+_MEMORY_CHARS = metrics.gauge(
+    "zona_memory_content_chars", "Total characters of message content in memory."
+)
+_PENDING_ACTIONS = metrics.gauge(
+    "zona_pending_actions", "Plugin commands awaiting confirmation."
+)
+_RATE_LIMITER_CLIENTS = metrics.gauge(
+    "zona_rate_limiter_clients", "Clients tracked by the rate limiter."
+)
+
+
+def _collect_runtime_metrics() -> None:
+    with kernel.lock:
+        histories = list(kernel.memory.values())
+        _MEMORY_SESSIONS.set(len(histories))
+        _MEMORY_MESSAGES.set(sum(len(h) for h in histories))
+        _MEMORY_CHARS.set(
+            sum(len(m.get("content", "")) for h in histories for m in h)
+        )
+        _PENDING_ACTIONS.set(len(kernel.pending_actions))
+    _RATE_LIMITER_CLIENTS.set(len(limiter.calls))
+
+
+metrics.register_collector(_collect_runtime_metrics)
+
+
+def _complete_job_item(provider: str, prompt: str) -> str:
+    return kernel.complete(provider, prompt)
+
+
+def _create_job_runner() -> JobRunner:
+    """Open the job database; called at startup so imports create no files."""
+    return JobRunner.from_env(
+        JobStore(
+            os.getenv("JOB_DB_PATH", "zona_jobs.db"),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+        ),
+        _complete_job_item,
+        admission=admission,
+        providers=kernel.provider_factories,
+    )
+
+
+async def _reap_idle_models() -> None:
+    """Periodically unload local models idle for ``MODEL_IDLE_TTL_SECONDS``."""
+    interval = max(model_registry.idle_ttl / 2, 1.0)
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(model_registry.unload_idle)
+
+
+async def _watch_plugins(interval: float) -> None:
+    """Apply plugin file and allow list changes every ``interval`` seconds."""
+    manager = get_plugin_manager()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(manager.refresh)
+        except Exception as exc:
+            logging.error("Plugin refresh failed: %s", exc)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    try:
+        await asyncio.to_thread(preload_models)
+    except Exception as exc:
+        logging.error("Model preload failed: %s", exc)
+    kernel.bind_loop(asyncio.get_running_loop())
+    plugin_manager = get_plugin_manager()
+    if plugin_manager.executor is not None:
+        await asyncio.to_thread(plugin_manager.executor.start)
+    tasks = []
+    if model_registry.idle_ttl:
+        tasks.append(asyncio.create_task(_reap_idle_models()))
+    if PLUGIN_WATCH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(_watch_plugins(PLUGIN_WATCH_INTERVAL)))
+    job_runner = app.state.job_runner = _create_job_runner()
+    await job_runner.start()
     try:
         yield
     finally:
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await job_runner.stop()
+        plugin_generator.shutdown()
+        plugin_manager.close()
+        kernel.bind_loop(None)
+        await close_connector_clients()
+        job_runner.store.close()
+        app.state.job_runner = None
         kernel.close()
 
 
@@ -63,10 +218,127 @@ class Prompt(BaseModel):
 
 # POST /prompt — Chat endpoint'i
 @app.post("/prompt", dependencies=[Depends(verify_api_key), Depends(limiter)])
-async def prompt_handler(request: Request, data: Prompt) -> dict[str, str]:
+async def prompt_handler(
+    request: Request, response: Response, data: Prompt
+) -> dict[str, str]:
     license_key = request.headers.get(LicenseManager.HEADER_NAME)
 
     provider_name = data.provider.lower()
+    start = time.perf_counter()
+    outcome = "ok"
+    with tracing.span(
+        "prompt_handler",
+        traceparent=request.headers.get("traceparent"),
+        provider=provider_name,
+    ) as root:
+        response.headers["X-Trace-Id"] = root.trace_id
+        try:
+            deadline = Deadline(_request_timeout(request))
+            await _admit(request, data, deadline)
+            try:
+                with _maybe_profile(
+                    request.headers, "prompt_handler", provider=provider_name, trace_id=root.trace_id
+                ) as session:
+                    if session is not None:
+                        response.headers[PROFILE_ID_HEADER] = session.id
+                    return await _run_until_disconnect(
+                        request,
+                        deadline,
+                        profile_call,
+                        _handle_prompt,
+                        data,
+                        provider_name,
+                        license_key,
+                        deadline,
+                    )
+            finally:
+                admission.release()
+        except HTTPException as exc:
+            outcome = str(exc.status_code)
+            root.set_attribute("status_code", exc.status_code)
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            label = _metric_provider(provider_name)
+            metrics.PROMPT_REQUESTS.inc(provider=label, outcome=outcome)
+            metrics.PROMPT_SECONDS.observe(
+                time.perf_counter() - start, provider=label, outcome=outcome
+            )
+
+
+def _metric_provider(name: str) -> str:
+    """Return ``name`` as a metric label, or ``"unknown"`` if not registered.
+
+    Provider names come from clients, so unknown ones are folded together to
+    keep the number of label values bounded.
+    """
+    return name if name in kernel.providers else "unknown"
+
+
+def _maybe_profile(headers, name: str, **attributes):
+    """Return a profiling session for the request, or a no-op context."""
+    requested = bool(headers.get(PROFILE_HEADER)) and is_admin_key(headers.get(ADMIN_KEY_HEADER))
+    if not profiler.should_profile(requested):
+        return nullcontext()
+    return profiler.session(name, **attributes)
+
+
+def _request_timeout(request: Request) -> float:
+    return _parse_timeout(request.headers.get(TIMEOUT_HEADER))
+
+
+def _parse_timeout(value) -> float:
+    if value is None:
+        return DEFAULT_REQUEST_TIMEOUT
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid {TIMEOUT_HEADER} header")
+    if timeout <= 0:
+        raise HTTPException(status_code=400, detail=f"Invalid {TIMEOUT_HEADER} header")
+    return min(timeout, MAX_REQUEST_TIMEOUT)
+
+
+async def _admit(request: Request, data: Prompt, deadline: Deadline) -> None:
+    """Wait for a provider slot, failing once the request deadline passes."""
+    await _acquire_slot(request.headers, data.session_id, deadline)
+
+
+async def _acquire_slot(headers, session_id: str, deadline: Deadline) -> None:
+    if ADMISSION_FLOW_KEY == "api_key":
+        flow = headers.get(API_KEY_HEADER) or "anonymous"
+    else:
+        flow = session_id
+    priority = headers.get(PRIORITY_HEADER, "interactive").lower()
+    try:
+        await asyncio.wait_for(admission.acquire(flow, priority), deadline.remaining())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except AdmissionRejected as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
+async def _run_until_disconnect(request: Request, deadline: Deadline, func, *args):
+    """Run ``func`` in a worker thread, cancelling ``deadline`` on disconnect."""
+    task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=0.1)
+        if done:
+            return task.result()
+        if not deadline.cancelled and await request.is_disconnected():
+            deadline.cancel("client disconnected")
+
+
+def _handle_prompt(
+    data: Prompt,
+    provider_name: str,
+    license_key: str | None,
+    deadline: Deadline | None = None,
+) -> dict[str, str]:
     if provider_name in {"gemini", "vertexai"}:
         LicenseManager.require_license(license_key)
 
@@ -76,15 +348,309 @@ async def prompt_handler(request: Request, data: Prompt) -> dict[str, str]:
             data.prompt,
             session_id=data.session_id,
             obfuscate_output=data.obfuscate_output,
+            deadline=deadline,
         )
+    except DeadlineExceeded as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    except TurnCancelled as exc:
+        # 499: the client closed the connection before a response was ready.
+        raise HTTPException(status_code=499, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError as exc:  # missing client/model
         raise HTTPException(status_code=500, detail=str(exc))
-    log_interaction(data.session_id, data.prompt, result)
+    with metrics.track_stage("log_interaction", provider_name):
+        log_interaction(data.session_id, data.prompt, result)
     return {"response": result}
 
 
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket) -> None:
+    """Multiplex the chat turns of one session over a single WebSocket.
+
+    The client authenticates once, with the ``X-API-Key`` header or, since
+    browsers cannot set headers on WebSockets, with a first ``{"type": "auth",
+    "api_key": ..., "license_key": ...}`` frame.  The license key may also come
+    from the ``X-License-Key`` header.  Neither key is read from the URL, which
+    ends up in access logs.  The server answers ``{"type":
+    "ready"}`` and binds the connection to the ``session_id`` and ``provider``
+    given in the query string. Frames are JSON objects:
+
+    * ``{"type": "prompt", "id": ..., "prompt": ...}`` starts a turn. The reply
+      arrives as ``chunk`` frames followed by ``done``, as a ``confirm`` frame
+      when a plugin command awaits confirmation, or as an ``error`` frame.
+    * ``{"type": "confirm", "id": ..., "accept": true}`` answers a confirmation.
+    * ``{"type": "cancel", "id": ...}`` abandons the turn being answered.
+    * ``{"type": "ping"}`` is answered with ``{"type": "pong"}``.
+    """
+    await websocket.accept()
+    api_key = websocket.headers.get(API_KEY_HEADER)
+    license_key = websocket.headers.get(LicenseManager.HEADER_NAME)
+    if api_key is None:
+        try:
+            frame = await asyncio.wait_for(websocket.receive_json(), WS_AUTH_TIMEOUT)
+        except WebSocketDisconnect:
+            return
+        except (asyncio.TimeoutError, KeyError, ValueError):
+            frame = None
+        if isinstance(frame, dict) and frame.get("type") == "auth":
+            api_key = frame.get("api_key")
+            if isinstance(frame.get("license_key"), str):
+                license_key = frame["license_key"]
+    if not isinstance(api_key, str) or not is_api_key(api_key):
+        await websocket.close(code=4401, reason="Invalid API key")
+        return
+    await websocket.send_json({"type": "ready"})
+    await _ChatSocket(websocket, license_key).serve()
+
+
+class _ChatSocket:
+    """State of one ``/ws/chat`` connection.
+
+    Incoming frames are read by :meth:`_read` while :meth:`_work` answers
+    prompts one at a time, so turns of the session never run concurrently.
+    """
+
+    def __init__(self, websocket: WebSocket, license_key: str | None = None) -> None:
+        params = websocket.query_params
+        self.websocket = websocket
+        self.session_id = params.get("session_id") or "default"
+        self.provider = (params.get("provider") or DEFAULT_PROVIDER).lower()
+        self.license_key = license_key
+        self.obfuscate_output = params.get("obfuscate_output", "").lower() in {"1", "true", "yes"}
+        self.client = websocket.client.host if websocket.client else "anonymous"
+        self.queue: asyncio.Queue = asyncio.Queue(WS_MAX_PENDING)
+        self.current: tuple[object, Deadline] | None = None
+        self._send_lock = asyncio.Lock()
+
+    async def serve(self) -> None:
+        worker = asyncio.create_task(self._work())
+        try:
+            await self._read()
+        finally:
+            if self.current is not None:
+                self.current[1].cancel("client disconnected")
+            worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await worker
+
+    async def send(self, frame: dict) -> None:
+        async with self._send_lock:
+            await self.websocket.send_json(frame)
+
+    async def _error(self, msg_id, status: int, detail: str) -> None:
+        await self.send({"type": "error", "id": msg_id, "status": status, "detail": detail})
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await asyncio.wait_for(self.websocket.receive_json(), WS_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if self.current is None and self.queue.empty():
+                    await self.websocket.close(code=1000, reason="Idle timeout")
+                    return
+                continue
+            except WebSocketDisconnect:
+                return
+            except (KeyError, ValueError):
+                await self._error(None, 400, "Invalid JSON frame")
+                continue
+            if not isinstance(message, dict):
+                await self._error(None, 400, "Invalid JSON frame")
+                continue
+            await self._dispatch(message)
+
+    async def _dispatch(self, message: dict) -> None:
+        kind = message.get("type")
+        msg_id = message.get("id")
+        if kind == "ping":
+            await self.send({"type": "pong"})
+            return
+        if kind == "cancel":
+            if self.current is not None and msg_id in (None, self.current[0]):
+                self.current[1].cancel("cancelled by client")
+            return
+        if kind == "confirm":
+            prompt = "yes" if message.get("accept") else "no"
+        elif kind == "prompt":
+            prompt = message.get("prompt")
+            if not isinstance(prompt, str) or not prompt.strip():
+                await self._error(msg_id, 400, "Missing prompt")
+                return
+        else:
+            await self._error(msg_id, 400, f"Unknown frame type: {kind}")
+            return
+        if self.queue.full():
+            await self._error(msg_id, 503, "Too many pending prompts")
+            return
+        if not limiter.hit(self.client):
+            await self._error(msg_id, 429, "Rate limit exceeded")
+            return
+        self.queue.put_nowait((msg_id, prompt, message.get("timeout")))
+
+    async def _work(self) -> None:
+        while True:
+            msg_id, prompt, timeout = await self.queue.get()
+            try:
+                await self._turn(msg_id, prompt, timeout)
+            except (WebSocketDisconnect, RuntimeError):
+                return  # the connection went away while replying
+            finally:
+                self.current = None
+
+    async def _turn(self, msg_id, prompt: str, timeout) -> None:
+        start = time.perf_counter()
+        outcome = "ok"
+        with tracing.span("chat_socket", provider=self.provider) as root:
+            try:
+                deadline = Deadline(_parse_timeout(timeout))
+                self.current = (msg_id, deadline)
+                data = Prompt(
+                    prompt=prompt,
+                    session_id=self.session_id,
+                    obfuscate_output=self.obfuscate_output,
+                    provider=self.provider,
+                )
+                await _acquire_slot(self.websocket.headers, self.session_id, deadline)
+                try:
+                    with _maybe_profile(
+                        self.websocket.headers,
+                        "chat_socket",
+                        provider=self.provider,
+                        trace_id=root.trace_id,
+                    ):
+                        result = await asyncio.to_thread(
+                            profile_call,
+                            _handle_prompt,
+                            data,
+                            self.provider,
+                            self.license_key,
+                            deadline,
+                        )
+                finally:
+                    admission.release()
+            except HTTPException as exc:
+                outcome = str(exc.status_code)
+                root.set_attribute("status_code", exc.status_code)
+                await self._error(msg_id, exc.status_code, str(exc.detail))
+                return
+            except Exception:
+                outcome = "error"
+                logging.exception("WebSocket chat turn failed")
+                await self._error(msg_id, 500, "Internal server error")
+                return
+            finally:
+                label = _metric_provider(self.provider)
+                metrics.PROMPT_REQUESTS.inc(provider=label, outcome=outcome)
+                metrics.PROMPT_SECONDS.observe(
+                    time.perf_counter() - start, provider=label, outcome=outcome
+                )
+
+            content = result["response"] or ""
+            if self.session_id in kernel.pending_actions:
+                await self.send(
+                    {"type": "confirm", "id": msg_id, "prompt": content, "trace_id": root.trace_id}
+                )
+                return
+            for offset in range(0, len(content), WS_CHUNK_SIZE):
+                await self.send(
+                    {"type": "chunk", "id": msg_id, "content": content[offset : offset + WS_CHUNK_SIZE]}
+                )
+            await self.send({"type": "done", "id": msg_id, "trace_id": root.trace_id})
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> Response:
+    """Expose runtime metrics in the Prometheus text format."""
+    return Response(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/traces/{trace_id}", dependencies=[Depends(verify_api_key)])
+async def get_trace(trace_id: str) -> dict:
+    """Return the recorded spans of a trace, ordered by start time."""
+    spans = sorted(tracing.get_exporter().spans(trace_id), key=lambda s: s.start)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": [s.to_dict() for s in spans]}
+
+
+@app.get("/admin/profiles", dependencies=[Depends(verify_admin_key)])
+async def list_profiles() -> dict:
+    """List the request profiles kept in the ring buffer, newest first."""
+    return {"profiles": [r.summary() for r in reversed(profiler.records())]}
+
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(verify_admin_key)])
+async def get_profile(profile_id: str, format: str = "text") -> Response:
+    """Download a profile as a text report or as ``pstats`` data."""
+    record = profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            record.data,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{record.id}.prof"'},
+        )
+    if format != "text":
+        raise HTTPException(status_code=400, detail="format must be 'text' or 'pstats'")
+    return Response(record.report, media_type="text/plain")
+
+
+@app.get("/admin/memory", dependencies=[Depends(verify_admin_key)])
+async def memory_report(
+    top: int = Query(10, ge=1, le=100), allocations: bool = False
+) -> dict:
+    """Report approximate memory use of in-process state.
+
+    With ``allocations=true`` a ``tracemalloc`` snapshot is taken and compared
+    with the previous one, starting tracing on the first call.
+    """
+    return await asyncio.to_thread(_memory_report, top, allocations)
+
+
+@app.delete("/admin/memory/allocations", dependencies=[Depends(verify_admin_key)])
+async def stop_allocation_tracking() -> dict[str, str]:
+    """Stop ``tracemalloc`` and discard the allocation baseline."""
+    allocation_tracker.stop()
+    return {"status": "stopped"}
+
+
+def _memory_report(top: int, include_allocations: bool) -> dict:
+    plugins = {
+        name: module_state_sizeof(plugin)
+        if isinstance(plugin, types.ModuleType)
+        else deep_sizeof(plugin)
+        for name, plugin in list(get_plugin_manager().plugins.items())
+    }
+    long_term = kernel.store.long_term
+    with kernel.lock:
+        kernel_structures = {
+            "kernel.memory": structure_report(kernel.memory),
+            "kernel.pending_actions": structure_report(kernel.pending_actions),
+            "kernel.speculative_runs": structure_report(kernel.speculative_runs),
+        }
+        sessions = top_sessions(kernel.memory, top)
+    report = {
+        "structures": {
+            **kernel_structures,
+            "kernel.semantic_cache": structure_report(kernel.semantic_cache or {}),
+            "store.long_term": {
+                "bytes": deep_sizeof(long_term),
+                "items": len(long_term.sessions()),
+            },
+            "rate_limiter.calls": structure_report(limiter.calls),
+            "plugins": {"bytes": sum(plugins.values()), "items": len(plugins)},
+        },
+        "plugins": plugins,
+        "models": model_registry.stats(),
+        "top_sessions": sessions,
+    }
+    if include_allocations:
+        report["allocations"] = allocation_tracker.snapshot(top)
+    return report
+
+
 @app.delete("/memory/{session_id}")
 async def delete_memory(session_id: str) -> dict[str, str]:
     """Delete all stored messages for the given session."""
@@ -97,4 +663,5 @@ async def delete_memory(session_id: str) -> dict[str, str]:
 # Statik web UI mount'u
 app.mount("/static", StaticFiles(directory=STATIC_DIR, html=True), name="static")
 app.include_router(integration_router)
+app.include_router(jobs_router)
 
@@ -0,0 +1,200 @@
+"""Background generation of integration plugins.
+
+Generating a plugin with a local model takes far longer than an HTTP request
+should, so :class:`PluginGenerator` runs it in a worker thread and tracks its
+progress as a :class:`GenerationJob`.
+
+Generated code is memoized on disk under a SHA-256 of ``(system, schema,
+model)``.  Adding the same integration again, from this or another worker
+sharing ``PLUGIN_CACHE_DIR``, reuses the cached plugin.  While one process
+generates a given key it holds a lock file, and other processes wait for its
+result instead of generating the same plugin in parallel.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GenerationJob:
+    """Progress of a plugin generation request."""
+
+    id: str
+    system: str
+    model: str
+    status: str = "queued"  # queued, running, succeeded or failed
+    cached: bool = False
+    cache_key: Optional[str] = None
+    plugin: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in {"succeeded", "failed"}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "system": self.system,
+            "model": self.model,
+            "status": self.status,
+            "cached": self.cached,
+            "cache_key": self.cache_key,
+            "plugin": self.plugin,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+def cache_key(system: str, schema: Any, model: str) -> str:
+    """Return the memoization key of a generated plugin."""
+    payload = json.dumps(
+        {"system": system, "schema": schema, "model": model}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PluginGenerator:
+    """Run plugin generation jobs in the background and memoize their output."""
+
+    def __init__(
+        self,
+        generate: Callable[[str, dict], str],
+        *,
+        plugin_dir: Path,
+        cache_dir: Path,
+        reload: Callable[[], None],
+        max_workers: int = 1,
+        max_jobs: int = 100,
+        lock_timeout: float = 900.0,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.generate = generate
+        self.plugin_dir = Path(plugin_dir)
+        self.cache_dir = Path(cache_dir)
+        self.reload = reload
+        self.max_jobs = max_jobs
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, system: str, schema_source: Callable[[], dict], model: str) -> GenerationJob:
+        """Queue generation of the plugin for ``system``.
+
+        ``schema_source`` is called in the worker thread.  A job already queued
+        or running for the same system and model is returned instead of
+        starting another one.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.system == system and job.model == model and not job.done:
+                    return job
+            job = GenerationJob(id=uuid.uuid4().hex, system=system, model=model)
+            self._jobs[job.id] = job
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="zona-plugin-gen"
+                )
+            job.future = self._executor.submit(self._run, job, schema_source)
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker threads; queued jobs are cancelled."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        finished.sort(key=lambda j: j.finished or 0)
+        while len(self._jobs) > self.max_jobs and finished:
+            self._jobs.pop(finished.pop(0).id, None)
+
+    def _run(self, job: GenerationJob, schema_source: Callable[[], dict]) -> None:
+        job.status = "running"
+        try:
+            schema = schema_source()
+            job.cache_key = cache_key(job.system, schema, job.model)
+            code, job.cached = self._code_for(job.cache_key, job.system, schema)
+            job.plugin = self._install(job.system, code)
+            job.status = "succeeded"
+        except Exception as exc:
+            logger.warning("Plugin generation for %s failed: %s", job.system, exc)
+            job.error = str(exc)
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def _code_for(self, key: str, system: str, schema: dict) -> Tuple[str, bool]:
+        """Return ``(code, cached)`` for ``key``, generating it if needed."""
+        path = self.cache_dir / f"{key}.py"
+        if path.exists():
+            return path.read_text(), True
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self.cache_dir / f"{key}.lock"
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                if path.exists():
+                    return path.read_text(), True
+                try:
+                    stale = time.time() - lock_path.stat().st_mtime > self.lock_timeout
+                except FileNotFoundError:
+                    continue
+                if stale:
+                    lock_path.unlink(missing_ok=True)
+                else:
+                    time.sleep(self.poll_interval)
+        try:
+            if path.exists():
+                return path.read_text(), True
+            code = self.generate(system, schema)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(code)
+            os.replace(tmp_path, path)
+            return code, False
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def _install(self, system: str, code: str) -> str:
+        name = f"{system}_plugin"
+        target = self.plugin_dir / f"{name}.py"
+        if target.exists() and target.read_text() == code:
+            return name
+        self.plugin_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix(".tmp")
+        tmp_path.write_text(code)
+        os.replace(tmp_path, target)
+        self.reload()
+        return name
+
+
+__all__ = ["GenerationJob", "PluginGenerator", "cache_key"]
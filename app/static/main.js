@@ -1,12 +1,162 @@
-async function sendPrompt() {
-  const prompt = document.getElementById('prompt').value;
-  const session_id = document.getElementById('session_id').value;
-  const provider = document.getElementById('provider').value;
+// Chat turns go over a single WebSocket per session (see /ws/chat). The API
+// and license keys are sent in the first frame rather than the URL, which ends
+// up in access logs. When WebSockets are unavailable, or the connection closes before a
+// prompt was sent, the UI falls back to POST /prompt.
+let socket = null;
+let socketKey = '';
+let nextId = 0;
+const turns = {};
+
+function formValues() {
+  return {
+    apiKey: document.getElementById('api_key').value,
+    licenseKey: document.getElementById('license_key').value,
+    sessionId: document.getElementById('session_id').value || 'default',
+    provider: document.getElementById('provider').value
+  };
+}
+
+function showResponse(text) {
+  document.getElementById('response').innerText = text;
+}
+
+function showConfirmation(question) {
+  document.getElementById('confirm_text').innerText = question || '';
+  document.getElementById('confirm').hidden = !question;
+}
+
+function openSocket({ apiKey, licenseKey, sessionId, provider }) {
+  const key = [apiKey, licenseKey, sessionId, provider].join('|');
+  if (socket && socketKey === key && socket.readyState <= WebSocket.OPEN) {
+    return socket.ready;
+  }
+  if (socket) {
+    socket.close();
+  }
+  const scheme = location.protocol === 'https:' ? 'wss:' : 'ws:';
+  const query = new URLSearchParams({ session_id: sessionId, provider });
+  const ws = new WebSocket(`${scheme}//${location.host}/ws/chat?${query}`);
+  let ready;
+  ws.ready = new Promise((resolve, reject) => {
+    ready = { resolve, reject };
+  });
+  ws.onopen = () => {
+    const auth = { type: 'auth', api_key: apiKey };
+    if (licenseKey) {
+      auth.license_key = licenseKey;
+    }
+    ws.send(JSON.stringify(auth));
+  };
+  ws.onerror = () => ready.reject(new Error('WebSocket connection failed'));
+  ws.onmessage = (event) => {
+    const frame = JSON.parse(event.data);
+    if (frame.type === 'ready') {
+      ready.resolve(ws);
+    } else {
+      handleFrame(frame);
+    }
+  };
+  ws.onclose = () => {
+    if (socket === ws) {
+      socket = null;
+    }
+    ready.reject(new Error('Connection closed'));
+    Object.keys(turns).forEach((id) => {
+      turns[id].reject(sentError('Connection closed'));
+      delete turns[id];
+    });
+  };
+  socket = ws;
+  socketKey = key;
+  return ws.ready;
+}
+
+// Errors of frames the server may already have processed; these must not be
+// retried over HTTP or the prompt could be answered twice.
+function sentError(message) {
+  const err = new Error(message);
+  err.sent = true;
+  return err;
+}
+
+function handleFrame(frame) {
+  if (frame.type === 'pong') {
+    return;
+  }
+  const turn = turns[frame.id];
+  if (!turn) {
+    if (frame.type === 'error') {
+      showResponse(`Error: ${frame.detail}`);
+    }
+    return;
+  }
+  if (frame.type === 'chunk') {
+    turn.text += frame.content;
+    showResponse(turn.text);
+    return;
+  }
+  delete turns[frame.id];
+  if (frame.type === 'done') {
+    turn.resolve(turn.text);
+  } else if (frame.type === 'confirm') {
+    showConfirmation(frame.prompt);
+    turn.resolve(frame.prompt);
+  } else {
+    turn.reject(sentError(frame.detail));
+  }
+}
+
+async function sendFrame(frame) {
+  const ws = await openSocket(formValues());
+  if (ws.readyState !== WebSocket.OPEN) {
+    throw new Error('Connection closed');
+  }
+  const id = String(nextId++);
+  const reply = new Promise((resolve, reject) => {
+    turns[id] = { text: '', resolve, reject };
+  });
+  ws.send(JSON.stringify({ ...frame, id }));
+  return reply;
+}
+
+async function sendOverHttp(prompt) {
+  const { apiKey, licenseKey, sessionId, provider } = formValues();
+  const headers = { 'Content-Type': 'application/json', 'X-API-Key': apiKey };
+  if (licenseKey) {
+    headers['X-License-Key'] = licenseKey;
+  }
   const res = await fetch('/prompt', {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ prompt, session_id, provider })
+    headers,
+    body: JSON.stringify({ prompt, session_id: sessionId, provider })
   });
   const data = await res.json();
-  document.getElementById('response').innerText = data.response;
+  return res.ok ? data.response : `Error: ${data.detail}`;
+}
+
+async function send(frame, prompt) {
+  showConfirmation(null);
+  showResponse('');
+  try {
+    if (!window.WebSocket) {
+      throw new Error('WebSocket not supported');
+    }
+    const text = await sendFrame(frame);
+    showResponse(text);
+  } catch (err) {
+    if (err.sent) {
+      showResponse(`Error: ${err.message}`);
+    } else {
+      showResponse(await sendOverHttp(prompt));
+    }
+  }
+}
+
+function sendPrompt() {
+  const prompt = document.getElementById('prompt').value;
+  return send({ type: 'prompt', prompt }, prompt);
+}
+
+function confirmPlugin(accept) {
+  return send({ type: 'confirm', accept }, accept ? 'yes' : 'no');
 }
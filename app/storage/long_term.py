@@ -0,0 +1,212 @@
+"""Long-term conversational memory backed by a per-session BM25 index.
+
+The kernel only sends a short window of recent messages to the provider.  Every
+completed turn (a user message and the assistant reply) is also added here so
+that older turns relevant to a new prompt can be recalled and attached to the
+provider call without resending the whole history.
+
+The index is built incrementally: adding a turn updates the postings and
+document frequencies of its terms, so a query never rescans the session.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for indexing and querying."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+
+@dataclass
+class Turn:
+    """A user/assistant exchange stored in long-term memory."""
+
+    messages: List[dict]
+    created: float = field(default_factory=time.time)
+
+    def keys(self) -> Set[Tuple[str, str]]:
+        return {(m.get("role", ""), m.get("content", "")) for m in self.messages}
+
+
+class BM25Index:
+    """Incremental Okapi BM25 index over the turns of one session.
+
+    Document ids grow monotonically, so the oldest turns can be removed
+    without renumbering the postings of the others.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        # doc_id -> turn, oldest first
+        self.turns: Dict[int, Turn] = {}
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+
+    @staticmethod
+    def _terms(turn: Turn) -> Counter:
+        return Counter(
+            token for message in turn.messages for token in tokenize(message.get("content", ""))
+        )
+
+    def add(self, turn: Turn) -> None:
+        doc_id = self._next_id
+        self._next_id += 1
+        terms = self._terms(turn)
+        self.turns[doc_id] = turn
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        for term, freq in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = freq
+
+    def _remove(self, doc_id: int) -> None:
+        turn = self.turns.pop(doc_id)
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in self._terms(turn):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def prune(self, created_before: Optional[float] = None, max_turns: Optional[int] = None) -> int:
+        """Drop the oldest turns created before ``created_before`` or beyond ``max_turns``."""
+        removed = 0
+        while self.turns:
+            doc_id = next(iter(self.turns))
+            expired = created_before is not None and self.turns[doc_id].created < created_before
+            if not expired and (not max_turns or len(self.turns) <= max_turns):
+                break
+            self._remove(doc_id)
+            removed += 1
+        return removed
+
+    def search(self, query: str, k: int, accept=lambda turn: True) -> List[Tuple[float, int]]:
+        """Return up to ``k`` ``(score, doc_id)`` pairs, best first."""
+        n_docs = len(self.turns)
+        if not n_docs or k <= 0:
+            return []
+        avg_length = self._total_length / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, freq in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        result: List[Tuple[float, int]] = []
+        for doc_id, score in ranked:
+            if accept(self.turns[doc_id]):
+                result.append((score, doc_id))
+                if len(result) >= k:
+                    break
+        return result
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+
+class LongTermMemory:
+    """Per-session BM25 indexes of past turns.
+
+    Turns older than ``retention_seconds`` are removed from the index when the
+    session is next written or searched (or by :meth:`prune`), and a session
+    keeps at most ``max_turns`` turns, dropping the oldest first.
+    """
+
+    def __init__(
+        self, retention_seconds: Optional[float] = None, max_turns: Optional[int] = None
+    ) -> None:
+        self.retention_seconds = retention_seconds
+        self.max_turns = max_turns
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def _cutoff(self) -> Optional[float]:
+        return time.time() - self.retention_seconds if self.retention_seconds else None
+
+    def _prune_session(self, session_id: str, cutoff: Optional[float]) -> Optional[BM25Index]:
+        index = self._indexes.get(session_id)
+        if index is None:
+            return None
+        index.prune(cutoff, self.max_turns)
+        if not index.turns:
+            del self._indexes[session_id]
+            return None
+        return index
+
+    def add_turn(self, session_id: str, turn: Turn) -> None:
+        with self._lock:
+            self._indexes.setdefault(session_id, BM25Index()).add(turn)
+            self._prune_session(session_id, self._cutoff())
+
+    def prune(self) -> int:
+        """Remove expired turns of every session; return the number removed."""
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return 0
+        removed = 0
+        with self._lock:
+            for session_id in list(self._indexes):
+                before = len(self._indexes[session_id])
+                index = self._prune_session(session_id, cutoff)
+                removed += before - (len(index) if index else 0)
+        return removed
+
+    def recall(
+        self,
+        session_id: str,
+        query: str,
+        k: int,
+        exclude: Iterable[Tuple[str, str]] = (),
+    ) -> List[List[dict]]:
+        """Return the ``k`` past turns most relevant to ``query``.
+
+        Turns sharing a message with ``exclude`` (typically the recent window
+        already sent to the provider) are skipped.  Results are returned in
+        chronological order.
+        """
+        excluded = set(exclude)
+
+        def accept(turn: Turn) -> bool:
+            return not (turn.keys() & excluded)
+
+        with self._lock:
+            index = self._prune_session(session_id, self._cutoff())
+            if index is None:
+                return []
+            hits = index.search(query, k, accept)
+            return [index.turns[doc_id].messages for _, doc_id in sorted(hits, key=lambda h: h[1])]
+
+    def forget(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(session_id, None)
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._indexes)
+
+    def turn_count(self, session_id: str) -> int:
+        with self._lock:
+            index = self._indexes.get(session_id)
+            return len(index) if index else 0
+
+
+__all__ = ["BM25Index", "LongTermMemory", "Turn", "tokenize"]
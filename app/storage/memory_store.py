@@ -17,7 +17,9 @@ import time
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 
+from app.storage.long_term import LongTermMemory, Turn
 from app.utils.logger import sanitize, logging_enabled
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,7 @@ class MemoryStore:
         document: str = "memory",
         database_url: Optional[str] = None,
         retention_seconds: Optional[int] = None,
+        max_turns: Optional[int] = None,
     ) -> None:
         self.collection = collection
         self.document = document
@@ -55,6 +58,12 @@ class MemoryStore:
         self.retention_seconds = retention_seconds or int(
             os.getenv("MEMORY_RETENTION_SECONDS", default_retention)
         )
+        # Past turns stay searchable here after the kernel trims them out of
+        # the recent-message window, up to ``max_turns`` per session.
+        if max_turns is None:
+            max_turns = int(os.getenv("LONG_TERM_MAX_TURNS", "1000"))
+        self.max_turns = max_turns
+        self.long_term = LongTermMemory(self.retention_seconds, max_turns)
 
         project = project_id or os.getenv("FIRESTORE_PROJECT_ID")
         use_firestore = os.getenv("USE_FIRESTORE", "false").lower() in {"1", "true", "yes"}
@@ -85,7 +94,22 @@ class MemoryStore:
             cursor.execute(
                 "CREATE TABLE IF NOT EXISTS memory (id INTEGER PRIMARY KEY, data TEXT)"
             )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS turns (session_id TEXT, created REAL, data TEXT)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS turns_created ON turns (created)")
             self._db_conn.commit()
+            self._load_turns()
+
+    def _load_turns(self) -> None:  # pragma: no cover - simple helper
+        try:
+            cursor = self._db_conn.cursor()
+            cursor.execute("SELECT session_id, created, data FROM turns ORDER BY rowid")
+            for session_id, created, data in cursor.fetchall():
+                self.long_term.add_turn(session_id, Turn(json.loads(data), created))
+        except Exception:
+            pass
 
     # ------------------------------------------------------------------
     # Helper methods
@@ -120,6 +144,8 @@ class MemoryStore:
         ]
         for sid in expired:
             self._memory.pop(sid, None)
+            self.long_term.forget(sid)
+        self.long_term.prune()
 
     # ------------------------------------------------------------------
     # Public API
@@ -167,6 +193,7 @@ class MemoryStore:
             )
         return result
 
+    @traced("MemoryStore.save_memory")
     def save_memory(self, memory: Dict[str, List[dict]]) -> None:
         """Persist memory to Firestore/DB and update the cache."""
         now = time.time()
@@ -197,9 +224,67 @@ class MemoryStore:
             except Exception:
                 pass
 
+    def append_turn(self, session_id: str, messages: List[dict]) -> None:
+        """Index a completed turn in long-term memory and persist it."""
+        turn = Turn([dict(m) for m in messages])
+        self.long_term.add_turn(session_id, turn)
+        if self._db_conn is not None:
+            try:
+                cursor = self._db_conn.cursor()
+                cursor.execute(
+                    "INSERT INTO turns(session_id, created, data) VALUES(?, ?, ?)",
+                    (session_id, turn.created, json.dumps(turn.messages)),
+                )
+                self._prune_turns(cursor, session_id)
+                self._db_conn.commit()
+            except Exception:
+                pass
+
+    def _prune_turns(self, cursor, session_id: str) -> None:
+        """Delete persisted turns past retention or the per-session cap."""
+        if self.retention_seconds:
+            cursor.execute(
+                "DELETE FROM turns WHERE created < ?",
+                (time.time() - self.retention_seconds,),
+            )
+        if self.max_turns:
+            cursor.execute(
+                "DELETE FROM turns WHERE session_id = ? AND rowid NOT IN"
+                " (SELECT rowid FROM turns WHERE session_id = ?"
+                " ORDER BY rowid DESC LIMIT ?)",
+                (session_id, session_id, self.max_turns),
+            )
+
+    def recall(
+        self,
+        session_id: str,
+        query: str,
+        k: int,
+        exclude: Optional[List[dict]] = None,
+    ) -> List[List[dict]]:
+        """Return up to ``k`` past turns of ``session_id`` relevant to ``query``.
+
+        Turns containing any message in ``exclude`` (usually the recent window)
+        are skipped.
+        """
+        keys = [(m.get("role", ""), m.get("content", "")) for m in exclude or []]
+        return self.long_term.recall(session_id, query, k, keys)
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop the long-term memory of a single session."""
+        self.long_term.forget(session_id)
+        if self._db_conn is not None:
+            try:
+                cursor = self._db_conn.cursor()
+                cursor.execute("DELETE FROM turns WHERE session_id=?", (session_id,))
+                self._db_conn.commit()
+            except Exception:
+                pass
+
     def clear_memory(self) -> None:
         """Remove all persisted memory."""
         self._memory = {}
+        self.long_term.forget()
         if logging_enabled():
             logger.debug("Clearing all memory")
         doc_ref = self._doc_ref()
@@ -212,6 +297,7 @@ class MemoryStore:
             try:
                 cursor = self._db_conn.cursor()
                 cursor.execute("DELETE FROM memory")
+                cursor.execute("DELETE FROM turns")
                 self._db_conn.commit()
             except Exception:
                 pass
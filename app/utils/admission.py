@@ -0,0 +1,182 @@
+"""Fair, priority-aware admission control for provider calls.
+
+:class:`RateLimiter` in :mod:`app.utils.security` only rejects excess traffic.
+:class:`AdmissionScheduler` decides *who goes next* once the number of
+concurrent provider calls reaches ``max_concurrency``:
+
+* Requests are split into priority classes; ``interactive`` requests are always
+  admitted before ``batch`` ones.
+* Within a class, flows (an API key or a session) share capacity through
+  self-clocked weighted fair queuing: every request receives a virtual finish
+  tag ``max(virtual_time, last_finish[flow]) + cost / weight`` and the smallest
+  tag is admitted first, so a flow flooding the queue only delays itself.
+* The queue is bounded.  When it is full the least important waiting request
+  (lowest priority, latest finish tag) is shed with :class:`AdmissionRejected`,
+  which may be the incoming request itself.
+
+Time spent waiting for a slot is reported in ``zona_admission_wait_seconds``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.utils.metrics import counter, gauge, histogram
+
+PRIORITIES: Dict[str, int] = {"interactive": 0, "batch": 1}
+
+_WAIT_SECONDS = histogram(
+    "zona_admission_wait_seconds", "Time requests spent queued for a provider slot."
+)
+_SHED = counter("zona_admission_shed_total", "Requests shed because the queue was full.")
+_QUEUE_DEPTH = gauge("zona_admission_queue_depth", "Requests waiting for a provider slot.")
+_ACTIVE = gauge("zona_admission_active", "Provider calls currently admitted.")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being queued."""
+
+
+def parse_weights(value: Optional[str]) -> Dict[str, float]:
+    """Parse ``"tenant-a=2,tenant-b=0.5"`` into a flow to weight map."""
+    weights: Dict[str, float] = {}
+    for part in (value or "").split(","):
+        name, sep, weight = part.partition("=")
+        if sep and name.strip() and weight.strip():
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+class AdmissionScheduler:
+    """Weighted fair queue in front of a fixed number of provider slots."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 100,
+        *,
+        weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self._active = 0
+        self._waiting = 0
+        self._heap: List[Tuple[int, float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._virtual_time: Dict[int, float] = {}
+        self._last_finish: Dict[Tuple[int, str], float] = {}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionScheduler":
+        return cls(
+            max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+            weights=parse_weights(os.getenv("ADMISSION_WEIGHTS")),
+        )
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._waiting
+
+    def _update_gauges(self) -> None:
+        _QUEUE_DEPTH.set(self._waiting)
+        _ACTIVE.set(self._active)
+
+    @asynccontextmanager
+    async def slot(
+        self, flow: str, priority: str = "interactive", cost: float = 1.0
+    ) -> AsyncIterator[None]:
+        """Hold a provider slot for the duration of the ``with`` block."""
+        await self.acquire(flow, priority, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, flow: str, priority: str = "interactive", cost: float = 1.0) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        rank = PRIORITIES[priority]
+        start = time.perf_counter()
+        if self._active < self.max_concurrency and not self._waiting:
+            self._active += 1
+            self._update_gauges()
+            _WAIT_SECONDS.observe(0.0, priority=priority)
+            return
+
+        weight = self.weights.get(flow, self.default_weight)
+        start_tag = max(
+            self._virtual_time.get(rank, 0.0), self._last_finish.get((rank, flow), 0.0)
+        )
+        finish = start_tag + cost / weight
+        entry = (rank, finish, next(self._seq), asyncio.get_running_loop().create_future())
+
+        if self._waiting >= self.max_queue:
+            self._shed_for(entry, priority)
+        self._last_finish[(rank, flow)] = finish
+        heapq.heappush(self._heap, entry)
+        self._waiting += 1
+        self._update_gauges()
+
+        future = entry[3]
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled() or not future.done():
+                future.cancel()
+                self._waiting -= 1
+                self._update_gauges()
+            elif future.exception() is None:
+                # The slot was granted just as the waiter was cancelled.
+                self.release()
+            raise
+        finally:
+            _WAIT_SECONDS.observe(time.perf_counter() - start, priority=priority)
+
+    def _shed_for(self, entry: Tuple[int, float, int, asyncio.Future], priority: str) -> None:
+        live = [e for e in self._heap if not e[3].done()]
+        victim = max(live, key=lambda e: (e[0], e[1], e[2]), default=None)
+        if victim is None or (entry[0], entry[1]) >= (victim[0], victim[1]):
+            _SHED.inc(priority=priority)
+            raise AdmissionRejected("Server is busy, please retry later")
+        victim_priority = next(k for k, v in PRIORITIES.items() if v == victim[0])
+        victim[3].set_exception(AdmissionRejected("Request shed in favour of higher priority work"))
+        self._waiting -= 1
+        _SHED.inc(priority=victim_priority)
+
+    def release(self) -> None:
+        """Return a slot and admit the next waiting request, if any."""
+        self._active -= 1
+        while self._heap and self._active < self.max_concurrency:
+            rank, finish, _, future = heapq.heappop(self._heap)
+            if future.done():
+                continue
+            self._virtual_time[rank] = max(self._virtual_time.get(rank, 0.0), finish)
+            self._waiting -= 1
+            self._active += 1
+            future.set_result(None)
+        if not self._waiting:
+            self._heap.clear()
+            self._prune()
+        self._update_gauges()
+
+    def _prune(self) -> None:
+        for key, finish in list(self._last_finish.items()):
+            if finish <= self._virtual_time.get(key[0], 0.0):
+                del self._last_finish[key]
+
+
+__all__ = ["AdmissionRejected", "AdmissionScheduler", "PRIORITIES", "parse_weights"]
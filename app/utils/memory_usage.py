@@ -0,0 +1,155 @@
+"""Approximate memory accounting for long-lived in-process state.
+
+:func:`deep_sizeof` walks containers and object attributes and adds up
+``sys.getsizeof`` of everything reachable, counting shared objects once.  Code
+objects (modules, classes, functions) are not descended into, so sizing a
+plugin reports the data it holds rather than the interpreter internals it
+references.  :class:`AllocationTracker` wraps :mod:`tracemalloc` to report which
+source lines allocated the most memory between two snapshots.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import tracemalloc
+import types
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+_OPAQUE = (
+    types.ModuleType,
+    type,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+    threading.Thread,
+)
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+
+def _children(obj: Any) -> Iterable[Any]:
+    if isinstance(obj, Mapping):
+        for key, value in list(obj.items()):
+            yield key
+            yield value
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from list(obj)
+    else:
+        attrs = getattr(obj, "__dict__", None)
+        if attrs is not None:
+            yield attrs
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                yield getattr(obj, slot)
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Return the approximate number of bytes reachable from ``obj``.
+
+    ``seen`` may be shared between calls to avoid counting objects referenced
+    from several structures more than once.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        try:
+            total += sys.getsizeof(item)
+        except TypeError:  # pragma: no cover - exotic extension objects
+            continue
+        if isinstance(item, _ATOMIC) or isinstance(item, _OPAQUE):
+            continue
+        stack.extend(_children(item))
+    return total
+
+
+def module_state_sizeof(module: types.ModuleType) -> int:
+    """Size of the data held in a module's globals, excluding code."""
+    seen: set = set()
+    return sum(
+        deep_sizeof(value, seen)
+        for name, value in list(vars(module).items())
+        if not name.startswith("__") and not isinstance(value, _OPAQUE)
+    )
+
+
+def structure_report(obj: Any) -> Dict[str, int]:
+    """Return ``{"bytes": ..., "items": ...}`` for a container."""
+    try:
+        items = len(obj)
+    except TypeError:
+        items = 0
+    return {"bytes": deep_sizeof(obj), "items": items}
+
+
+def top_sessions(memory: Mapping[str, List[dict]], n: int = 10) -> List[Dict[str, Any]]:
+    """Return the ``n`` largest sessions of ``memory`` by approximate size."""
+    sessions = [
+        {"session_id": sid, "messages": len(history), "bytes": deep_sizeof(history)}
+        for sid, history in list(memory.items())
+    ]
+    sessions.sort(key=lambda s: s["bytes"], reverse=True)
+    return sessions[:n]
+
+
+class AllocationTracker:
+    """Report allocation growth between successive ``tracemalloc`` snapshots."""
+
+    def __init__(self, frames: int = 1) -> None:
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, limit: int = 10) -> Dict[str, Any]:
+        """Take a snapshot and compare it with the previous one.
+
+        Tracing is started on the first call, so the first report has no
+        growth entries.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._baseline = None
+            current = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            traced, peak = tracemalloc.get_traced_memory()
+            growth: List[Dict[str, Any]] = []
+            if self._baseline is not None:
+                for stat in current.compare_to(self._baseline, "lineno")[:limit]:
+                    frame = stat.traceback[0]
+                    growth.append(
+                        {
+                            "location": f"{frame.filename}:{frame.lineno}",
+                            "size_diff": stat.size_diff,
+                            "size": stat.size,
+                            "count_diff": stat.count_diff,
+                        }
+                    )
+            self._baseline = current
+            return {"traced_bytes": traced, "peak_bytes": peak, "growth": growth}
+
+    def stop(self) -> None:
+        with self._lock:
+            self._baseline = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+__all__ = [
+    "AllocationTracker",
+    "deep_sizeof",
+    "module_state_sizeof",
+    "structure_report",
+    "top_sessions",
+]
@@ -0,0 +1,307 @@
+"""Lightweight Prometheus-style metrics.
+
+Counters, gauges and histograms are kept in process memory and rendered in the
+Prometheus text exposition format by :func:`render_metrics`.  The module has no
+third party dependencies so instrumentation stays cheap on the request path:
+recording a sample is a dictionary lookup and a few additions under a lock.
+
+Metrics are created through :func:`counter`, :func:`gauge` and
+:func:`histogram`, which return the existing instance when a metric with the
+same name is already registered.  This keeps module reloads (as done in the
+test-suite) from registering duplicates.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:  # pragma: no cover - overridden
+        return []
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all recorded samples."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(key)} {_format_value(val)}"
+            for key, val in sorted(items)
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values, e.g. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def sum(self, **labels: object) -> float:
+        return self._sums.get(_label_key(labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v), self._sums[k]) for k, v in self._counts.items()]
+        lines: List[str] = []
+        for key, counts, total in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+_REGISTRY: Dict[str, _Metric] = {}
+_COLLECTORS: List[Callable[[], None]] = []
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _get_or_create(cls, name: str, documentation: str, **kwargs):
+    with _REGISTRY_LOCK:
+        metric = _REGISTRY.get(name)
+        if metric is None:
+            metric = _REGISTRY[name] = cls(name, documentation, **kwargs)
+        elif type(metric) is not cls:
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, documentation: str) -> Counter:
+    """Return the counter called ``name``, creating it if needed."""
+    return _get_or_create(Counter, name, documentation)
+
+
+def gauge(name: str, documentation: str) -> Gauge:
+    """Return the gauge called ``name``, creating it if needed."""
+    return _get_or_create(Gauge, name, documentation)
+
+
+def histogram(
+    name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Return the histogram called ``name``, creating it if needed."""
+    return _get_or_create(Histogram, name, documentation, buckets=buckets)
+
+
+def register_collector(callback: Callable[[], None]) -> None:
+    """Register ``callback`` to refresh gauges right before rendering."""
+    if callback not in _COLLECTORS:
+        _COLLECTORS.append(callback)
+
+
+def render_metrics() -> str:
+    """Return all registered metrics in the Prometheus text format."""
+    for callback in list(_COLLECTORS):
+        try:
+            callback()
+        except Exception:  # pragma: no cover - collectors are best effort
+            pass
+    with _REGISTRY_LOCK:
+        metrics = sorted(_REGISTRY.values(), key=lambda m: m.name)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+PROMPT_REQUESTS = counter(
+    "zona_prompt_requests_total", "Prompt requests handled, by provider and outcome."
+)
+PROMPT_SECONDS = histogram(
+    "zona_prompt_request_seconds", "End-to-end /prompt latency in seconds."
+)
+STAGE_SECONDS = histogram(
+    "zona_stage_seconds", "Latency of individual request stages in seconds."
+)
+RATE_LIMIT_REJECTIONS = counter(
+    "zona_rate_limit_rejections_total", "Requests rejected by the rate limiter."
+)
+PLUGIN_SECONDS = histogram(
+    "zona_plugin_run_seconds", "Plugin execution time in seconds."
+)
+
+
+@contextmanager
+def track_stage(stage: str, provider: str = "") -> Iterator[None]:
+    """Record the duration of ``stage`` labelled by provider and outcome."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_SECONDS.observe(
+            time.perf_counter() - start,
+            stage=stage,
+            provider=provider,
+            outcome=outcome,
+        )
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "counter",
+    "gauge",
+    "histogram",
+    "register_collector",
+    "render_metrics",
+    "track_stage",
+    "PROMPT_REQUESTS",
+    "PROMPT_SECONDS",
+    "STAGE_SECONDS",
+    "RATE_LIMIT_REJECTIONS",
+    "PLUGIN_SECONDS",
+]
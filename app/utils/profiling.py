@@ -0,0 +1,196 @@
+"""On-demand CPU profiling of individual requests.
+
+A :class:`Profiler` decides whether a request is profiled, either because an
+admin asked for it with the ``X-Zona-Profile`` header or because the request was
+sampled (``PROFILE_SAMPLE_PERCENT``).  While a profiling session is active it is
+stored in a context variable, so every thread that runs work for the request
+through :func:`profile_call` (the request worker, provider calls made under a
+deadline) records its own :mod:`cProfile` profile.  When the request finishes
+the profiles are merged and kept in a bounded ring buffer from which they can be
+listed and downloaded.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "X-Zona-Profile"
+PROFILE_ID_HEADER = "X-Zona-Profile-Id"
+
+
+@dataclass
+class ProfileRecord:
+    """A finished request profile."""
+
+    id: str
+    name: str
+    created: float
+    duration: float
+    attributes: Dict[str, Any]
+    report: str
+    data: bytes = field(repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "created": self.created,
+            "duration": self.duration,
+            "attributes": dict(self.attributes),
+        }
+
+
+class ProfileSession:
+    """Collects per-thread profiles for one request."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.created = time.time()
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if getattr(_LOCAL, "profiling", False):
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active in this thread
+            return func(*args, **kwargs)
+        _LOCAL.profiling = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            _LOCAL.profiling = False
+            with self._lock:
+                if not self._closed:
+                    self._profiles.append(profile)
+
+    def close(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            self._closed = True
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+_LOCAL = threading.local()
+_CURRENT_SESSION: ContextVar[Optional[ProfileSession]] = ContextVar(
+    "zona_profile_session", default=None
+)
+
+
+def profile_call(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call ``func``, profiling it if the current request is being profiled."""
+    session = _CURRENT_SESSION.get()
+    if session is None:
+        return func(*args, **kwargs)
+    return session.run(func, *args, **kwargs)
+
+
+class Profiler:
+    """Decides which requests to profile and keeps the latest profiles."""
+
+    def __init__(
+        self,
+        *,
+        sample_percent: float = 0.0,
+        buffer_size: int = 20,
+        top_n: int = 50,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.sample_percent = sample_percent
+        self.top_n = top_n
+        self._rng = rng
+        self._records: deque[ProfileRecord] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            sample_percent=float(os.getenv("PROFILE_SAMPLE_PERCENT", "0")),
+            buffer_size=int(os.getenv("PROFILE_BUFFER_SIZE", "20")),
+            top_n=int(os.getenv("PROFILE_TOP_N", "50")),
+        )
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Return ``True`` if explicitly ``requested`` or sampled."""
+        if requested:
+            return True
+        return self.sample_percent > 0 and self._rng() * 100 < self.sample_percent
+
+    @contextmanager
+    def session(self, name: str, **attributes: Any) -> Iterator[ProfileSession]:
+        """Profile work done through :func:`profile_call` inside the block."""
+        session = ProfileSession(name, attributes)
+        token = _CURRENT_SESSION.set(session)
+        start = time.perf_counter()
+        try:
+            yield session
+        finally:
+            _CURRENT_SESSION.reset(token)
+            self._record(session, time.perf_counter() - start)
+
+    def _record(self, session: ProfileSession, duration: float) -> None:
+        stats = session.close()
+        if stats is None:
+            return
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        record = ProfileRecord(
+            id=session.id,
+            name=session.name,
+            created=session.created,
+            duration=duration,
+            attributes=session.attributes,
+            report=report.getvalue(),
+            data=marshal.dumps(stats.stats),
+        )
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> List[ProfileRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        with self._lock:
+            return next((r for r in self._records if r.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+__all__ = [
+    "PROFILE_HEADER",
+    "PROFILE_ID_HEADER",
+    "ProfileRecord",
+    "ProfileSession",
+    "Profiler",
+    "profile_call",
+]
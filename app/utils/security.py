@@ -1,10 +1,17 @@
+import hmac
 import os
 import time
 from collections import defaultdict
 from fastapi import Header, HTTPException, Request
 
+from app.utils.metrics import RATE_LIMIT_REJECTIONS, track_stage
+
 API_KEY = os.getenv("API_KEY", "test-key")
 API_KEY_HEADER = "X-API-Key"
+# Admin endpoints (profiles, memory introspection) are disabled unless an
+# ``ADMIN_API_KEY`` is configured.
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+ADMIN_KEY_HEADER = "X-Admin-Key"
 
 
 class RateLimiter:
@@ -13,19 +20,50 @@ class RateLimiter:
         self.window = window
         self.calls: dict[str, list[float]] = defaultdict(list)
 
-    async def __call__(self, request: Request) -> None:
-        client = request.client.host if request.client else "anonymous"
+    def hit(self, client: str) -> bool:
+        """Record a call from ``client``; return ``False`` if over the limit."""
         now = time.time()
         calls = [t for t in self.calls[client] if now - t < self.window]
         if len(calls) >= self.limit:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+            RATE_LIMIT_REJECTIONS.inc()
+            self.calls[client] = calls
+            return False
         calls.append(now)
         self.calls[client] = calls
+        return True
+
+    async def __call__(self, request: Request) -> None:
+        client = request.client.host if request.client else "anonymous"
+        with track_stage("rate_limit"):
+            if not self.hit(client):
+                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+
+def _matches(value: str | None, expected: str | None) -> bool:
+    """Compare ``value`` with a configured secret in constant time."""
+    if not value or not expected:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), expected.encode("utf-8"))
+
+
+def is_api_key(value: str | None) -> bool:
+    return _matches(value, API_KEY)
 
 
 def verify_api_key(x_api_key: str = Header(None, alias=API_KEY_HEADER)) -> None:
-    if x_api_key != API_KEY:
+    if not is_api_key(x_api_key):
         raise HTTPException(status_code=401, detail="Invalid API key")
 
 
+def is_admin_key(value: str | None) -> bool:
+    return _matches(value, ADMIN_API_KEY)
+
+
+def verify_admin_key(x_admin_key: str = Header(None, alias=ADMIN_KEY_HEADER)) -> None:
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
 limiter = RateLimiter(limit=100, window=60)
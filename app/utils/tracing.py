@@ -0,0 +1,265 @@
+"""Lightweight per-request tracing.
+
+A :func:`span` context manager records the start, end and attributes of a unit
+of work.  The active span is tracked in a :class:`contextvars.ContextVar`, so
+nested spans automatically form a tree and the trace id follows the request
+into ``asyncio`` tasks and ``asyncio.to_thread`` calls, both of which copy the
+current context.  Outgoing HTTP requests can carry the trace via a W3C
+``traceparent`` header produced by :func:`inject_headers`.
+
+Finished spans are handed to an exporter selected with ``ZONA_TRACE_EXPORTER``:
+
+* ``memory`` (default) keeps the last ``ZONA_TRACE_BUFFER`` spans in a ring
+  buffer that can be queried by trace id.
+* ``file`` appends one JSON document per span to ``ZONA_TRACE_FILE``.
+* ``none`` disables export.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    """A timed unit of work within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+    _perf_start: float = field(default_factory=time.perf_counter, repr=False)
+    _duration: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, or ``None`` while the span is open."""
+        return self._duration
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self._duration = time.perf_counter() - self._perf_start
+        self.end = self.start + self._duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "duration": self._duration,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class InMemoryExporter:
+    """Keep the most recent spans in a bounded ring buffer."""
+
+    def __init__(self, max_spans: int = 10000) -> None:
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            items = list(self._spans)
+        if trace_id is None:
+            return items
+        return [s for s in items if s.trace_id == trace_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class FileExporter:
+    """Append finished spans to a JSON lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+            except OSError:  # pragma: no cover - tracing must never break requests
+                pass
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """Read spans back from the file (used for debugging and tests)."""
+        result: List[Span] = []
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                for line in handle:
+                    data = json.loads(line)
+                    if trace_id is not None and data["trace_id"] != trace_id:
+                        continue
+                    duration = data.pop("duration", None)
+                    span = Span(**data)
+                    span._duration = duration
+                    result.append(span)
+        except FileNotFoundError:
+            pass
+        return result
+
+
+class NullExporter:
+    """Discard all spans."""
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        return []
+
+
+def _exporter_from_env():
+    kind = os.getenv("ZONA_TRACE_EXPORTER", "memory").lower()
+    if kind == "file":
+        return FileExporter(os.getenv("ZONA_TRACE_FILE", "zona_traces.jsonl"))
+    if kind in {"none", "off", "false", "0"}:
+        return NullExporter()
+    return InMemoryExporter(int(os.getenv("ZONA_TRACE_BUFFER", "10000")))
+
+
+_EXPORTER = _exporter_from_env()
+_CURRENT_SPAN: ContextVar[Optional[Span]] = ContextVar("zona_current_span", default=None)
+
+
+def get_exporter():
+    """Return the active span exporter."""
+    return _EXPORTER
+
+
+def set_exporter(exporter) -> None:
+    """Replace the active span exporter."""
+    global _EXPORTER
+    _EXPORTER = exporter
+
+
+def current_span() -> Optional[Span]:
+    """Return the span active in the current context, if any."""
+    return _CURRENT_SPAN.get()
+
+
+def current_trace_id() -> Optional[str]:
+    active = _CURRENT_SPAN.get()
+    return active.trace_id if active else None
+
+
+def _parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str]]:
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2]
+
+
+@contextmanager
+def span(name: str, *, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """Open a span named ``name`` as a child of the current span.
+
+    When there is no active span a new trace is started, continuing the remote
+    trace described by ``traceparent`` if one is supplied.
+    """
+
+    parent = _CURRENT_SPAN.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        remote = _parse_traceparent(traceparent)
+        trace_id, parent_id = remote if remote else (secrets.token_hex(16), None)
+    active = Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        attributes=dict(attributes),
+    )
+    token = _CURRENT_SPAN.set(active)
+    try:
+        yield active
+    except BaseException as exc:
+        active.status = "error"
+        active.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        active.finish()
+        _CURRENT_SPAN.reset(token)
+        try:
+            _EXPORTER.export(active)
+        except Exception:  # pragma: no cover - tracing must never break requests
+            pass
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate a function so each call is recorded as a span."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Return ``headers`` extended with a ``traceparent`` for the active span."""
+    result = dict(headers or {})
+    active = _CURRENT_SPAN.get()
+    if active is not None:
+        result["traceparent"] = f"00-{active.trace_id}-{active.span_id}-01"
+    return result
+
+
+__all__ = [
+    "Span",
+    "InMemoryExporter",
+    "FileExporter",
+    "NullExporter",
+    "current_span",
+    "current_trace_id",
+    "get_exporter",
+    "inject_headers",
+    "set_exporter",
+    "span",
+    "traced",
+]
@@ -0,0 +1,82 @@
+"""Benchmark dynamic batching of local model inference.
+
+Runs the same concurrent workload through :class:`CodeLlamaProvider` with
+different ``max_batch_size``/``batch_wait_ms`` settings and prints throughput
+and latency percentiles.  The default model is a tiny GPT-2 that runs on CPU:
+
+    python scripts/benchmark_batching.py --requests 64 --concurrency 16
+
+Requires ``transformers`` and ``torch``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.kernel.providers.codellama import CodeLlamaProvider  # noqa: E402
+from app.kernel.providers.model_registry import ModelRegistry  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(provider, prompts, concurrency, max_tokens):
+    def timed(prompt):
+        start = time.perf_counter()
+        provider.generate_response(prompt, max_tokens=max_tokens)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(timed, prompts))
+    elapsed = time.perf_counter() - start
+    return len(prompts) / elapsed, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=48)
+    parser.add_argument(
+        "--configs",
+        default="1:0,4:5,8:5,16:10",
+        help="comma separated max_batch_size:batch_wait_ms pairs",
+    )
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    prompts = [f"def function_{n}(x):" for n in range(args.requests)]
+    warmup = CodeLlamaProvider(model=args.model, registry=registry, max_batch_size=1, device=-1)
+    warmup.generate_response("warm up", max_tokens=args.max_tokens)
+
+    print(f"{'batch':>5} {'wait_ms':>7} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for config in args.configs.split(","):
+        batch, wait = config.split(":")
+        provider = CodeLlamaProvider(
+            model=args.model,
+            registry=registry,
+            max_batch_size=int(batch),
+            batch_wait_ms=float(wait),
+            device=-1,
+        )
+        throughput, latencies = run(provider, prompts, args.concurrency, args.max_tokens)
+        print(
+            f"{batch:>5} {wait:>7} {throughput:8.1f} "
+            f"{statistics.median(latencies) * 1000:8.1f} {percentile(latencies, 95) * 1000:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare full-precision and int8 CPU inference of a local model.
+
+Generates the same prompts with ``CodeLlamaProvider`` in both modes and prints
+load time and generated tokens per second:
+
+    python scripts/benchmark_quantization.py --model codellama/CodeLlama-7b-hf
+
+The default is a tiny GPT-2 so the script runs quickly on any CPU.  The first
+int8 run converts the model and caches it in ``CODELLAMA_QUANTIZED_DIR``; run
+the script again to measure a cached load.  Requires ``transformers`` and
+``torch``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.kernel.providers.codellama import CodeLlamaProvider, _new_tokens  # noqa: E402
+from app.kernel.providers.model_registry import ModelRegistry  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2")
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    prompts = [f"def function_{n}(x):" for n in range(args.prompts)]
+    print(f"{'mode':>5} {'load_s':>8} {'tokens':>7} {'tok/s':>8}")
+    for mode in ("none", "int8"):
+        registry = ModelRegistry()
+        provider = CodeLlamaProvider(
+            model=args.model, registry=registry, max_batch_size=1, quantize=mode, device=-1
+        )
+        start = time.perf_counter()
+        pipe = provider.pipeline
+        load_seconds = time.perf_counter() - start
+
+        tokens = 0
+        start = time.perf_counter()
+        for prompt in prompts:
+            text = provider.generate_response(prompt, max_tokens=args.max_tokens)
+            tokens += _new_tokens(pipe, prompt, text)
+        elapsed = time.perf_counter() - start
+        print(f"{provider.mode:>5} {load_seconds:8.2f} {tokens:7d} {tokens / elapsed:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
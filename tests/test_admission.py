@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.utils.admission import AdmissionRejected, AdmissionScheduler, parse_weights
+
+
+async def _run_order(scheduler, requests):
+    """Queue ``requests`` behind a held slot and return their admission order."""
+    order = []
+    await scheduler.acquire("holder")
+
+    async def worker(flow, priority):
+        async with scheduler.slot(flow, priority):
+            order.append((flow, priority))
+
+    tasks = []
+    for flow, priority in requests:
+        tasks.append(asyncio.create_task(worker(flow, priority)))
+        await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_heavy_flow_does_not_starve_others():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    requests = [("heavy", "interactive")] * 4 + [("light", "interactive")]
+    order = asyncio.run(_run_order(scheduler, requests))
+    assert [flow for flow, _ in order].index("light") == 1
+
+
+def test_interactive_before_batch_and_weights():
+    scheduler = AdmissionScheduler(max_concurrency=1, weights={"gold": 3})
+    requests = [("job", "batch"), ("a", "interactive"), ("a", "interactive"), ("gold", "interactive"), ("gold", "interactive")]
+    order = asyncio.run(_run_order(scheduler, requests))
+    assert order[-1] == ("job", "batch")
+    assert [flow for flow, _ in order[:4]] == ["gold", "gold", "a", "a"]
+
+
+def test_full_queue_sheds_lowest_priority():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrency=1, max_queue=1)
+        await scheduler.acquire("holder")
+        batch = asyncio.create_task(scheduler.acquire("job", "batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.acquire("user", "interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await batch
+        with pytest.raises(AdmissionRejected):
+            await scheduler.acquire("other", "interactive")
+        scheduler.release()
+        await interactive
+        assert scheduler.active == 1 and scheduler.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrency=1)
+        await scheduler.acquire("holder")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.acquire("user"), 0.01)
+        assert scheduler.queued == 0
+        scheduler.release()
+        assert scheduler.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_parse_weights():
+    assert parse_weights("a=2, b=0.5,broken") == {"a": 2.0, "b": 0.5}
@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.kernel.providers import codellama
+from app.kernel.providers.batching import BatchScheduler
+from app.kernel.providers.model_registry import ModelRegistry
+
+
+class FakeTokenizer:
+    pad_token_id = None
+    padding_side = "right"
+
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+
+class FakeBatchPipeline:
+    """Mimics a transformers text-generation pipeline."""
+
+    def __init__(self):
+        self.batches = []
+        self.tokenizer = FakeTokenizer()
+        self.model = type("M", (), {"config": type("C", (), {"eos_token_id": 2})()})()
+
+    def __call__(self, prompts, max_length=None, batch_size=None):
+        self.batches.append(list(prompts))
+        time.sleep(0.01)
+        return [[{"generated_text": p.upper()}] for p in prompts]
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+
+    def run_batch(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=4, max_wait=0.05)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(scheduler.submit, range(8)))
+    scheduler.close()
+    assert results == [n * 2 for n in range(8)]
+    assert max(len(b) for b in batches) > 1
+    assert all(len(b) <= 4 for b in batches)
+
+
+def test_lone_request_waits_at_most_max_wait():
+    scheduler = BatchScheduler(lambda items: items, max_batch_size=8, max_wait=0.02)
+    start = time.monotonic()
+    assert scheduler.submit("x") == "x"
+    assert time.monotonic() - start < 0.5
+    scheduler.close()
+
+
+def test_batch_errors_reach_every_caller():
+    def broken(items):
+        raise ValueError("model failed")
+
+    scheduler = BatchScheduler(broken, max_batch_size=2, max_wait=0.05)
+    futures = [scheduler.submit_async(n) for n in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(1)
+
+
+def test_codellama_batches_concurrent_prompts(monkeypatch):
+    pipe = FakeBatchPipeline()
+    monkeypatch.setattr(codellama, "pipeline", lambda task, model, **kw: pipe)
+    provider = codellama.CodeLlamaProvider(
+        model="tiny", registry=ModelRegistry(), max_batch_size=4, batch_wait_ms=50
+    )
+    barrier = threading.Barrier(4)
+
+    def ask(n):
+        barrier.wait()
+        return provider.generate_response(f"p{n}")
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(ask, range(4)))
+    assert results == ["P0", "P1", "P2", "P3"]
+    assert len(pipe.batches) < 4
+    assert pipe.tokenizer.pad_token_id == 2 and pipe.tokenizer.padding_side == "left"
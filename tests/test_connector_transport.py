@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.integrations import transport
+from app.integrations.logo import LogoConnector
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = b'{"access_token": "token"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        body = b'{"invoices": [{"amount": 2}, {"amount": 3}]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connectors_reuse_pooled_connections(server):
+    origin = transport.origin_of(server)
+    requests_before = transport._REQUESTS.value(origin=origin)
+    connections_before = transport._CONNECTIONS.value(origin=origin)
+
+    async def run():
+        first = LogoConnector(api_key="a", base_url=server)
+        second = LogoConnector(api_key="b", base_url=server)
+        tokens = [await first.authenticate(), await second.authenticate()]
+        tokens.append(await first.authenticate())
+        client = transport.get_client(server, first.timeout)
+        await transport.aclose_all()
+        return tokens, client
+
+    tokens, client = asyncio.run(run())
+    assert tokens == ["token"] * 3
+    assert client.is_closed
+    assert transport._REQUESTS.value(origin=origin) - requests_before == 3
+    assert transport._CONNECTIONS.value(origin=origin) - connections_before == 1
+
+
+def test_clients_are_scoped_to_their_event_loop():
+    async def client():
+        return transport.get_client("https://example.com/a", 5.0)
+
+    async def same_loop():
+        return transport.get_client("https://example.com/a", 5.0) is transport.get_client(
+            "https://example.com/b", 5.0
+        )
+
+    assert asyncio.run(same_loop())
+    assert asyncio.run(client()) is not asyncio.run(client())
+
+
+def test_sync_plugin_calls_share_one_client(server, monkeypatch):
+    from zona.plugins.invoice_summary import Plugin
+
+    monkeypatch.setenv("LOGO_API_KEY", "key")
+    monkeypatch.setenv("LOGO_BASE_URL", server)
+    origin = transport.origin_of(server)
+    connections_before = transport._CONNECTIONS.value(origin=origin)
+
+    plugin = Plugin()
+    results = [plugin.run("2024-01-01 2024-01-31", {}) for _ in range(5)]
+
+    assert results == [{"result": "Toplam fatura tutarı: 5 TL"}] * 5
+    assert transport._CONNECTIONS.value(origin=origin) - connections_before == 1
+    # Every call ran on the long-lived connector loop and shared its client.
+    assert list(transport._clients[transport._loop]) == [(origin, 5.0, httpx.AsyncClient)]
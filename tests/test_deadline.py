@@ -0,0 +1,90 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.kernel.deadline import Deadline, DeadlineExceeded, TurnCancelled, provider_timeout, use_deadline
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.zona_kernel import ZonaKernel
+
+
+class SlowProvider(BaseProvider):
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.seen_timeout = None
+
+    def generate_response(self, messages):
+        self.seen_timeout = provider_timeout(30)
+        time.sleep(self.delay)
+        return "late answer"
+
+
+def _kernel_with(provider):
+    kernel = ZonaKernel()
+    kernel.clear_memory()
+
+    def slow_chat(prompt, session_id="default", *, obfuscate_output=False):
+        return kernel.chat(provider, prompt, session_id=session_id, obfuscate_output=obfuscate_output)
+
+    kernel.add_provider("slow", slow_chat)
+    return kernel
+
+
+def test_deadline_exceeded_discards_turn():
+    provider = SlowProvider()
+    kernel = _kernel_with(provider)
+    kernel.memory["s1"] = [{"role": "user", "content": "earlier"}]
+
+    with pytest.raises(DeadlineExceeded):
+        kernel.dispatch_provider("slow", "hello", session_id="s1", deadline=Deadline(0.1))
+
+    assert kernel.memory["s1"] == [{"role": "user", "content": "earlier"}]
+    assert provider.seen_timeout <= 0.1
+
+
+def test_cancellation_from_another_thread():
+    kernel = _kernel_with(SlowProvider())
+    deadline = Deadline(10)
+    threading.Timer(0.05, deadline.cancel, args=("client disconnected",)).start()
+
+    start = time.monotonic()
+    with pytest.raises(TurnCancelled, match="client disconnected"):
+        kernel.dispatch_provider("slow", "hello", session_id="s2", deadline=deadline)
+    assert time.monotonic() - start < 0.4
+    assert "s2" not in kernel.memory
+
+
+def test_provider_timeout_defaults_without_deadline():
+    assert provider_timeout(30) == 30
+    with use_deadline(Deadline(5)):
+        assert provider_timeout(30) <= 5
+
+
+def test_prompt_endpoint_honours_timeout_header():
+    import app.main as main
+
+    original = main.kernel
+    main.kernel = _kernel_with(SlowProvider())
+    try:
+        client = TestClient(main.app)
+        res = client.post(
+            "/prompt",
+            json={"prompt": "hi", "provider": "slow", "session_id": "s3"},
+            headers={"X-API-Key": "test-key", "X-Request-Timeout": "0.1"},
+        )
+        assert res.status_code == 504
+        assert "s3" not in main.kernel.memory
+
+        bad = client.post(
+            "/prompt",
+            json={"prompt": "hi", "provider": "slow"},
+            headers={"X-API-Key": "test-key", "X-Request-Timeout": "soon"},
+        )
+        assert bad.status_code == 400
+    finally:
+        main.kernel = original
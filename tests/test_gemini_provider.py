@@ -20,3 +20,44 @@ def test_kernel_gemini_dispatch():
     kernel = ZonaKernel()
     with pytest.raises(RuntimeError):
         kernel.dispatch_provider("gemini", "hello")
+
+
+def test_google_providers_are_abandoned_at_the_deadline():
+    import threading
+    import time
+    from types import SimpleNamespace
+
+    from app.kernel.deadline import Deadline, DeadlineExceeded
+    from app.kernel.providers.vertexai_provider import VertexAIProvider
+    from app.kernel.zona_kernel import ZonaKernel
+
+    release = threading.Event()
+
+    # Signatures of the SDK methods, which take no ``timeout`` argument.
+    def generate_content(
+        contents, *, generation_config=None, safety_settings=None, tools=None,
+        tool_config=None, stream=False,
+    ):
+        release.wait(5)
+        return SimpleNamespace(text="late")
+
+    def predict(prompt, *, max_output_tokens=128, temperature=None, top_k=None, top_p=None):
+        release.wait(5)
+        return SimpleNamespace(text="late")
+
+    gemini = GeminiProvider(project="")
+    gemini._model = SimpleNamespace(generate_content=generate_content)
+    vertex = VertexAIProvider(project="")
+    vertex._model = SimpleNamespace(predict=predict)
+
+    kernel = ZonaKernel(semantic_cache=None, recall_k=0)
+    history = [{"role": "user", "content": "hi"}]
+    try:
+        for provider in (gemini, vertex):
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceeded):
+                kernel._generate(provider, history, Deadline(0.1))
+            assert time.monotonic() - start < 1
+    finally:
+        release.set()
+    assert gemini.generate_response(history) == vertex.generate_response(history) == "late"
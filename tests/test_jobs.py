@@ -0,0 +1,205 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app.jobs import JobRunner, JobStore
+from app.jobs.runner import parse_provider_rates
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+async def _drain(runner: JobRunner, job_id: str, timeout: float = 5.0) -> dict:
+    await runner.start()
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            status = runner.store.job_status(job_id)
+            if status["status"].startswith("completed"):
+                return status
+            await asyncio.sleep(0.01)
+        raise AssertionError("job did not finish")
+    finally:
+        await runner.stop()
+
+
+def test_runner_processes_and_retries(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create_job(
+        "echo", [{"prompt": "a", "id": "x"}, {"prompt": "boom"}, {"prompt": "c"}]
+    )
+    attempts = {}
+
+    def handler(provider, prompt):
+        attempts[prompt] = attempts.get(prompt, 0) + 1
+        if prompt == "boom":
+            raise RuntimeError("provider down")
+        return f"{provider}:{prompt}"
+
+    runner = JobRunner(store, handler, concurrency=2, max_attempts=2, retry_delay=0.01, poll_interval=0.01)
+    status = asyncio.run(_drain(runner, job_id))
+
+    assert status["done"] == 2 and status["failed"] == 1
+    assert status["status"] == "completed_with_errors"
+    assert attempts["boom"] == 2
+    results = list(store.iter_results(job_id))
+    assert results[0] == {"index": 0, "id": "x", "status": "done", "response": "echo:a"}
+    assert results[1]["error"] == "provider down"
+
+
+def test_interrupted_items_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path, lease_seconds=0)
+    job_id = store.create_job("echo", [{"prompt": "a"}, {"prompt": "b"}])
+    claimed = store.claim_next()
+    store.complete(claimed, "first")
+    store.claim_next()  # the worker "crashes" while this item is running
+    store.close()
+
+    store = JobStore(path)
+    runner = JobRunner(store, lambda provider, prompt: prompt.upper(), poll_interval=0.01)
+    status = asyncio.run(_drain(runner, job_id))
+    assert status["done"] == 2
+    assert [r["response"] for r in store.iter_results(job_id)] == ["first", "B"]
+
+
+def test_parse_provider_rates():
+    assert parse_provider_rates("openai=5, gemini=0.5,bad") == {"openai": 5.0, "gemini": 0.5}
+
+
+def test_job_endpoints(tmp_path):
+    from app.main import app
+
+    original = getattr(app.state, "job_runner", None)
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.db")), lambda provider, prompt: prompt[::-1], poll_interval=0.01)
+    app.state.job_runner = runner
+    try:
+        client = TestClient(app)
+        body = "\n".join(json.dumps({"prompt": p}) for p in ["abc", "xyz"])
+        res = client.post("/jobs?provider=openai", content=body, headers=HEADERS)
+        assert res.status_code == 200
+        job_id = res.json()["job_id"]
+        assert client.get(f"/jobs/{job_id}", headers=HEADERS).json()["status"] == "queued"
+
+        asyncio.run(_drain(runner, job_id))
+
+        res = client.get(f"/jobs/{job_id}/results", headers=HEADERS)
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        assert [line["response"] for line in lines] == ["cba", "zyx"]
+
+        bad = client.post("/jobs", content="not json", headers=HEADERS)
+        assert bad.status_code == 400
+        assert client.post("/jobs", content=b"\xff\xfe", headers=HEADERS).status_code == 400
+        nested = '{"prompt": "x", "n": ' + "[" * 100000 + "]" * 100000 + "}"
+        assert client.post("/jobs", content=nested, headers=HEADERS).status_code == 400
+        assert client.get("/jobs/unknown", headers=HEADERS).status_code == 404
+    finally:
+        app.state.job_runner = original
+
+
+def test_job_database_is_opened_at_startup(tmp_path, monkeypatch):
+    from app.main import app
+
+    path = tmp_path / "startup.db"
+    monkeypatch.setenv("JOB_DB_PATH", str(path))
+    assert not path.exists()
+    with TestClient(app) as client:
+        assert path.exists()
+        assert app.state.job_runner.store.path == str(path)
+        res = client.post("/jobs", content=json.dumps({"prompt": "hi"}), headers=HEADERS)
+        assert res.status_code == 200
+    assert app.state.job_runner is None
+
+
+def test_rate_capped_provider_does_not_hold_up_others(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create_job(
+        "slow", [{"prompt": "s1"}, {"prompt": "s2"}, {"prompt": "f1", "provider": "fast"}]
+    )
+    order = []
+
+    def handler(provider, prompt):
+        order.append(prompt)
+        return prompt
+
+    async def scenario():
+        runner = JobRunner(
+            store, handler, concurrency=1, provider_rates={"slow": 0.1}, poll_interval=0.01
+        )
+        await runner.start()
+        try:
+            for _ in range(200):
+                if len(order) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await runner.stop()
+
+    asyncio.run(scenario())
+    assert order == ["s1", "f1"]
+    assert store.job_status(job_id)["pending"] == 1
+
+
+def test_unknown_providers_are_rejected(tmp_path):
+    from app.main import app
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    original = getattr(app.state, "job_runner", None)
+    app.state.job_runner = JobRunner(store, lambda provider, prompt: prompt, providers={"openai"})
+    try:
+        client = TestClient(app)
+        res = client.post("/jobs?provider=nope", content=json.dumps({"prompt": "x"}), headers=HEADERS)
+        assert res.status_code == 400
+        assert res.json()["detail"] == "Unknown provider: nope"
+    finally:
+        app.state.job_runner = original
+
+    # Items queued before a provider was removed fail without retries.
+    job_id = store.create_job("gone", [{"prompt": "x"}])
+    runner = JobRunner(store, lambda provider, prompt: prompt, providers={"openai"}, poll_interval=0.01)
+    status = asyncio.run(_drain(runner, job_id))
+    assert status["failed"] == 1
+    assert next(store.iter_results(job_id))["error"] == "Unknown provider: gone"
+
+
+def test_workers_sharing_a_database_keep_their_claims(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = JobStore(path, lease_seconds=60)
+    job_id = first.create_job("echo", [{"prompt": "a"}, {"prompt": "b"}])
+    claimed = first.claim_next()
+
+    second = JobStore(path, lease_seconds=60)
+    assert second.recover() == 0  # the first worker is still running "a"
+    assert second.claim_next().prompt == "b"
+    assert second.claim_next() is None
+
+    # Once its lease expires, another worker takes the item over.
+    first._conn.execute("UPDATE job_items SET lease_until=0 WHERE idx=0")
+    first._conn.commit()
+    assert second.claim_next().prompt == "a"
+    assert not first.complete(claimed, "late")
+    assert first.job_status(job_id)["running"] == 2
+
+
+def test_worker_survives_store_errors(tmp_path, caplog):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create_job("echo", [{"prompt": "a"}])
+    claim_next = store.claim_next
+    failures = []
+
+    def flaky_claim(exclude_providers=()):
+        if not failures:
+            failures.append(True)
+            raise RuntimeError("database is locked")
+        return claim_next(exclude_providers)
+
+    store.claim_next = flaky_claim
+    runner = JobRunner(store, lambda provider, prompt: prompt.upper(), concurrency=1, poll_interval=0.01)
+    status = asyncio.run(_drain(runner, job_id))
+    assert status["done"] == 1
+    assert "Job worker failed" in caplog.text
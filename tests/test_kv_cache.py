@@ -0,0 +1,145 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.kernel.providers import codellama
+from app.kernel.providers.kv_cache import PrefixKVCache, generate_with_prefix_cache
+from app.kernel.providers.model_registry import ModelRegistry
+
+
+class FakeCache:
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+
+    def crop(self, length):
+        self.tokens = self.tokens[:length]
+
+    def get_seq_length(self):
+        return len(self.tokens)
+
+
+def _cache(budget=1000):
+    return PrefixKVCache(budget, min_prefix=2, sizeof=lambda c: 10 * len(c.tokens))
+
+
+def test_lookup_returns_cropped_copy_of_longest_prefix():
+    cache = _cache()
+    cache.store([1, 2, 3], FakeCache([1, 2, 3]), key="a")
+    cache.store([1, 2, 3, 4, 5], FakeCache([1, 2, 3, 4, 5]), key="b")
+
+    hit = cache.lookup([1, 2, 3, 4, 9])
+    assert hit.key == "b" and hit.length == 4 and hit.cache.tokens == [1, 2, 3, 4]
+    assert cache.lookup([1, 2, 3, 4, 9], key="a").key == "a"
+
+    # The whole prompt is cached: one token is still left for the model.
+    hit = cache.lookup([1, 2, 3, 4, 5])
+    assert hit.length == 4
+    hit.cache.tokens.append(99)
+    assert cache.lookup([1, 2, 3, 4, 5, 6]).cache.tokens == [1, 2, 3, 4, 5]
+    assert cache.lookup([7, 8, 9]) is None
+
+
+def test_lru_eviction_under_budget():
+    cache = _cache(budget=100)
+    cache.store(range(4), FakeCache(range(4)), key="old")
+    cache.store(range(4), FakeCache(range(4)), key="new")
+    cache.lookup([0, 1, 2, 3, 4], key="old")
+    cache.store(range(5), FakeCache(range(5)), key="third")
+    assert cache.size <= 100
+    assert cache.lookup([0, 1, 2, 3, 4], key="new").key != "new"
+    cache.store(range(20), FakeCache(range(20)), key="huge")
+    assert cache.lookup(list(range(21)), key="huge").key != "huge"
+
+
+class Pipe:
+    model = object()
+    tokenizer = staticmethod(lambda text, add_special_tokens=True: {"input_ids": text.split()})
+
+    def __call__(self, prompt, max_length=None):
+        return [{"generated_text": prompt + " uncached"}]
+
+
+@pytest.mark.parametrize("cached_suffix, expected_suffix", [(" uncached", " uncached"), (" drifted", " uncached")])
+def test_verification_falls_back_to_uncached_output(monkeypatch, cached_suffix, expected_suffix):
+    monkeypatch.setattr(codellama, "pipeline", object())
+    monkeypatch.setattr(codellama, "load_pipeline", lambda name, **kw: Pipe())
+    kv_cache = _cache()
+    kv_cache.store([1, 2], FakeCache([1, 2]), key="s")
+
+    def fake_generate(model, tokenizer, prompt, cache, key=None, **kwargs):
+        assert cache is kv_cache and key == "s"
+        return prompt + cached_suffix
+
+    monkeypatch.setattr(codellama, "generate_with_prefix_cache", fake_generate)
+    provider = codellama.CodeLlamaProvider(
+        model="tiny", registry=ModelRegistry(), kv_cache=kv_cache, verify_kv_cache=True
+    )
+    assert provider.generate_response("hi", cache_key="s") == "hi" + expected_suffix
+    assert len(kv_cache) == (1 if cached_suffix == expected_suffix else 0)
+
+
+class CharTokenizer:
+    def __call__(self, text, return_tensors=None):
+        import torch
+
+        ids = torch.tensor([[ord(c) % 128 for c in text]])
+        return {"input_ids": ids, "attention_mask": torch.ones_like(ids)}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids)
+
+
+def test_cached_generation_matches_uncached_with_tiny_model():
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=128, n_positions=512, n_embd=32, n_layer=2, n_head=2)
+    model = transformers.GPT2LMHeadModel(config).eval()
+    tokenizer = CharTokenizer()
+    cache = PrefixKVCache(50_000_000, min_prefix=1)
+
+    conversation = "hello there"
+    for turn in ["first question", "second question"]:
+        conversation += "\n" + turn
+        max_length = len(conversation) + 8
+        cached = generate_with_prefix_cache(
+            model, tokenizer, conversation, cache, key="s", max_length=max_length, do_sample=False
+        )
+        encoded = tokenizer(conversation, return_tensors="pt")
+        with torch.no_grad():
+            output = model.generate(
+                encoded["input_ids"],
+                attention_mask=encoded["attention_mask"],
+                max_length=max_length,
+                do_sample=False,
+            )
+        assert cached == conversation + tokenizer.decode(output[0].tolist())[len(conversation):]
+        conversation = cached
+    assert len(cache) == 1
+
+
+def test_kv_cache_is_keyed_by_the_kernel_session(monkeypatch):
+    from app.kernel.deadline import Deadline, use_deadline
+    from app.kernel.zona_kernel import ZonaKernel
+
+    monkeypatch.setattr(codellama, "pipeline", object())
+    monkeypatch.setattr(codellama, "load_pipeline", lambda name, **kw: Pipe())
+    keys = []
+
+    def fake_generate(model, tokenizer, prompt, cache, key=None, **kwargs):
+        keys.append(key)
+        return prompt + " cached"
+
+    monkeypatch.setattr(codellama, "generate_with_prefix_cache", fake_generate)
+    provider = codellama.CodeLlamaProvider(model="tiny", registry=ModelRegistry(), kv_cache=_cache())
+    kernel = ZonaKernel(semantic_cache=None, recall_k=0)
+    kernel.clear_memory()
+
+    kernel.chat(provider, "hi", session_id="alice")
+    with use_deadline(Deadline(5)):  # provider runs in the executor thread
+        kernel.chat(provider, "hi", session_id="bob")
+    provider.generate_response("hi", cache_key="explicit")
+    assert keys == ["alice", "bob", "explicit"]
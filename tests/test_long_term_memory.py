@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.zona_kernel import ZonaKernel
+from app.storage.long_term import LongTermMemory, Turn
+from app.storage.memory_store import MemoryStore
+
+
+class RecordingProvider(BaseProvider):
+    def __init__(self):
+        self.calls = []
+
+    def generate_response(self, messages):
+        self.calls.append([m["content"] for m in messages])
+        return f"reply {len(self.calls)}"
+
+
+def _turn(user, assistant):
+    return Turn([{"role": "user", "content": user}, {"role": "assistant", "content": assistant}])
+
+
+def test_bm25_recall_ranks_relevant_turns_chronologically():
+    memory = LongTermMemory()
+    memory.add_turn("s", _turn("my invoice number is 4711", "noted"))
+    memory.add_turn("s", _turn("what is the weather like", "sunny"))
+    memory.add_turn("s", _turn("send the invoice to finance", "done"))
+
+    turns = memory.recall("s", "which invoice number did I give?", k=2)
+    assert [t[0]["content"] for t in turns] == [
+        "my invoice number is 4711",
+        "send the invoice to finance",
+    ]
+    assert memory.recall("other", "invoice", k=2) == []
+
+
+def test_recall_skips_excluded_and_expired_turns():
+    memory = LongTermMemory(retention_seconds=60)
+    old = _turn("invoice from last year", "ok")
+    old.created -= 120
+    memory.add_turn("s", old)
+    memory.add_turn("s", _turn("invoice 42", "ok"))
+    assert memory.recall("s", "invoice", k=5, exclude=[("user", "invoice 42")]) == []
+
+
+def test_kernel_attaches_recalled_turns_beyond_window():
+    provider = RecordingProvider()
+    kernel = ZonaKernel(provider, max_messages=2, semantic_cache=None, recall_k=1)
+    kernel.store = MemoryStore(retention_seconds=3600)
+    kernel.memory = {}
+
+    kernel.chat(provider, "my favourite colour is teal", session_id="s")
+    kernel.chat(provider, "tell me a joke", session_id="s")
+    kernel.chat(provider, "what is my favourite colour?", session_id="s")
+
+    sent = provider.calls[-1]
+    assert sent[:2] == ["my favourite colour is teal", "reply 1"]
+    assert sent[-1] == "what is my favourite colour?"
+    assert len(kernel.memory["s"]) == 2
+
+    kernel.clear_memory("s")
+    assert kernel.store.recall("s", "colour", k=3) == []
+
+
+def test_turns_persist_in_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'memory.db'}"
+    store = MemoryStore(database_url=url)
+    store.append_turn("s", [{"role": "user", "content": "remember the code 1234"}])
+    store.close()
+
+    reloaded = MemoryStore(database_url=url)
+    assert reloaded.recall("s", "code", k=1)[0][0]["content"] == "remember the code 1234"
+    reloaded.close()
+
+
+def test_expired_and_excess_turns_are_pruned_from_the_index(monkeypatch):
+    import time
+
+    memory = LongTermMemory(retention_seconds=60, max_turns=2)
+    for text in ("invoice one", "invoice two", "invoice three"):
+        memory.add_turn("s", _turn(text, "ok"))
+    assert memory.turn_count("s") == 2
+    assert [t[0]["content"] for t in memory.recall("s", "invoice", k=5)] == [
+        "invoice two",
+        "invoice three",
+    ]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert memory.prune() == 2
+    assert memory.sessions() == []
+    assert memory.recall("s", "invoice", k=5) == []
+
+
+def test_persisted_turns_are_capped_per_session(tmp_path):
+    url = f"sqlite:///{tmp_path / 'memory.db'}"
+    store = MemoryStore(database_url=url, max_turns=2)
+    for text in ("code 1", "code 2", "code 3"):
+        store.append_turn("s", [{"role": "user", "content": text}])
+    store.append_turn("other", [{"role": "user", "content": "code 9"}])
+    store.close()
+
+    import sqlite3
+
+    conn = sqlite3.connect(tmp_path / "memory.db")
+    assert conn.execute("SELECT COUNT(*) FROM turns WHERE session_id='s'").fetchone()[0] == 2
+    conn.close()
+
+    reloaded = MemoryStore(database_url=url, max_turns=2)
+    assert [t[0]["content"] for t in reloaded.recall("s", "code", k=5)] == ["code 2", "code 3"]
+    assert reloaded.long_term.turn_count("other") == 1
+    reloaded.close()
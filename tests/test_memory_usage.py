@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.utils import security
+from app.utils.memory_usage import AllocationTracker, deep_sizeof, top_sessions
+from zona.plugin_manager import get_plugin_manager
+
+
+def test_deep_sizeof_counts_nested_and_shared_objects_once():
+    text = "x" * 10_000
+    assert deep_sizeof([text]) > 10_000
+    assert deep_sizeof([text, text]) < 2 * 10_000
+    assert deep_sizeof({"a": [{"content": text}]}) > deep_sizeof({"a": []}) + 10_000
+
+
+def test_top_sessions_orders_by_size():
+    memory = {
+        "small": [{"role": "user", "content": "hi"}],
+        "large": [{"role": "user", "content": "y" * 5000}] * 2,
+    }
+    result = top_sessions(memory, 1)
+    assert [s["session_id"] for s in result] == ["large"]
+    assert result[0]["messages"] == 2
+
+
+def test_allocation_tracker_reports_growth():
+    tracker = AllocationTracker()
+    try:
+        assert tracker.snapshot()["growth"] == []
+        hoard = [bytearray(100_000) for _ in range(5)]
+        growth = tracker.snapshot()["growth"]
+        assert growth and growth[0]["size_diff"] >= 400_000
+        del hoard
+    finally:
+        tracker.stop()
+    assert not tracker.tracing
+
+
+def test_admin_memory_endpoint(monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_KEY", "admin")
+    main.kernel.memory["big"] = [{"role": "user", "content": "z" * 20_000}]
+    get_plugin_manager().handle("!echo hi")  # plugins are imported on first use
+    try:
+        client = TestClient(main.app)
+        res = client.get("/admin/memory?top=1", headers={"X-Admin-Key": "admin"})
+        assert res.status_code == 200
+        data = res.json()
+        assert data["structures"]["kernel.memory"]["bytes"] > 20_000
+        assert "rate_limiter.calls" in data["structures"]
+        assert "echo" in data["plugins"]
+        assert data["top_sessions"][0]["session_id"] == "big"
+        assert "allocations" not in data
+        assert client.get("/admin/memory").status_code == 401
+    finally:
+        main.kernel.memory.pop("big", None)
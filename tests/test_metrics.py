@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app.main import app, kernel
+from app.utils import metrics
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": "test-key"}
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("test_latency_seconds", "Test.", buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5, stage="a")
+
+    lines = hist.render()
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="a"} 3' in lines
+
+
+def test_every_metric_kind_can_be_cleared():
+    import pytest
+
+    with pytest.raises(TypeError):
+        metrics._Metric("test_untyped", "Untyped.")
+
+    gauge = metrics.Gauge("test_level", "Level.")
+    gauge.set(3, kind="a")
+    hist = metrics.Histogram("test_clear_seconds", "Test.")
+    hist.observe(0.5)
+    for metric in (gauge, hist):
+        metric.clear()
+        assert metric.render()[2:] == []
+
+
+def test_registry_returns_existing_metric():
+    first = metrics.counter("test_things_total", "Things.")
+    assert metrics.counter("test_things_total", "Things.") is first
+
+
+def test_metrics_endpoint_reports_stages_and_memory():
+    original_chat = kernel.chat
+    kernel.chat = lambda provider, prompt, session_id="default", obfuscate_output=False: "mocked"
+    try:
+        res = client.post("/prompt", json={"prompt": "hi", "provider": "openai"}, headers=HEADERS)
+        assert res.status_code == 200
+    finally:
+        kernel.chat = original_chat
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    body = res.text
+    assert 'zona_prompt_requests_total{outcome="ok",provider="openai"}' in body
+    assert 'zona_stage_seconds_count{outcome="ok",provider="",stage="rate_limit"}' in body
+    assert 'stage="log_interaction"' in body
+    assert "zona_memory_sessions" in body
+    assert "zona_rate_limit_rejections_total" in body
+
+
+def test_kernel_records_provider_stage():
+    from app.kernel.providers.base_provider import BaseProvider
+    from app.kernel.zona_kernel import ZonaKernel
+
+    class EchoProvider(BaseProvider):
+        def generate_response(self, messages):
+            return messages[-1]["content"]
+
+    before = metrics.STAGE_SECONDS.count(stage="provider", provider="echo", outcome="ok")
+    ZonaKernel().chat(EchoProvider(), "hi", session_id="metrics")
+    after = metrics.STAGE_SECONDS.count(stage="provider", provider="echo", outcome="ok")
+    assert after == before + 1
+
+
+def test_unknown_providers_share_one_metric_label():
+    res = client.post("/prompt", json={"prompt": "hi", "provider": "made-up-xyz"}, headers=HEADERS)
+    assert res.status_code == 400
+
+    body = client.get("/metrics").text
+    assert 'zona_prompt_requests_total{outcome="400",provider="unknown"}' in body
+    assert "made-up-xyz" not in body
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.kernel.providers import codellama
+from app.kernel.providers.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def get_memory_footprint(self):
+        return self.size
+
+    def __call__(self, prompt, max_length=None):
+        return [{"generated_text": f"{self.name}: {prompt}"}]
+
+
+def make_loader(size=100, delay=0.0):
+    loads = []
+
+    def loader(name, **options):
+        loads.append(name)
+        time.sleep(delay)
+        return FakeModel(name, size)
+
+    loader.loads = loads
+    return loader
+
+
+def test_model_is_loaded_once_for_concurrent_callers():
+    registry = ModelRegistry()
+    loader = make_loader(delay=0.05)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("m", loader)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.loads == ["m"]
+    assert len({id(r) for r in results}) == 1
+    (stats,) = registry.stats()
+    assert stats["size_bytes"] == 100 and stats["load_seconds"] >= 0.05
+
+
+def test_budget_evicts_least_recently_used_idle_model():
+    now = [0.0]
+    registry = ModelRegistry(memory_budget=250, clock=lambda: now[0])
+    loader = make_loader(size=100)
+    registry.get("a", loader)
+    now[0] = 1
+    registry.get("b", loader)
+    now[0] = 2
+    with registry.use("a", loader):
+        registry.get("c", loader)
+        registry.get("d", loader)
+    assert "a" in registry and "d" in registry
+    assert "b" not in registry
+
+
+def test_idle_models_are_unloaded_but_not_while_in_use():
+    now = [0.0]
+    registry = ModelRegistry(idle_ttl=10, clock=lambda: now[0])
+    loader = make_loader()
+    with registry.use("busy", loader):
+        registry.get("idle", loader)
+        now[0] = 20
+        assert registry.unload_idle() == ["idle"]
+    assert "busy" in registry
+    registry.get("idle", loader)
+    assert loader.loads == ["busy", "idle", "idle"]
+
+
+def test_codellama_providers_share_the_registry(monkeypatch):
+    registry = ModelRegistry()
+    created = []
+    monkeypatch.setattr(
+        codellama, "pipeline", lambda task, model, **kw: created.append(model) or FakeModel(model, 1)
+    )
+    first = codellama.CodeLlamaProvider(model="tiny", registry=registry, max_batch_size=1)
+    second = codellama.CodeLlamaProvider(model="tiny", registry=registry, max_batch_size=1)
+    assert first.generate_response("hi") == "tiny: hi"
+    assert second.generate_response([{"content": "yo"}]) == "tiny: yo"
+    assert created == ["tiny"]
+
+
+def test_codellama_requires_transformers(monkeypatch):
+    monkeypatch.setattr(codellama, "pipeline", None)
+    with pytest.raises(RuntimeError):
+        codellama.CodeLlamaProvider()
@@ -0,0 +1,114 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from zona.plugin_cache import CachePolicy, PluginResultCache
+from zona.plugin_manager import PluginManager
+
+
+def _manager(tmp_path, cache_decl, result_cache=None):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir(exist_ok=True)
+    (plugin_dir / "count.py").write_text(
+        "import itertools\n"
+        f"CACHE = {cache_decl!r}\n"
+        "_calls = itertools.count(1)\n"
+        "def run(arg):\n"
+        "    return f'{arg} #{next(_calls)}'\n"
+    )
+    return PluginManager(
+        plugin_dir,
+        allowlist={"count"},
+        manifest_path=tmp_path / "manifest.json",
+        result_cache=result_cache,
+    )
+
+
+def test_results_are_cached_per_user_with_normalized_args(tmp_path):
+    manager = _manager(tmp_path, {"ttl": 60, "normalize": ["strip", "lower", "whitespace"]})
+    alice, bob = {"session_id": "alice"}, {"session_id": "bob"}
+
+    assert manager.handle("!count A  b", alice) == "A  b #1"
+    assert manager.handle("!count a b", alice) == "A  b #1"
+    assert manager.handle("!count a b", bob) == "a b #2"
+    # Without a user to scope by, results are not cached.
+    assert manager.handle("!count a b") == "a b #3"
+    assert manager.handle("!count a b") == "a b #4"
+
+
+def test_stale_result_is_served_while_revalidating(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, {"ttl": 10, "stale_ttl": 100, "scope": "global"})
+    assert manager.handle("!count x") == "x #1"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    assert manager.handle("!count x") == "x #1"  # stale, refreshed in the background
+    manager._revalidator.shutdown(wait=True)
+    assert manager.handle("!count x") == "x #2"
+
+    monkeypatch.setattr(time, "time", lambda: now + 500)
+    assert manager.handle("!count x") == "x #3"  # expired entirely
+
+
+def test_cache_is_bounded_and_persisted(tmp_path):
+    path = tmp_path / "results.json"
+    cache = PluginResultCache(capacity=2, path=path)
+    manager = _manager(tmp_path, {"ttl": 60, "scope": "global"}, cache)
+    for arg in ("a", "b", "c"):
+        manager.handle(f"!count {arg}")
+    assert len(cache) == 2
+    manager.close()
+
+    restored = PluginResultCache(capacity=2, path=path)
+    policy = CachePolicy.from_metadata({"cache": {"ttl": 60, "scope": "global"}})
+    assert restored.get("count", policy.key("count", "c", None), policy) == ("c #3", True)
+    assert restored.get("count", policy.key("count", "a", None), policy) == (None, False)
+
+
+def test_failed_results_are_not_cached(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "flaky.py").write_text(
+        "import itertools\n"
+        "from zona.plugins import PluginBase\n"
+        "_calls = itertools.count(1)\n"
+        "class Plugin(PluginBase):\n"
+        "    def run(self, args, context):\n"
+        "        n = next(_calls)\n"
+        "        return {'result': f'{args} #{n}', 'error': n < 3}\n"
+        "    def get_metadata(self):\n"
+        "        return {'name': 'flaky', 'cache': {'ttl': 60, 'scope': 'global'}}\n"
+    )
+    manager = PluginManager(
+        plugin_dir, allowlist={"flaky"}, manifest_path=tmp_path / "manifest.json"
+    )
+
+    assert manager.handle("!flaky x") == "⚠️ x #1"
+    assert manager.handle("!flaky x") == "⚠️ x #2"
+    assert manager.handle("!flaky x") == "x #3"
+    assert manager.handle("!flaky x") == "x #3"
+
+
+def test_failed_revalidation_keeps_stale_result_and_context(tmp_path, monkeypatch):
+    import contextvars
+
+    marker = contextvars.ContextVar("marker", default=None)
+    manager = _manager(tmp_path, {"ttl": 10, "stale_ttl": 100, "scope": "global"})
+    assert manager.handle("!count x") == "x #1"
+
+    seen = []
+
+    def fail(name, args_str, context):
+        seen.append(marker.get())
+        return "\U0001F525 Plugin `count` crashed: boom"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    monkeypatch.setattr(manager, "_execute", fail)
+    marker.set("request-1")
+    assert manager.handle("!count x") == "x #1"
+    manager._revalidator.shutdown(wait=True)
+    assert seen == ["request-1"]
+    assert [entry[1] for entry in manager.result_cache._entries.values()] == ["x #1"]
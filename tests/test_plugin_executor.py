@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from zona.plugin_executor import PluginExecutor
+from zona.plugin_manager import PluginManager
+
+pytest.importorskip("resource")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "pid.py").write_text(
+        "import os\ndef run(arg):\n    return str(os.getpid())\n"
+    )
+    (plugin_dir / "slow.py").write_text(
+        "import time\n"
+        "from zona.plugins import PluginBase\n"
+        "class Plugin(PluginBase):\n"
+        "    def run(self, args, context):\n"
+        "        time.sleep(30)\n"
+        "    def get_metadata(self):\n"
+        "        return {'name': 'slow', 'timeout': 0.5}\n"
+    )
+    (plugin_dir / "hog.py").write_text(
+        "from zona.plugins import PluginBase\n"
+        "class Plugin(PluginBase):\n"
+        "    def run(self, args, context):\n"
+        "        return {'result': len(bytearray(4 * 1024 ** 3))}\n"
+        "    def get_metadata(self):\n"
+        "        return {'name': 'hog', 'memory_mb': 1024}\n"
+    )
+    allowlist = {"pid", "slow", "hog"}
+    manifest_path = tmp_path / "manifest.json"
+    executor = PluginExecutor(plugin_dir, allowlist, manifest_path, size=1, timeout=10)
+    manager = PluginManager(
+        plugin_dir, allowlist=allowlist, manifest_path=manifest_path, executor=executor
+    )
+    yield manager
+    manager.close()
+
+
+def test_plugins_run_in_warm_worker_process(manager):
+    first = manager.handle("!pid")
+    assert first.isdigit() and int(first) != os.getpid()
+    assert manager.handle("!pid") == first
+    assert manager.plugins == {}
+
+
+def test_hung_worker_is_killed_and_replaced(manager):
+    before = manager.handle("!pid")
+    assert manager.handle("!slow") == "⏱️ Plugin `slow` timed out after 0.5s."
+    after = manager.handle("!pid")
+    assert after.isdigit() and after != before
+
+
+def test_memory_limit_is_enforced(manager):
+    result = manager.handle("!hog")
+    assert result.startswith("\U0001F525 Plugin `hog` crashed: MemoryError")
+    assert manager.handle("!pid").isdigit()
+
+
+def test_waiting_for_a_busy_worker_times_out(manager):
+    import threading
+
+    from zona.plugin_executor import PluginTimeout
+
+    def occupy():
+        with pytest.raises(PluginTimeout):
+            manager.executor.run("slow", "", timeout=2)
+
+    manager.handle("!pid")  # start the single worker
+    busy = threading.Thread(target=occupy)
+    busy.start()
+    try:
+        time.sleep(0.2)
+        with pytest.raises(PluginTimeout, match="waiting 0.3s for a worker"):
+            manager.executor.run("pid", "", timeout=0.3)
+    finally:
+        busy.join()
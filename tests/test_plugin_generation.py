@@ -0,0 +1,91 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.integration_engine as engine
+from app.integrations.salesforce import SalesforceConnector
+from app.main import app
+from app.plugin_generation import PluginGenerator
+
+HEADERS = {"X-API-Key": "test-key"}
+SCHEMA = {"endpoint": "/query", "fields": ["Id"]}
+
+
+def _generator(tmp_path, calls, reloads):
+    def generate(system, schema):
+        calls.append((system, schema))
+        return f"# plugin for {system}\n"
+
+    return PluginGenerator(
+        generate,
+        plugin_dir=tmp_path / "plugins",
+        cache_dir=tmp_path / "cache",
+        reload=lambda: reloads.append(1),
+        poll_interval=0.01,
+    )
+
+
+def test_generated_plugins_are_memoized_across_workers(tmp_path):
+    calls, reloads = [], []
+    first = _generator(tmp_path, calls, reloads)
+    job = first.submit("crm", lambda: SCHEMA, "tiny")
+    job.future.result()
+    assert job.status == "succeeded" and not job.cached
+    assert (tmp_path / "plugins" / "crm_plugin.py").read_text() == "# plugin for crm\n"
+
+    # Another worker sharing the cache directory reuses the generated code.
+    second = _generator(tmp_path, calls, reloads)
+    again = second.submit("crm", lambda: SCHEMA, "tiny")
+    again.future.result()
+    assert again.cached and again.cache_key == job.cache_key
+    assert len(calls) == 1 and len(reloads) == 1
+
+    other_model = second.submit("crm", lambda: SCHEMA, "bigger")
+    other_model.future.result()
+    assert not other_model.cached and len(calls) == 2
+
+
+def test_failed_generation_is_reported(tmp_path):
+    def broken(system, schema):
+        raise RuntimeError("model weights missing")
+
+    generator = PluginGenerator(
+        broken, plugin_dir=tmp_path / "plugins", cache_dir=tmp_path / "cache", reload=lambda: None
+    )
+    job = generator.submit("crm", lambda: SCHEMA, "tiny")
+    job.future.result()
+    assert job.to_dict()["status"] == "failed"
+    assert "weights missing" in job.error
+    assert not list((tmp_path / "cache").glob("*.lock"))
+
+
+def test_add_integration_returns_job_and_status(monkeypatch, tmp_path):
+    calls, reloads = [], []
+    monkeypatch.setattr(engine, "plugin_generator", _generator(tmp_path, calls, reloads))
+    monkeypatch.setenv("CODELLAMA_MODEL", "tiny")
+
+    async def fake_authenticate(self):
+        return "token"
+
+    monkeypatch.setattr(SalesforceConnector, "authenticate", fake_authenticate)
+    client = TestClient(app)
+    res = client.post(
+        "/integrations/add",
+        json={"system": "salesforce", "api_key": "k", "base_url": "https://example.com"},
+        headers=HEADERS,
+    )
+    assert res.status_code == 200
+    job_id = res.json()["plugin_job"]
+
+    for _ in range(100):
+        status = client.get(f"/integrations/jobs/{job_id}", headers=HEADERS).json()
+        if status["status"] in {"succeeded", "failed"}:
+            break
+        time.sleep(0.01)
+    assert status["status"] == "succeeded"
+    assert status["plugin"] == "salesforce_plugin"
+    assert client.get("/integrations/jobs/missing", headers=HEADERS).status_code == 404
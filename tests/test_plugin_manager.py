@@ -63,3 +63,218 @@ def test_symlinked_plugin_outside_dir_is_rejected(tmp_path, monkeypatch):
             symlink_path.unlink()
         monkeypatch.delenv("ZONA_ALLOWED_PLUGINS", raising=False)
         importlib.reload(pm)
+
+
+def test_plugins_are_imported_on_first_dispatch(tmp_path):
+    from zona.plugin_manager import PluginManager
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    marker = tmp_path / "imported"
+    (plugin_dir / "lazy.py").write_text(
+        f"from pathlib import Path\n"
+        f"Path({str(marker)!r}).write_text('yes')\n"
+        f"SIDE_EFFECT_FREE = True\n"
+        f"def run(arg):\n    return 'lazy ' + arg\n"
+    )
+    manifest_path = tmp_path / "manifest.json"
+    manager = PluginManager(plugin_dir, allowlist={"lazy"}, manifest_path=manifest_path)
+
+    assert "lazy" in manager.manifest
+    assert manager.is_side_effect_free("lazy")
+    assert not marker.exists()
+    assert manifest_path.exists()
+
+    assert manager.handle("!lazy ok") == "lazy ok"
+    assert marker.exists()
+    assert "lazy" in manager.plugins
+
+
+def test_manifest_is_reused_until_plugin_changes(tmp_path, monkeypatch):
+    import zona.plugin_manifest as manifest
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin = plugin_dir / "greet.py"
+    plugin.write_text("def run(arg):\n    return 'hi'\n")
+    cache = tmp_path / "manifest.json"
+    first = manifest.build_manifest(plugin_dir, cache)["greet"]
+    assert first.kind == "function"
+    assert first.metadata == {"name": "greet"}
+
+    parsed = []
+    original = manifest.extract_spec
+    monkeypatch.setattr(
+        manifest, "extract_spec", lambda *a: parsed.append(a[0]) or original(*a)
+    )
+    assert manifest.build_manifest(plugin_dir, cache)["greet"].sha256 == first.sha256
+    assert parsed == []
+
+    plugin.write_text("SIDE_EFFECT_FREE = True\ndef run(arg):\n    return 'hello'\n")
+    updated = manifest.build_manifest(plugin_dir, cache)["greet"]
+    assert parsed == ["greet"]
+    assert updated.sha256 != first.sha256
+    assert updated.metadata["side_effect_free"] is True
+
+
+def test_refresh_reloads_only_changed_plugins(tmp_path, monkeypatch):
+    import os
+    from zona.plugin_manager import PluginManager
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "one.py").write_text("def run(arg):\n    return 'one v1'\n")
+    (plugin_dir / "two.py").write_text("def run(arg):\n    return 'two v1'\n")
+    manager = PluginManager(
+        plugin_dir, allowlist={"one", "two", "three"}, manifest_path=tmp_path / "m.json"
+    )
+    assert manager.handle("!one") == "one v1"
+    assert manager.handle("!two") == "two v1"
+    one_before, two_before = manager.plugins["one"], manager.plugins["two"]
+    plugins_before = manager.plugins
+
+    (plugin_dir / "one.py").write_text("def run(arg):\n    return 'one v2'\n")
+    os.utime(plugin_dir / "one.py", ns=(1, 1))
+    (plugin_dir / "three.py").write_text("def run(arg):\n    return 'three'\n")
+    (plugin_dir / "two.py").unlink()
+
+    changes = manager.refresh()
+    assert changes["added"] == ["three"]
+    assert changes["changed"] == ["one"]
+    assert changes["removed"] == ["two"]
+    # The previous mapping is left untouched for calls already in flight.
+    assert plugins_before == {"one": one_before, "two": two_before}
+    assert manager.plugins["one"] is not one_before
+    assert "three" not in manager.plugins
+    assert manager.handle("!one") == "one v2"
+    assert manager.handle("!two") == "❌ Plugin `two` not found."
+    assert manager.handle("!three") == "three"
+    assert manager.refresh()["changed"] == []
+
+
+def test_refresh_applies_allowlist_changes(tmp_path, monkeypatch):
+    import zona.plugin_manager as pm
+
+    allowlist = tmp_path / "allowlist.txt"
+    allowlist.write_text("hello\n")
+    monkeypatch.delenv("ZONA_ALLOWED_PLUGINS", raising=False)
+    monkeypatch.setattr(pm, "ALLOWLIST_PATH", allowlist)
+    manager = pm.PluginManager(manifest_path=tmp_path / "m.json")
+    assert manager.handle("!echo hi") == "❌ Plugin `echo` is not allowed."
+
+    allowlist.write_text("hello\necho\n")
+    assert manager.refresh()["allowed"] == ["echo"]
+    assert manager.handle("!echo hi") == "hi"
+
+    monkeypatch.setenv("ZONA_ALLOWED_PLUGINS", "hello")
+    assert manager.refresh()["disallowed"] == ["echo"]
+    assert "echo" not in manager.plugins
+
+
+def test_ahandle_awaits_async_plugins_concurrently(tmp_path):
+    import asyncio
+    import time as _time
+    from zona.plugin_manager import PluginManager
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "nap.py").write_text(
+        "import asyncio\n"
+        "from zona.plugins import PluginBase\n"
+        "class Plugin(PluginBase):\n"
+        "    def run(self, args, context):\n"
+        "        raise AssertionError('sync entry point used')\n"
+        "    async def arun(self, args, context):\n"
+        "        await asyncio.sleep(0.2)\n"
+        "        return {'result': 'napped ' + args}\n"
+        "    def get_metadata(self):\n"
+        "        return {'name': 'nap'}\n"
+    )
+    (plugin_dir / "block.py").write_text(
+        "import time\ndef run(arg):\n    time.sleep(0.2)\n    return 'blocked'\n"
+    )
+    manager = PluginManager(
+        plugin_dir, allowlist={"nap", "block"}, manifest_path=tmp_path / "m.json"
+    )
+
+    async def main():
+        start = _time.perf_counter()
+        results = await asyncio.gather(
+            manager.ahandle("!nap 1"), manager.ahandle("!nap 2"), manager.ahandle("!block")
+        )
+        return results, _time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    assert results == ["napped 1", "napped 2", "blocked"]
+    assert elapsed < 0.4
+    assert asyncio.run(manager.ahandle("!missing")) == "❌ Plugin `missing` is not allowed."
+
+
+def test_math_plugin_evaluates_ranges_with_cached_programs():
+    from zona.plugins import math as math_plugin
+
+    assert math_plugin.run("2+2") == "\U0001F9EE Result: 4"
+    result = math_plugin.run("2*x + a; x=0:1e6; a=1")
+    assert result == (
+        "\U0001F9EE Result: n=1000000, min=1, max=2e+06, mean=1e+06, sum=1e+12"
+    )
+    _, program = math_plugin._compile("2*x + a")
+    assert math_plugin._compile("2*x + a")[1] is program
+    assert math_plugin.run("x+1").startswith("⚠️ Math error: unbound variable")
+    assert "more than" in math_plugin.run("x; x=0:1e12")
+
+
+def test_compound_commands_run_concurrently_and_pipe_output(tmp_path):
+    import asyncio
+    import time as _time
+    from zona.plugin_manager import PluginManager, split_commands
+
+    assert split_commands("!a x ; !b | !c; !math x*2; x=0:3") == [
+        ["!a x"],
+        ["!b", "!c"],
+        ["!math x*2; x=0:3"],
+    ]
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "slow.py").write_text(
+        "import time\ndef run(arg):\n    time.sleep(0.2)\n    return 'slow ' + arg\n"
+    )
+    (plugin_dir / "upper.py").write_text("def run(arg):\n    return arg.upper()\n")
+    manager = PluginManager(
+        plugin_dir, allowlist={"slow", "upper"}, manifest_path=tmp_path / "m.json"
+    )
+
+    start = _time.perf_counter()
+    result = manager.handle("!slow a ; !slow b | !upper got {}")
+    assert _time.perf_counter() - start < 0.35
+    first, second = result.split("\n\n")
+    assert first.startswith("▶ !slow a (") and first.endswith("\nslow a")
+    assert second.startswith("▶ !slow b | !upper got {} (")
+    assert ": !slow b " in second and ", !upper got {} " in second
+    assert second.endswith("\nGOT SLOW B")
+
+    result = asyncio.run(manager.ahandle("!missing | !upper x ; !upper y"))
+    assert result.split("\n\n")[0].endswith("\n❌ Plugin `missing` is not allowed.")
+    assert result.endswith("\nY")
+
+
+def test_pipeline_stops_at_first_plugin_error(tmp_path):
+    from zona.plugin_manager import PluginManager
+
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "fail.py").write_text(
+        "def run(arg):\n    return '\u26a0\ufe0f Math error: ' + arg\n"
+    )
+    (plugin_dir / "upper.py").write_text(
+        "calls = []\ndef run(arg):\n    calls.append(arg)\n    return arg.upper()\n"
+    )
+    manager = PluginManager(
+        plugin_dir, allowlist={"fail", "upper"}, manifest_path=tmp_path / "m.json"
+    )
+
+    result = manager.handle("!fail x | !upper {}")
+    assert result.endswith("\n⚠️ Math error: x")
+    assert ", !upper {} " not in result
+    assert manager.get_plugin("upper").calls == []
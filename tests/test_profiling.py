@@ -0,0 +1,85 @@
+import contextvars
+import marshal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.zona_kernel import ZonaKernel
+from app.utils import security
+from app.utils.profiling import Profiler, profile_call
+
+
+def busy_work():
+    return sum(i * i for i in range(2000))
+
+
+class BusyProvider(BaseProvider):
+    def generate_response(self, messages):
+        return str(busy_work())
+
+
+def test_session_merges_profiles_from_worker_threads():
+    profiler = Profiler(buffer_size=2)
+    with profiler.session("unit", route="test") as session:
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(profile_call, busy_work))
+        thread.start()
+        thread.join()
+    record = profiler.get(session.id)
+    assert "busy_work" in record.report
+    assert record.attributes == {"route": "test"}
+    assert any(key[2] == "busy_work" for key in marshal.loads(record.data))
+
+    for _ in range(3):
+        with profiler.session("unit"):
+            profile_call(busy_work)
+    assert len(profiler.records()) == 2
+
+
+def test_sampling_and_passthrough():
+    assert not Profiler().should_profile()
+    assert Profiler().should_profile(requested=True)
+    assert Profiler(sample_percent=10, rng=lambda: 0.05).should_profile()
+    assert not Profiler(sample_percent=10, rng=lambda: 0.5).should_profile()
+    assert profile_call(busy_work) == busy_work()
+
+
+def test_admin_profile_endpoints(monkeypatch):
+    kernel = ZonaKernel(semantic_cache=None, recall_k=0)
+    provider = BusyProvider()
+    kernel.add_provider(
+        "busy", lambda prompt, session_id="default", **kw: kernel.chat(provider, prompt, session_id=session_id)
+    )
+    monkeypatch.setattr(main, "kernel", kernel)
+    monkeypatch.setattr(main, "profiler", Profiler())
+    client = TestClient(main.app)
+    body = {"prompt": "hi", "provider": "busy", "session_id": "p1"}
+
+    assert client.get("/admin/profiles").status_code == 403
+
+    monkeypatch.setattr(security, "ADMIN_API_KEY", "admin")
+    res = client.post("/prompt", json=body, headers={"X-API-Key": "test-key", "X-Zona-Profile": "1"})
+    assert "X-Zona-Profile-Id" not in res.headers
+
+    res = client.post(
+        "/prompt",
+        json=body,
+        headers={"X-API-Key": "test-key", "X-Zona-Profile": "1", "X-Admin-Key": "admin"},
+    )
+    profile_id = res.headers["X-Zona-Profile-Id"]
+
+    admin = {"X-Admin-Key": "admin"}
+    assert client.get("/admin/profiles", headers={"X-Admin-Key": "wrong"}).status_code == 401
+    listed = client.get("/admin/profiles", headers=admin).json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+    report = client.get(f"/admin/profiles/{profile_id}", headers=admin)
+    assert "busy_work" in report.text
+    raw = client.get(f"/admin/profiles/{profile_id}?format=pstats", headers=admin)
+    assert marshal.loads(raw.content)
+    assert client.get("/admin/profiles/missing", headers=admin).status_code == 404
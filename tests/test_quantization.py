@@ -0,0 +1,184 @@
+import json
+import sys
+import types
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.kernel.providers import codellama
+from app.kernel.providers.model_registry import ModelRegistry
+from app.kernel.providers.quantization import load_quantized_model, normalize_mode, quantized_path
+
+
+def test_normalize_mode():
+    assert normalize_mode(None) is None
+    assert normalize_mode(" none ") is None
+    assert normalize_mode("INT8") == "int8"
+    with pytest.raises(ValueError):
+        normalize_mode("int3")
+
+
+class Linear:
+    def __init__(self, in_features=4, out_features=2):
+        self.in_features = in_features
+        self.out_features = out_features
+        self.bias = "bias"
+
+    def named_children(self):
+        return []
+
+
+class QuantizedLinear:
+    def __init__(self, in_features, out_features, bias_=True, dtype=None):
+        self.shape = (in_features, out_features, bias_, dtype)
+
+
+class Param:
+    def __init__(self, is_meta):
+        self.is_meta = is_meta
+
+
+class Model:
+    def __init__(self, name, weights="random", on_meta=False):
+        self.name = name
+        self.weights = weights
+        self.dtype = None
+        self.proj = Linear()
+        self.on_meta = on_meta
+
+    def eval(self):
+        return self
+
+    def modules(self):
+        return [self, self.proj]
+
+    def named_children(self):
+        return [("proj", self.proj)]
+
+    def parameters(self):
+        return [Param(self.on_meta)]
+
+    def state_dict(self):
+        return {"weights": self.weights, "dtype": self.dtype}
+
+    def load_state_dict(self, state_dict, assign=False):
+        assert assign, "meta parameters must be replaced, not copied into"
+        self.weights = state_dict["weights"]
+        self.dtype = state_dict["dtype"]
+        self.on_meta = False
+
+
+@pytest.fixture
+def fake_torch(monkeypatch):
+    calls = {"from_pretrained": 0, "from_config": 0, "quantize": 0}
+
+    def quantize_dynamic(model, layers, dtype):
+        calls["quantize"] += 1
+        model.dtype = dtype
+        model.proj = QuantizedLinear(4, 2, dtype=dtype)
+        return model
+
+    def load(path, weights_only=False):
+        assert weights_only, "quantized models must not be unpickled as modules"
+        return json.loads(Path(path).read_text())
+
+    class Module:
+        def register_parameter(self, name, param):
+            pass
+
+    original_register = Module.register_parameter
+    torch = types.ModuleType("torch")
+    torch.float32 = "float32"
+    torch.qint8 = "qint8"
+    torch.nn = types.SimpleNamespace(Linear=Linear, Module=Module)
+    torch.save = lambda obj, path: Path(path).write_text(json.dumps(obj))
+    torch.load = load
+    ao_quantization = types.ModuleType("torch.ao.quantization")
+    ao_quantization.quantize_dynamic = quantize_dynamic
+    ao_dynamic = types.ModuleType("torch.ao.nn.quantized.dynamic")
+    ao_dynamic.Linear = QuantizedLinear
+
+    def from_pretrained(name, torch_dtype=None):
+        calls["from_pretrained"] += 1
+        return Model(name, weights="pretrained")
+
+    def from_config(config):
+        calls["from_config"] += 1
+        # Parameters must be created on the meta device, not in fp32.
+        assert Module.register_parameter is not original_register
+        return Model(config["name"], on_meta=True)
+
+    transformers = types.SimpleNamespace(
+        AutoConfig=types.SimpleNamespace(from_pretrained=lambda name: {"name": name}),
+        AutoModelForCausalLM=types.SimpleNamespace(
+            from_pretrained=from_pretrained, from_config=from_config
+        ),
+    )
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    for name in ("torch.ao", "torch.ao.nn", "torch.ao.nn.quantized"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "torch.ao.quantization", ao_quantization)
+    monkeypatch.setitem(sys.modules, "torch.ao.nn.quantized.dynamic", ao_dynamic)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    return types.SimpleNamespace(calls=calls, Module=Module, register=original_register)
+
+
+def test_quantized_weights_are_cached_on_disk(fake_torch, tmp_path):
+    first = load_quantized_model("org/model", "int8", tmp_path)
+    path = quantized_path("org/model", "int8", tmp_path)
+    assert json.loads(path.read_text()) == {"weights": "pretrained", "dtype": "qint8"}
+
+    second = load_quantized_model("org/model", "int8", tmp_path)
+    assert first.state_dict() == second.state_dict()
+    assert second.proj.shape == (4, 2, True, "qint8")
+    assert fake_torch.Module.register_parameter is fake_torch.register
+    # The conversion runs once across a cold and a warm load.
+    assert fake_torch.calls == {"from_pretrained": 1, "from_config": 1, "quantize": 1}
+
+
+def test_incomplete_quantized_file_is_converted_again(fake_torch, tmp_path):
+    path = quantized_path("org/model", "int8", tmp_path)
+    path.write_text(json.dumps({"weights": "partial", "dtype": "qint8"}))
+    model_load_state_dict = Model.load_state_dict
+
+    def partial_load(self, state_dict, assign=False):
+        model_load_state_dict(self, state_dict, assign)
+        self.on_meta = state_dict["weights"] == "partial"
+
+    Model.load_state_dict = partial_load
+    try:
+        model = load_quantized_model("org/model", "int8", tmp_path)
+    finally:
+        Model.load_state_dict = model_load_state_dict
+    assert model.weights == "pretrained"
+    assert fake_torch.calls["quantize"] == 1
+
+
+def test_provider_selects_quantized_mode_from_env(monkeypatch):
+    loaded = []
+
+    class Pipe:
+        tokenizer = staticmethod(lambda text, add_special_tokens=True: {"input_ids": text.split()})
+
+        def __call__(self, prompt, max_length=None):
+            return [{"generated_text": prompt + " one two three"}]
+
+    def fake_load(name, quantize=None, **kwargs):
+        loaded.append(quantize)
+        return Pipe()
+
+    monkeypatch.setattr(codellama, "pipeline", object())
+    monkeypatch.setattr(codellama, "load_pipeline", fake_load)
+    monkeypatch.setenv("CODELLAMA_QUANTIZE", "int8")
+    registry = ModelRegistry()
+    provider = codellama.CodeLlamaProvider(model="tiny", registry=registry, max_batch_size=1)
+    full = codellama.CodeLlamaProvider(model="tiny", registry=registry, max_batch_size=1, quantize="none")
+
+    before = codellama._GENERATED_TOKENS.value(mode="int8")
+    assert provider.generate_response("go") == "go one two three"
+    full.generate_response("go")
+    assert loaded == ["int8", None]
+    assert provider.mode == "int8" and full.mode == "full"
+    assert codellama._GENERATED_TOKENS.value(mode="int8") - before == 3
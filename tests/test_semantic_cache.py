@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.semantic_cache import SemanticCache
+from app.kernel.zona_kernel import ZonaKernel
+
+
+class CountingProvider(BaseProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, messages):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+def test_paraphrase_hits_cache():
+    cache = SemanticCache()
+    cache.store("what's my invoice total", "42 TL")
+    assert cache.lookup("Total invoices?") == "42 TL"
+    assert cache.lookup("what time is it") is None
+
+
+def test_namespaces_are_isolated():
+    cache = SemanticCache()
+    cache.store("hello there", "hi", namespace="openai")
+    assert cache.lookup("hello there", namespace="gemini") is None
+
+
+def test_ttl_and_capacity_eviction():
+    now = [1000.0]
+    cache = SemanticCache(ttl=10, capacity=2, clock=lambda: now[0])
+    cache.store("first question", "1")
+    now[0] += 1
+    cache.store("second question", "2")
+    now[0] += 1
+    assert cache.lookup("first question") == "1"  # refresh recency
+    cache.store("third question", "3")  # evicts the least recently used entry
+    assert cache.lookup("second question") is None
+    assert cache.lookup("third question") == "3"
+    now[0] += 20
+    assert cache.lookup("third question") is None
+    assert len(cache) == 0
+
+
+def test_kernel_skips_provider_on_hit():
+    kernel = ZonaKernel(semantic_cache=SemanticCache(scope="global"))
+    kernel.clear_memory()
+    provider = CountingProvider()
+
+    first = kernel.chat(provider, "what's my invoice total", session_id="a")
+    second = kernel.chat(provider, "total invoices?", session_id="b")
+
+    assert first == second == "answer 1"
+    assert provider.calls == 1
+    assert kernel.memory["b"][-1] == {"role": "assistant", "content": "answer 1"}
+
+    # Follow-up turns carry context and always go to the provider.
+    kernel.chat(provider, "total invoices?", session_id="b")
+    assert provider.calls == 2
+
+
+def test_kernel_scopes_cached_replies_to_the_session_by_default():
+    kernel = ZonaKernel(semantic_cache=SemanticCache())
+    kernel.clear_memory()
+    provider = CountingProvider()
+
+    assert kernel.chat(provider, "what's my invoice total", session_id="a") == "answer 1"
+    assert kernel.chat(provider, "total invoices?", session_id="b") == "answer 2"
+    assert provider.calls == 2
+
+
+def test_session_cache_hits_under_default_config_and_is_cleared():
+    kernel = ZonaKernel(semantic_cache=SemanticCache())
+    kernel.clear_memory()
+    provider = CountingProvider()
+
+    assert kernel.chat(provider, "what's my invoice total", session_id="a") == "answer 1"
+    assert kernel.chat(provider, "total invoices?", session_id="a") == "answer 1"
+    assert provider.calls == 1
+
+    assert kernel.chat(provider, "!clear", session_id="a") == "Memory cleared."
+    assert kernel.chat(provider, "total invoices?", session_id="a") == "answer 2"
+    assert provider.calls == 2
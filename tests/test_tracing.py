@@ -0,0 +1,136 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.integrations.logo import LogoConnector
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.zona_kernel import ZonaKernel
+from app.utils import tracing
+
+
+class EchoProvider(BaseProvider):
+    def generate_response(self, messages):
+        return messages[-1]["content"]
+
+
+@pytest.fixture
+def exporter():
+    original = tracing.get_exporter()
+    memory = tracing.InMemoryExporter()
+    tracing.set_exporter(memory)
+    yield memory
+    tracing.set_exporter(original)
+
+
+def test_nested_spans_share_trace(exporter):
+    with tracing.span("outer") as outer:
+        with tracing.span("inner") as inner:
+            pass
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert [s.name for s in exporter.spans(outer.trace_id)] == ["inner", "outer"]
+
+
+def test_trace_propagates_into_async_tasks(exporter):
+    async def child():
+        with tracing.span("child") as span:
+            return span
+
+    async def main():
+        with tracing.span("root") as root:
+            return root, await asyncio.create_task(child())
+
+    root, child_span = asyncio.run(main())
+    assert child_span.trace_id == root.trace_id
+    assert child_span.parent_id == root.span_id
+
+
+def test_kernel_chat_records_span_tree(exporter):
+    kernel = ZonaKernel()
+    with tracing.span("request") as root:
+        kernel.chat(EchoProvider(), "hi", session_id="trace")
+    names = {s.name: s for s in exporter.spans(root.trace_id)}
+    assert names["ZonaKernel.chat"].parent_id == root.span_id
+    assert names["provider.generate_response"].parent_id == names["ZonaKernel.chat"].span_id
+    assert "MemoryStore.save_memory" in names
+
+
+def test_connector_requests_carry_traceparent(monkeypatch, exporter):
+    import httpx
+
+    seen = {}
+
+    class DummyResponse:
+        status_code = 200
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"access_token": "token"}
+
+    class DummyClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            pass
+
+        async def post(self, url, headers=None):
+            seen.update(headers)
+            return DummyResponse()
+
+    monkeypatch.setattr(httpx, "AsyncClient", DummyClient)
+    connector = LogoConnector(api_key="secret", base_url="https://example.com")
+
+    async def run():
+        with tracing.span("root") as root:
+            await connector.authenticate()
+        return root
+
+    root = asyncio.run(run())
+    request_span = next(s for s in exporter.spans(root.trace_id) if s.name == "connector.request")
+    assert seen["traceparent"] == f"00-{root.trace_id}-{request_span.span_id}-01"
+    assert request_span.attributes["status_code"] == 200
+
+
+def test_prompt_handler_returns_trace_id(exporter):
+    from app.main import app, kernel
+
+    client = TestClient(app)
+    original_chat = kernel.chat
+    kernel.chat = lambda provider, prompt, session_id="default", obfuscate_output=False: "mocked"
+    try:
+        res = client.post(
+            "/prompt",
+            json={"prompt": "hi", "provider": "openai"},
+            headers={"X-API-Key": "test-key"},
+        )
+    finally:
+        kernel.chat = original_chat
+
+    trace_id = res.headers["X-Trace-Id"]
+    trace = client.get(f"/traces/{trace_id}", headers={"X-API-Key": "test-key"}).json()
+    assert [s["name"] for s in trace["spans"]] == ["prompt_handler"]
+
+
+def test_file_exporter_round_trip(tmp_path):
+    exporter = tracing.FileExporter(str(tmp_path / "spans.jsonl"))
+    original = tracing.get_exporter()
+    tracing.set_exporter(exporter)
+    try:
+        with tracing.span("work", items=3) as span:
+            pass
+    finally:
+        tracing.set_exporter(original)
+    (loaded,) = exporter.spans(span.trace_id)
+    assert loaded.attributes == {"items": 3}
+    assert loaded.duration is not None
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from zona.plugins import web_scraper
+
+
+def test_stops_reading_after_title():
+    chunks_sent = []
+
+    def body():
+        for chunk in [b"<html><head><ti", b"tle>Zona</title>", b"<body>" + b"x" * 10_000]:
+            chunks_sent.append(chunk)
+            yield chunk
+
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    )
+    assert web_scraper.fetch_title("http://example.test/a", client) == "Zona"
+    assert len(chunks_sent) == 2
+
+
+def test_conditional_request_reuses_cached_title():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=b"<title>Cached</title>")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    url = "http://example.test/etag"
+    assert web_scraper.fetch_title(url, client) == "Cached"
+    assert web_scraper.fetch_title(url, client) == "Cached"
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_rejects_non_http_urls():
+    result = web_scraper.Plugin().run("file:///etc/passwd", {})
+    assert result == {"result": "Only http and https URLs are supported", "error": True}
@@ -0,0 +1,141 @@
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app.main as main
+from app.kernel.providers.base_provider import BaseProvider
+from app.kernel.zona_kernel import ZonaKernel
+
+
+class EchoProvider(BaseProvider):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def generate_response(self, messages):
+        time.sleep(self.delay)
+        return "echo: " + messages[-1]["content"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    kernel = ZonaKernel(semantic_cache=None, recall_k=0)
+    kernel.clear_memory()
+    provider = EchoProvider()
+
+    def echo_chat(prompt, session_id="default", *, obfuscate_output=False):
+        return kernel.chat(provider, prompt, session_id=session_id, obfuscate_output=obfuscate_output)
+
+    kernel.add_provider("echo", echo_chat)
+    monkeypatch.setattr(main, "kernel", kernel)
+    client = TestClient(main.app)
+    client.provider = provider
+    return client
+
+
+def _url(session="ws1"):
+    return f"/ws/chat?session_id={session}&provider=echo"
+
+
+@contextmanager
+def _connect(client, session="ws1"):
+    with client.websocket_connect(_url(session)) as ws:
+        ws.send_json({"type": "auth", "api_key": "test-key"})
+        assert ws.receive_json() == {"type": "ready"}
+        yield ws
+
+
+def _collect(ws):
+    chunks = []
+    while True:
+        frame = ws.receive_json()
+        if frame["type"] == "chunk":
+            chunks.append(frame["content"])
+        else:
+            return "".join(chunks), frame
+
+
+@pytest.mark.parametrize("frame", [{"type": "auth", "api_key": "wrong"}, {"type": "ping"}])
+def test_rejects_invalid_api_key(client, frame):
+    with client.websocket_connect(_url()) as ws:
+        ws.send_json(frame)
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 4401
+
+
+def test_api_key_is_not_read_from_the_url(client):
+    with client.websocket_connect("/ws/chat?api_key=test-key") as ws:
+        ws.send_json({"type": "ping"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 4401
+
+
+def test_license_key_is_read_from_the_auth_frame_only(client, monkeypatch):
+    seen = []
+    monkeypatch.setattr(main.LicenseManager, "require_license", seen.append)
+    url = "/ws/chat?session_id=lic&provider=gemini"
+
+    for query, auth in (("&license_key=url", {}), ("", {"license_key": "frame"})):
+        with client.websocket_connect(url + query) as ws:
+            ws.send_json({"type": "auth", "api_key": "test-key", **auth})
+            assert ws.receive_json() == {"type": "ready"}
+            ws.send_json({"type": "prompt", "id": 1, "prompt": "hi"})
+            ws.receive_json()
+    assert seen == [None, "frame"]
+
+
+def test_api_key_header_authenticates(client):
+    with client.websocket_connect(_url(), headers={"X-API-Key": "test-key"}) as ws:
+        assert ws.receive_json() == {"type": "ready"}
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+
+def test_prompts_stream_over_one_connection(client, monkeypatch):
+    monkeypatch.setattr(main, "WS_CHUNK_SIZE", 4)
+    with _connect(client) as ws:
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+        for n in range(2):
+            ws.send_json({"type": "prompt", "id": n, "prompt": f"hello {n}"})
+            text, frame = _collect(ws)
+            assert text == f"echo: hello {n}"
+            assert frame["type"] == "done" and frame["id"] == n
+    assert len(main.kernel.memory["ws1"]) == 4
+
+
+def test_plugin_confirmation_over_socket(client):
+    with _connect(client, "ws2") as ws:
+        ws.send_json({"type": "prompt", "id": "a", "prompt": "!echo hi"})
+        frame = ws.receive_json()
+        assert frame["type"] == "confirm" and "echo" in frame["prompt"]
+        ws.send_json({"type": "confirm", "id": "b", "accept": True})
+        text, frame = _collect(ws)
+        assert "hi" in text and frame["type"] == "done"
+
+
+def test_backpressure_rejects_excess_prompts(client, monkeypatch):
+    monkeypatch.setattr(main, "WS_MAX_PENDING", 1)
+    client.provider.delay = 0.2
+    with _connect(client, "ws3") as ws:
+        for n in range(4):
+            ws.send_json({"type": "prompt", "id": n, "prompt": "slow"})
+        frames = [ws.receive_json() for _ in range(4)]
+        errors = [f for f in frames if f["type"] == "error"]
+        assert len(errors) >= 2 and all(f["status"] == 503 for f in errors)
+
+
+def test_idle_connection_is_closed(client, monkeypatch):
+    monkeypatch.setattr(main, "WS_IDLE_TIMEOUT", 0.05)
+    with _connect(client, "ws4") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1000
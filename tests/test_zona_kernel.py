@@ -51,3 +51,168 @@ def test_add_provider_runtime():
     kernel.add_provider("dummy", dummy)
     response = kernel.dispatch_provider("dummy", "hi")
     assert response == "dummy:hi"
+
+
+def test_side_effect_free_plugin_runs_speculatively(monkeypatch):
+    import threading
+
+    import app.kernel.zona_kernel as zk
+
+    started = threading.Event()
+    calls = []
+
+    def fake_handle(command, context=None):
+        calls.append(command)
+        started.set()
+        return f"ran {command}"
+
+    monkeypatch.setattr(zk, "handle_plugin_command", fake_handle)
+    monkeypatch.setattr(zk, "is_side_effect_free", lambda command: True)
+
+    kernel = ZonaKernel()
+    kernel.openai_chat("!lookup abc", session_id="s1")
+    assert started.wait(1)  # executed before the user confirmed
+
+    assert kernel.openai_chat("yes", session_id="s1") == "ran !lookup abc"
+    assert calls == ["!lookup abc"]
+    assert "s1" not in kernel.speculative_runs
+
+
+def test_speculative_result_discarded_on_cancel_or_timeout(monkeypatch):
+    import app.kernel.zona_kernel as zk
+
+    calls = []
+
+    def fake_handle(command, context=None):
+        calls.append(command)
+        return f"ran {command} #{len(calls)}"
+
+    monkeypatch.setattr(zk, "handle_plugin_command", fake_handle)
+    monkeypatch.setattr(zk, "is_side_effect_free", lambda command: True)
+
+    kernel = ZonaKernel()
+    kernel.openai_chat("!lookup abc", session_id="s1")
+    assert kernel.openai_chat("no", session_id="s1") == "Cancelled."
+    assert "s1" not in kernel.speculative_runs
+
+    kernel.speculation_ttl = 0
+    kernel.openai_chat("!lookup abc", session_id="s1")
+    speculative = kernel.speculative_runs["s1"][1].result()
+    result = kernel.openai_chat("yes", session_id="s1")
+    assert result != speculative  # stale speculative result was re-run
+    assert result == f"ran !lookup abc #{len(calls)}"
+
+
+def test_only_declared_plugins_are_speculative():
+    from zona.plugin_manager import is_side_effect_free
+
+    assert is_side_effect_free("!math 1+1")
+    assert is_side_effect_free("!echo hi")
+    assert not is_side_effect_free("!time")
+
+
+def test_confirmed_plugin_runs_on_bound_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    import app.kernel.zona_kernel as zk
+
+    async def fake_ahandle(command, context=None):
+        return f"{command} on {threading.current_thread().name}"
+
+    monkeypatch.setattr(zk, "ahandle_plugin_command", fake_ahandle)
+    monkeypatch.setattr(zk, "is_side_effect_free", lambda command: False)
+
+    async def main():
+        kernel = ZonaKernel()
+        kernel.bind_loop(asyncio.get_running_loop())
+        await asyncio.to_thread(kernel.openai_chat, "!lookup abc", session_id="s1")
+        return await asyncio.to_thread(kernel.openai_chat, "yes", session_id="s1")
+
+    loop_thread = threading.current_thread().name
+    assert asyncio.run(main()) == f"!lookup abc on {loop_thread}"
+
+
+def test_compound_plugin_command_needs_one_confirmation():
+    kernel = ZonaKernel()
+    response = kernel.openai_chat("!echo a ; !hello | !echo {}", session_id="multi")
+    assert response == (
+        "Run these plugin commands?\n- `!echo a`\n- `!hello | !echo {}`\n(yes/no)"
+    )
+    result = kernel.openai_chat("yes", session_id="multi")
+    assert result.endswith("\n👋 Hello from Zona Plugin!")
+    assert "\na\n" in result
+
+
+def test_concurrent_turns_keep_every_message():
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    class SlowEchoProvider(BaseProvider):
+        def generate_response(self, messages):
+            time.sleep(0.001)
+            return messages[-1]["content"]
+
+    kernel = ZonaKernel(max_messages=None, recall_k=0)
+    kernel.clear_memory()
+    saves = []
+    original_save = kernel.store.save_memory
+
+    def save_memory(memory):
+        # Fails with "dictionary changed size" if another turn mutates memory.
+        saves.append(sum(len(history) for history in memory.values()))
+        original_save(memory)
+
+    kernel.store.save_memory = save_memory
+    barrier = threading.Barrier(8)
+
+    def chat(worker):
+        barrier.wait()
+        for turn in range(10):
+            kernel.chat(SlowEchoProvider(), f"{worker}-{turn}", session_id=f"s{worker % 4}")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(chat, range(8)))
+
+    assert sum(len(history) for history in kernel.memory.values()) == 8 * 10 * 2
+    assert len(saves) == 80
+
+
+def test_hung_plugin_on_bound_loop_is_abandoned(monkeypatch):
+    import asyncio
+
+    import pytest
+
+    import app.kernel.zona_kernel as zk
+    from app.kernel.deadline import Deadline, DeadlineExceeded, use_deadline
+
+    cancelled = []
+
+    async def hang(command, context=None):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(command)
+            raise
+
+    monkeypatch.setattr(zk, "ahandle_plugin_command", hang)
+    monkeypatch.setattr(zk, "is_side_effect_free", lambda command: command == "!spec")
+
+    def confirm(kernel, command, deadline=None):
+        kernel.openai_chat(command, session_id="s1")
+        with use_deadline(deadline):
+            return kernel.openai_chat("yes", session_id="s1")
+
+    async def main():
+        kernel = ZonaKernel()
+        kernel.plugin_timeout = 0.1
+        kernel.bind_loop(asyncio.get_running_loop())
+        timed_out = await asyncio.to_thread(confirm, kernel, "!lookup")
+        with pytest.raises(DeadlineExceeded):
+            await asyncio.to_thread(confirm, kernel, "!spec", Deadline(0.1))
+        await asyncio.sleep(0.05)
+        return timed_out
+
+    assert asyncio.run(main()) == "⏱️ Plugin command `!lookup` timed out after 0.1s."
+    assert cancelled == ["!lookup", "!spec"]
@@ -0,0 +1,169 @@
+"""Result cache for plugins that declare themselves cacheable.
+
+A plugin opts in with a ``cache`` metadata entry (or a module level ``CACHE``
+constant for function based plugins)::
+
+    {"cache": {"ttl": 300, "scope": "user", "normalize": ["strip", "lower"],
+               "stale_ttl": 60}}
+
+* ``ttl``: seconds a result is served without running the plugin.
+* ``scope``: ``"user"`` (default) keys results by the caller's ``user_id`` or
+  ``session_id`` from the plugin context, ``"global"`` shares them.
+* ``normalize``: transformations applied to the arguments before they are
+  used as a key, among ``strip``, ``lower`` and ``whitespace`` (collapse runs
+  of whitespace).  Defaults to ``["strip", "whitespace"]``.
+* ``stale_ttl``: for that many seconds after ``ttl`` the stale result is still
+  returned while the plugin runs again in the background.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+_LOOKUPS = counter(
+    "zona_plugin_cache_lookups_total", "Plugin result cache lookups by plugin and result."
+)
+
+_NORMALIZERS = {
+    "strip": str.strip,
+    "lower": str.lower,
+    "whitespace": lambda text: re.sub(r"\s+", " ", text),
+}
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float
+    scope: str = "user"
+    normalize: Tuple[str, ...] = ("strip", "whitespace")
+    stale_ttl: float = 0.0
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[Dict[str, Any]]) -> Optional["CachePolicy"]:
+        """Return the policy declared in ``metadata``, or ``None``."""
+        declared = (metadata or {}).get("cache")
+        if not declared:
+            return None
+        if isinstance(declared, (int, float)):
+            declared = {"ttl": declared}
+        normalize = declared.get("normalize", cls.normalize)
+        if isinstance(normalize, str):
+            normalize = [normalize]
+        unknown = set(normalize) - _NORMALIZERS.keys()
+        if unknown:
+            raise ValueError(f"Unknown cache normalization: {', '.join(sorted(unknown))}")
+        scope = declared.get("scope", "user")
+        if scope not in {"user", "global"}:
+            raise ValueError(f"Unknown cache scope: {scope}")
+        return cls(
+            ttl=float(declared.get("ttl", 0)),
+            scope=scope,
+            normalize=tuple(normalize),
+            stale_ttl=float(declared.get("stale_ttl", 0)),
+        )
+
+    def key(self, name: str, args: str, context: Optional[dict]) -> Optional[str]:
+        """Return the cache key of a call, or ``None`` if it is not cacheable."""
+        if self.ttl <= 0:
+            return None
+        owner = ""
+        if self.scope == "user":
+            context = context or {}
+            owner = context.get("user_id") or context.get("session_id")
+            if not owner:
+                return None
+        for step in self.normalize:
+            args = _NORMALIZERS[step](args)
+        return json.dumps([name, owner, args])
+
+
+class PluginResultCache:
+    """Bounded LRU of plugin results, optionally persisted as JSON."""
+
+    def __init__(self, capacity: int = 256, path: Optional[Path] = None) -> None:
+        self.capacity = capacity
+        self.path = Path(path) if path else None
+        # key -> (plugin, result, stored_at)
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> "PluginResultCache":
+        """Build a cache from ``ZONA_PLUGIN_CACHE_SIZE`` and ``ZONA_PLUGIN_CACHE_PATH``."""
+        path = os.getenv("ZONA_PLUGIN_CACHE_PATH")
+        return cls(int(os.getenv("ZONA_PLUGIN_CACHE_SIZE", "256")), Path(path) if path else None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, plugin: str, key: str, policy: CachePolicy) -> Tuple[Optional[str], bool]:
+        """Return ``(result, fresh)``; ``result`` is ``None`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[2] > policy.ttl + policy.stale_ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                _LOOKUPS.inc(plugin=plugin, result="miss")
+                return None, False
+            self._entries.move_to_end(key)
+        fresh = time.time() - entry[2] <= policy.ttl
+        _LOOKUPS.inc(plugin=plugin, result="hit" if fresh else "stale")
+        return entry[1], fresh
+
+    def set(self, plugin: str, key: str, result: str) -> None:
+        with self._lock:
+            self._entries[key] = (plugin, result, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, plugin: Optional[str] = None) -> None:
+        """Drop the results of ``plugin``, or every result."""
+        with self._lock:
+            if plugin is None:
+                self._entries.clear()
+                return
+            for key in [k for k, entry in self._entries.items() if entry[0] == plugin]:
+                del self._entries[key]
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            rows: List[list] = json.loads(self.path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable plugin cache %s: %s", self.path, exc)
+            return
+        with self._lock:
+            for key, plugin, result, stored_at in rows[-self.capacity :]:
+                self._entries[key] = (plugin, result, stored_at)
+
+    def save(self) -> None:
+        """Write the cache to ``path`` so results survive a restart."""
+        if self.path is None:
+            return
+        with self._lock:
+            rows = [[key, *entry] for key, entry in self._entries.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(rows))
+        os.replace(tmp_path, self.path)
+
+
+__all__ = ["CachePolicy", "PluginResultCache"]
@@ -0,0 +1,279 @@
+"""Run plugins in a pool of worker processes.
+
+Plugins run inline block the thread that dispatched them, and a plugin that
+hangs (a socket read without timeout, a huge ``numexpr`` expression...) can
+only be stopped by killing the process running it.  :class:`PluginExecutor`
+keeps ``size`` worker processes that import every allowed plugin when they
+start, so calls do not pay for imports.  Each call has a wall-clock timeout
+after which the worker is killed and replaced, and may cap the worker's
+address space with ``RLIMIT_AS``.
+
+Limits default to ``ZONA_PLUGIN_TIMEOUT`` seconds and ``ZONA_PLUGIN_MEMORY_MB``
+and can be set per plugin with ``timeout`` and ``memory_mb`` metadata entries.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from app.utils.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_SECONDS = histogram(
+    "zona_plugin_queue_seconds", "Time plugin calls waited for a worker process."
+)
+_WORKER_RESTARTS = counter(
+    "zona_plugin_worker_restarts_total", "Plugin worker processes replaced, by reason."
+)
+
+
+class PluginTimeout(Exception):
+    """Raised when a plugin exceeds its wall-clock limit."""
+
+
+class PluginWorkerError(Exception):
+    """Raised when a plugin fails or its worker process dies."""
+
+
+@contextmanager
+def _address_space_limit(limit: Optional[int]) -> Iterator[None]:
+    if not limit or resource is None:
+        yield
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _worker_main(conn: Any, plugin_dir: str, allowlist: list, manifest_path: str) -> None:
+    """Entry point of a worker process."""
+    from zona.plugin_manager import PluginManager
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    manager = PluginManager(
+        Path(plugin_dir), allowlist=set(allowlist), manifest_path=Path(manifest_path)
+    )
+    for name in manager.manifest:
+        if name in manager.allowlist:
+            try:
+                manager.get_plugin(name)
+            except Exception as exc:  # reported again when the plugin is called
+                logger.warning("Plugin %s failed to import: %s", name, exc)
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        name, args_str, context, memory_limit = request
+        try:
+            with _address_space_limit(memory_limit):
+                result = manager.run_plugin(name, args_str, context)
+            conn.send(("ok", result))
+        except BaseException as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+@dataclass(eq=False)
+class _Worker:
+    process: Any
+    conn: Any
+    generation: int
+
+
+class PluginExecutor:
+    """Pool of warm worker processes running plugin calls."""
+
+    def __init__(
+        self,
+        plugin_dir: Path,
+        allowlist: Iterable[str],
+        manifest_path: Path,
+        *,
+        size: int = 2,
+        timeout: float = 30.0,
+        memory_limit_mb: float = 0,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.plugin_dir = Path(plugin_dir)
+        self.allowlist = sorted(allowlist)
+        self.manifest_path = Path(manifest_path)
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._busy: set = set()
+        self._generation = 0
+        self._started = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls, plugin_dir: Path, allowlist: Iterable[str], manifest_path: Path
+    ) -> Optional["PluginExecutor"]:
+        """Return an executor if ``ZONA_PLUGIN_WORKERS`` is positive."""
+        size = int(os.getenv("ZONA_PLUGIN_WORKERS", "0"))
+        if size <= 0:
+            return None
+        return cls(
+            plugin_dir,
+            allowlist,
+            manifest_path,
+            size=size,
+            timeout=float(os.getenv("ZONA_PLUGIN_TIMEOUT", "30")),
+            memory_limit_mb=float(os.getenv("ZONA_PLUGIN_MEMORY_MB", "0")),
+        )
+
+    def start(self) -> None:
+        """Start the worker processes; called on first use otherwise."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+
+    def recycle(self, allowlist: Optional[Iterable[str]] = None) -> None:
+        """Replace every worker, e.g. after plugins changed on disk.
+
+        Idle workers are replaced immediately, busy ones once their call ends.
+        """
+        with self._lock:
+            if allowlist is not None:
+                self.allowlist = sorted(allowlist)
+            self._generation += 1
+            if not self._started:
+                return
+            stale = []
+            while True:
+                try:
+                    stale.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for worker in stale:
+            self._stop(worker)
+            self._idle.put(self._spawn())
+
+    def run(
+        self,
+        name: str,
+        args_str: str,
+        context: Optional[dict] = None,
+        *,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[float] = None,
+    ) -> str:
+        """Run plugin ``name`` in a worker and return its result."""
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        memory_mb = self.memory_limit_mb if memory_limit_mb is None else memory_limit_mb
+        memory_limit = int(memory_mb * 1024 * 1024) if memory_mb else None
+
+        queued = time.perf_counter()
+        try:
+            # Every worker may be busy or being respawned; wait no longer than
+            # the call itself may run.
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PluginTimeout(f"timed out waiting {timeout:g}s for a worker") from None
+        finally:
+            _QUEUE_SECONDS.observe(time.perf_counter() - queued, plugin=name)
+        replace = None
+        try:
+            self._busy.add(worker)
+            worker.conn.send((name, args_str, context or {}, memory_limit))
+            if not worker.conn.poll(timeout):
+                replace = "timeout"
+                raise PluginTimeout(f"timed out after {timeout:g}s")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            replace = "died"
+            raise PluginWorkerError("worker process exited") from exc
+        finally:
+            self._busy.discard(worker)
+            self._release(worker, replace)
+        if status == "error":
+            raise PluginWorkerError(payload)
+        return payload
+
+    def shutdown(self) -> None:
+        """Stop every worker process; they are started again on next use."""
+        with self._lock:
+            self._started = False
+            workers = list(self._busy)
+            while True:
+                try:
+                    workers.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for worker in workers:
+            self._stop(worker)
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, str(self.plugin_dir), self.allowlist, str(self.manifest_path)),
+            name="zona-plugin-worker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn, self._generation)
+
+    def _release(self, worker: _Worker, reason: Optional[str]) -> None:
+        if reason is None and worker.generation != self._generation:
+            reason = "recycle"
+        if reason is None and self._started:
+            self._idle.put(worker)
+            return
+        self._stop(worker, kill=reason in {"timeout", "died"})
+        if reason in {"timeout", "died"}:
+            _WORKER_RESTARTS.inc(reason=reason)
+            logger.warning("Replaced plugin worker %s (%s)", worker.process.pid, reason)
+        if self._started:
+            self._idle.put(self._spawn())
+
+    @staticmethod
+    def _stop(worker: _Worker, kill: bool = False) -> None:
+        if not kill:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                kill = True
+            else:
+                worker.process.join(1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(1)
+        worker.conn.close()
+
+
+__all__ = ["PluginExecutor", "PluginTimeout", "PluginWorkerError"]
@@ -13,13 +13,38 @@ API so existing code and tests continue to function.
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import importlib.util
+import inspect
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from app.utils.metrics import PLUGIN_SECONDS, counter
+from app.utils.tracing import span
+from zona.plugin_cache import CachePolicy, PluginResultCache
+from zona.plugin_executor import PluginExecutor, PluginTimeout
+from zona.plugin_manifest import PluginSpec, build_manifest
 from zona.plugins import PluginBase
 
+logger = logging.getLogger(__name__)
+
+ALLOWLIST_PATH = Path(__file__).with_name("plugins_allowlist.txt")
+
+# ``;`` and ``|`` separate the commands of a compound command.
+_SEPARATOR = re.compile(r"\s*([;|])\s*(?=!)")
+MAX_COMPOUND_STEPS = int(os.getenv("ZONA_MAX_PLUGIN_STEPS", "8"))
+
+_RELOADS = counter(
+    "zona_plugin_reloads_total", "Plugins added, changed or removed by hot reload."
+)
 
 DEFAULT_ALLOWED_PLUGINS = [
     "echo",
@@ -36,111 +61,565 @@ def _load_allowed_plugins() -> set[str]:
     if env_value:
         return {p.strip() for p in env_value.split(",") if p.strip()}
 
-    config_path = Path(__file__).with_name("plugins_allowlist.txt")
-    if config_path.exists():
+    if ALLOWLIST_PATH.exists():
         return {
             line.strip()
-            for line in config_path.read_text().splitlines()
+            for line in ALLOWLIST_PATH.read_text().splitlines()
             if line.strip()
         }
 
     return set(DEFAULT_ALLOWED_PLUGINS)
 
 
-class PluginManager:
-    """Load and dispatch Zona plugins."""
+def _allowlist_source() -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """Return a cheap fingerprint of the allow list configuration."""
+    try:
+        stat = ALLOWLIST_PATH.stat()
+    except OSError:
+        return os.getenv("ZONA_ALLOWED_PLUGINS"), None, None
+    return os.getenv("ZONA_ALLOWED_PLUGINS"), stat.st_mtime_ns, stat.st_size
+
 
-    def __init__(self) -> None:
-        self.allowlist = _load_allowed_plugins()
+def _manifest_path(plugin_dir: Path) -> Path:
+    return Path(os.getenv("ZONA_PLUGIN_MANIFEST", str(plugin_dir / ".manifest.json")))
+
+
+class PluginManager:
+    """Load and dispatch Zona plugins.
+
+    Plugins are described by a manifest (see :mod:`zona.plugin_manifest`) and
+    only imported the first time :meth:`handle` dispatches to them.
+
+    ``plugins`` and ``manifest`` are never mutated in place: updates build new
+    dicts and swap them in, so a call that already fetched a plugin finishes
+    with the version it started with.
+
+    With an ``executor`` plugins run in its worker processes instead of the
+    calling thread, and the manager itself never imports them.
+
+    Results of plugins declaring a ``cache`` policy are kept in
+    ``result_cache`` (see :mod:`zona.plugin_cache`).
+    """
+
+    def __init__(
+        self,
+        plugin_dir: Optional[Path] = None,
+        *,
+        allowlist: Optional[set[str]] = None,
+        manifest_path: Optional[Path] = None,
+        executor: Optional[PluginExecutor] = None,
+        result_cache: Optional[PluginResultCache] = None,
+    ) -> None:
+        self.plugin_dir = Path(plugin_dir or Path(__file__).with_name("plugins"))
+        self.manifest_path = manifest_path or _manifest_path(self.plugin_dir)
+        self._watch_allowlist = allowlist is None
+        self._allowlist_source = _allowlist_source()
+        self.allowlist = allowlist if allowlist is not None else _load_allowed_plugins()
+        self.manifest: Dict[str, PluginSpec] = {}
         self.plugins: Dict[str, Any] = {}
-        self.load_plugins()
+        self.executor = executor
+        self.result_cache = result_cache if result_cache is not None else PluginResultCache()
+        self._revalidator: Optional[ThreadPoolExecutor] = None
+        self._revalidating: set[str] = set()
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.load_manifest()
+
+    @classmethod
+    def from_env(cls) -> "PluginManager":
+        """Return the default manager, with workers if ``ZONA_PLUGIN_WORKERS`` is set."""
+        manager = cls(result_cache=PluginResultCache.from_env())
+        manager.executor = PluginExecutor.from_env(
+            manager.plugin_dir, manager.allowlist, manager.manifest_path
+        )
+        return manager
+
+    def close(self) -> None:
+        """Stop the worker processes, if any, and persist cached results."""
+        if self.executor is not None:
+            self.executor.shutdown()
+        revalidator, self._revalidator = self._revalidator, None
+        if revalidator is not None:
+            revalidator.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.result_cache.save()
+        except OSError as exc:
+            logger.warning("Saving the plugin result cache failed: %s", exc)
 
     def reload(self) -> None:
-        """Reload plugins from disk, clearing previous state."""
-        self.plugins.clear()
-        self.load_plugins()
+        """Rescan plugins on disk; modules are imported again on next use."""
+        with self._load_lock:
+            self.plugins = {}
+        self.load_manifest()
+        self.result_cache.invalidate()
+        if self.executor is not None:
+            self.executor.recycle(self.allowlist)
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Apply plugin file and allow list changes made since the last scan.
+
+        Only added, changed or removed plugins are touched.  Changed plugins
+        that were already loaded are imported again before being swapped in,
+        the others stay lazy.  Returns the names of the plugins in each
+        category.
+        """
+        with self._refresh_lock:
+            allowlist = self.allowlist
+            if self._watch_allowlist:
+                source = _allowlist_source()
+                if source != self._allowlist_source:
+                    allowlist = _load_allowed_plugins()
+                    self._allowlist_source = source
+
+            old = self.manifest
+            manifest = build_manifest(self.plugin_dir, self.manifest_path)
+            changes = {
+                "added": sorted(manifest.keys() - old.keys()),
+                "changed": sorted(
+                    name
+                    for name in manifest.keys() & old.keys()
+                    if manifest[name].sha256 != old[name].sha256
+                ),
+                "removed": sorted(old.keys() - manifest.keys()),
+                "allowed": sorted(allowlist - self.allowlist),
+                "disallowed": sorted(self.allowlist - allowlist),
+            }
+
+            loaded = self.plugins
+            fresh: Dict[str, Any] = {}
+            for name in changes["changed"]:
+                if name in loaded and name in allowlist:
+                    try:
+                        fresh[name] = self._import_plugin(manifest[name])
+                    except Exception as exc:
+                        # Dropped below; the error surfaces on the next call.
+                        logger.warning("Reloading plugin %s failed: %s", name, exc)
+
+            with self._load_lock:
+                plugins = {
+                    name: plugin
+                    for name, plugin in self.plugins.items()
+                    if name in manifest and name in allowlist and name not in changes["changed"]
+                }
+                plugins.update({name: p for name, p in fresh.items() if p is not None})
+                self.manifest, self.allowlist, self.plugins = manifest, allowlist, plugins
+
+        for name in changes["changed"] + changes["removed"] + changes["disallowed"]:
+            self.result_cache.invalidate(name)
+        if self.executor is not None and any(changes.values()):
+            self.executor.recycle(allowlist)
+
+        for change in ("added", "changed", "removed"):
+            if changes[change]:
+                _RELOADS.inc(len(changes[change]), change=change)
+                logger.info("Plugins %s: %s", change, ", ".join(changes[change]))
+        return changes
+
+    def load_manifest(self) -> None:
+        """Refresh the manifest of plugin files without importing them."""
+        self.manifest = build_manifest(self.plugin_dir, self.manifest_path)
 
     def load_plugins(self) -> None:
-        """Import plugin modules from the plugin directory.
+        """Eagerly import every allowed plugin listed in the manifest."""
+        for name in list(self.manifest):
+            if name in self.allowlist:
+                self.get_plugin(name)
+
+    def get_plugin(self, name: str) -> Any | None:
+        """Return the loaded plugin ``name``, importing its module if needed.
 
         Both class based plugins (subclassing :class:`PluginBase`) and simple
         modules exposing a ``run`` function are supported.  Only modules listed
         in the allow list are loaded.
         """
-
-        plugin_dir = Path(__file__).with_name("plugins")
-        plugin_dir_resolved = plugin_dir.resolve()
-        for path in plugin_dir.glob("*.py"):
+        plugin = self.plugins.get(name)
+        if plugin is not None or name not in self.allowlist:
+            return plugin
+        with self._load_lock:
+            plugin = self.plugins.get(name)
+            spec = self.manifest.get(name)
+            if plugin is None and spec is not None:
+                plugin = self._import_plugin(spec)
+                if plugin is not None:
+                    self.plugins = {**self.plugins, name: plugin}
+        return plugin
+
+    def _import_plugin(self, spec: PluginSpec) -> Any | None:
+        with span("plugin.import", plugin=spec.name):
+            module_spec = importlib.util.spec_from_file_location(
+                f"zona.plugins.{spec.name}", spec.path
+            )
+            if not module_spec or not module_spec.loader:  # pragma: no cover - importlib internals
+                return None
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+
+        for attr in dir(module):
+            cls = getattr(module, attr)
+            if (
+                isinstance(cls, type)
+                and issubclass(cls, PluginBase)
+                and cls is not PluginBase
+            ):
+                return cls()
+        if hasattr(module, "run"):
+            return module
+        return None
+
+    def is_side_effect_free(self, name: str) -> bool:
+        """Return ``True`` if plugin ``name`` declares it has no side effects.
+
+        Such plugins may be executed speculatively, before the user has
+        confirmed the command.  Class based plugins declare this with a
+        ``side_effect_free`` metadata entry, function based plugins with a
+        module level ``SIDE_EFFECT_FREE = True``.
+        """
+        if name not in self.allowlist or name not in self.manifest:
+            return False
+        metadata = self.manifest[name].metadata
+        if metadata is not None and name not in self.plugins:
+            return bool(metadata.get("side_effect_free", False))
+        try:
+            plugin = self.get_plugin(name)
+        except Exception:  # pragma: no cover - plugin failure
+            return False
+        if plugin is None:
+            return False
+        if isinstance(plugin, PluginBase):
             try:
-                real_path = path.resolve(strict=True)
-            except FileNotFoundError:
-                continue
-
-            # Ensure the resolved path stays within the plugin directory
+                return bool(plugin.get_metadata().get("side_effect_free", False))
+            except Exception:  # pragma: no cover - plugin failure
+                return False
+        return bool(getattr(plugin, "SIDE_EFFECT_FREE", False))
+
+    def _check(self, name: str) -> Optional[str]:
+        """Return an error message if plugin ``name`` cannot be dispatched."""
+        if name not in self.allowlist:
+            return f"\u274C Plugin `{name}` is not allowed."
+        if name not in self.manifest:
+            return f"\u274C Plugin `{name}` not found."
+        return None
+
+    def metadata(self, name: str) -> Dict[str, Any]:
+        """Return the metadata of plugin ``name``, importing it only if needed."""
+        spec = self.manifest.get(name)
+        if spec is None:
+            return {}
+        if spec.metadata is not None:
+            return spec.metadata
+        plugin = self.get_plugin(name)
+        if isinstance(plugin, PluginBase):
+            return plugin.get_metadata()
+        return {}
+
+    def _limits(self, name: str) -> Dict[str, Any]:
+        metadata = self.manifest[name].metadata or {}
+        return {"timeout": metadata.get("timeout"), "memory_limit_mb": metadata.get("memory_mb")}
+
+    def _cache_entry(
+        self, name: str, args_str: str, context: Optional[dict]
+    ) -> Tuple[Optional[CachePolicy], Optional[str]]:
+        try:
+            policy = CachePolicy.from_metadata(self.metadata(name))
+        except Exception as exc:
+            logger.warning("Ignoring cache policy of plugin %s: %s", name, exc)
+            return None, None
+        if policy is None:
+            return None, None
+        return policy, policy.key(name, args_str, context)
+
+    def _cached(self, name: str, args_str: str, context: Optional[dict]) -> Optional[str]:
+        """Return a cached result, revalidating it in the background if stale."""
+        policy, key = self._cache_entry(name, args_str, context)
+        if key is None:
+            return None
+        result, fresh = self.result_cache.get(name, key, policy)
+        if result is not None and not fresh:
+            self._revalidate(name, args_str, context, key)
+        return result
+
+    def _store(self, name: str, args_str: str, context: Optional[dict], result: str) -> None:
+        _, key = self._cache_entry(name, args_str, context)
+        if key is not None:
+            self.result_cache.set(name, key, result)
+
+    def _revalidate(self, name: str, args_str: str, context: Optional[dict], key: str) -> None:
+        with self._load_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+            if self._revalidator is None:
+                self._revalidator = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="zona-plugin-revalidate"
+                )
+            revalidator = self._revalidator
+
+        def run() -> None:
             try:
-                real_path.relative_to(plugin_dir_resolved)
-            except ValueError:
-                continue
-
-            # Reject symbolic links outright
-            if path.is_symlink():
-                continue
-
-            if real_path.name.startswith("__"):
-                continue
-            name = real_path.stem
-            if name not in self.allowlist:
-                continue
-            spec = importlib.util.spec_from_file_location(
-                f"zona.plugins.{name}", real_path
-            )
-            if not spec or not spec.loader:  # pragma: no cover - importlib internals
-                continue
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-
-            plugin_obj: Any | None = None
-            for attr in dir(module):
-                cls = getattr(module, attr)
-                if (
-                    isinstance(cls, type)
-                    and issubclass(cls, PluginBase)
-                    and cls is not PluginBase
-                ):
-                    plugin_obj = cls()
-                    break
-            if plugin_obj is None and hasattr(module, "run"):
-                plugin_obj = module
-            if plugin_obj is not None:
-                self.plugins[name] = plugin_obj
+                result = self._execute(name, args_str, context)
+                if is_failure(result):
+                    logger.warning("Revalidating plugin %s failed: %s", name, result)
+                else:
+                    self.result_cache.set(name, key, result)
+            except Exception as exc:
+                logger.warning("Revalidating plugin %s failed: %s", name, exc)
+            finally:
+                self._revalidating.discard(key)
+
+        revalidator.submit(contextvars.copy_context().run, run)
+
+    def _execute(self, name: str, args_str: str, context: Optional[dict]) -> str:
+        if self.executor is None:
+            return self.run_plugin(name, args_str, context)
+        return self.executor.run(name, args_str, context, **self._limits(name))
 
     def handle(self, command: str, context: Optional[dict] = None) -> Optional[str]:
+        """Run a plugin command and return its output.
+
+        ``command`` may chain several commands: ``!a ; !b`` runs ``a`` and ``b``
+        concurrently and ``!a | !b`` passes the output of ``a`` to ``b``.
+        """
         if not command.startswith("!"):
             return None
-        name, *args = command[1:].split(maxsplit=1)
-        args_str = args[0] if args else ""
+        pipelines = split_commands(command)
+        if len(pipelines) > 1 or len(pipelines[0]) > 1:
+            return self._handle_compound(pipelines, context)
+        return self._call(*_split_command(command), context)[0]
 
-        plugin = self.plugins.get(name)
-        if plugin is None:
-            if name not in self.allowlist:
-                return f"\u274C Plugin `{name}` is not allowed."
-            return f"\u274C Plugin `{name}` not found."
+    async def ahandle(self, command: str, context: Optional[dict] = None) -> Optional[str]:
+        """Async counterpart of :meth:`handle`.
+
+        Plugins with a native ``arun`` are awaited on the running event loop;
+        synchronous plugins, imports and worker process calls are offloaded
+        to threads.
+        """
+        if not command.startswith("!"):
+            return None
+        pipelines = split_commands(command)
+        if len(pipelines) > 1 or len(pipelines[0]) > 1:
+            return await self._ahandle_compound(pipelines, context)
+        return (await self._acall(*_split_command(command), context))[0]
+
+    def _call(self, name: str, args_str: str, context: Optional[dict]) -> Tuple[str, bool]:
+        """Run one plugin; return its output and whether it succeeded."""
+        error = self._check(name)
+        if error is not None:
+            return error, False
+
+        cached = self._cached(name, args_str, context)
+        if cached is not None:
+            return cached, True
+
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            with span("plugin.run", plugin=name):
+                result = self._execute(name, args_str, context)
+            if is_failure(result):
+                outcome = "error"
+                return result, False
+            self._store(name, args_str, context, result)
+            return result, True
+        except PluginTimeout as exc:
+            outcome = "timeout"
+            return f"\u23F1\uFE0F Plugin `{name}` {exc}.", False
+        except Exception as exc:  # pragma: no cover - plugin failure
+            outcome = "error"
+            return f"\U0001F525 Plugin `{name}` crashed: {exc}", False
+        finally:
+            PLUGIN_SECONDS.observe(
+                time.perf_counter() - start, plugin=name, outcome=outcome
+            )
+
+    async def _acall(self, name: str, args_str: str, context: Optional[dict]) -> Tuple[str, bool]:
+        error = self._check(name)
+        if error is not None:
+            return error, False
 
+        cached = self._cached(name, args_str, context)
+        if cached is not None:
+            return cached, True
+
+        start = time.perf_counter()
+        outcome = "ok"
         try:
-            if isinstance(plugin, PluginBase):
-                result = plugin.run(args_str, context or {})
-                if isinstance(result, dict):
-                    return str(result.get("result"))
-                return str(result)
-            if hasattr(plugin, "run"):
-                return str(plugin.run(args_str))
-            return f"\u274C Plugin `{name}` does not define a valid entry point."
+            with span("plugin.run", plugin=name):
+                if self.executor is None:
+                    result = await self.arun_plugin(name, args_str, context)
+                else:
+                    result = await asyncio.to_thread(
+                        self.executor.run, name, args_str, context, **self._limits(name)
+                    )
+            if is_failure(result):
+                outcome = "error"
+                return result, False
+            self._store(name, args_str, context, result)
+            return result, True
+        except PluginTimeout as exc:
+            outcome = "timeout"
+            return f"\u23F1\uFE0F Plugin `{name}` {exc}.", False
         except Exception as exc:  # pragma: no cover - plugin failure
-            return f"\U0001F525 Plugin `{name}` crashed: {exc}"
+            outcome = "error"
+            return f"\U0001F525 Plugin `{name}` crashed: {exc}", False
+        finally:
+            PLUGIN_SECONDS.observe(
+                time.perf_counter() - start, plugin=name, outcome=outcome
+            )
+
+    def _handle_compound(self, pipelines: List[List[str]], context: Optional[dict]) -> str:
+        if sum(map(len, pipelines)) > MAX_COMPOUND_STEPS:
+            return f"\u274C At most {MAX_COMPOUND_STEPS} plugin commands can be combined."
+        if len(pipelines) == 1:
+            return _format_compound([self._run_pipeline(pipelines[0], context)])
+        with ThreadPoolExecutor(
+            max_workers=len(pipelines), thread_name_prefix="zona-plugin-compound"
+        ) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._run_pipeline, steps, context)
+                for steps in pipelines
+            ]
+            return _format_compound([future.result() for future in futures])
+
+    async def _ahandle_compound(self, pipelines: List[List[str]], context: Optional[dict]) -> str:
+        if sum(map(len, pipelines)) > MAX_COMPOUND_STEPS:
+            return f"\u274C At most {MAX_COMPOUND_STEPS} plugin commands can be combined."
+        results = await asyncio.gather(
+            *(self._arun_pipeline(steps, context) for steps in pipelines)
+        )
+        return _format_compound(list(results))
+
+    def _run_pipeline(self, steps: List[str], context: Optional[dict]) -> "_PipelineResult":
+        timings: List[Tuple[str, float]] = []
+        output: Optional[str] = None
+        for step in steps:
+            name, args_str = _split_command(step)
+            start = time.perf_counter()
+            output, ok = self._call(name, _pipe(args_str, output), _piped(context, output))
+            timings.append((step, time.perf_counter() - start))
+            if not ok:
+                break
+        return _PipelineResult(" | ".join(steps), output or "", timings)
+
+    async def _arun_pipeline(self, steps: List[str], context: Optional[dict]) -> "_PipelineResult":
+        timings: List[Tuple[str, float]] = []
+        output: Optional[str] = None
+        for step in steps:
+            name, args_str = _split_command(step)
+            start = time.perf_counter()
+            output, ok = await self._acall(
+                name, _pipe(args_str, output), _piped(context, output)
+            )
+            timings.append((step, time.perf_counter() - start))
+            if not ok:
+                break
+        return _PipelineResult(" | ".join(steps), output or "", timings)
+
+    def run_plugin(self, name: str, args_str: str, context: Optional[dict] = None) -> str:
+        """Run plugin ``name`` in the calling thread."""
+        plugin = self.get_plugin(name)
+        if plugin is None:
+            return f"\u274C Plugin `{name}` does not define a valid entry point."
+        if isinstance(plugin, PluginBase):
+            return _format_result(plugin.run(args_str, context or {}))
+        return str(plugin.run(args_str))
+
+    async def arun_plugin(self, name: str, args_str: str, context: Optional[dict] = None) -> str:
+        """Run plugin ``name`` on the running event loop."""
+        plugin = self.plugins.get(name)
+        if plugin is None:
+            plugin = await asyncio.to_thread(self.get_plugin, name)
+        if plugin is None:
+            return f"\u274C Plugin `{name}` does not define a valid entry point."
+        if isinstance(plugin, PluginBase):
+            return _format_result(await plugin.arun(args_str, context or {}))
+        if inspect.iscoroutinefunction(getattr(plugin, "arun", None)):
+            return str(await plugin.arun(args_str))
+        return str(await asyncio.to_thread(plugin.run, args_str))
+
+
+@dataclass
+class _PipelineResult:
+    command: str
+    output: str
+    timings: List[Tuple[str, float]]
+
+
+def split_commands(command: str) -> List[List[str]]:
+    """Split a compound command into pipelines of single commands.
+
+    ``;`` separates pipelines that run concurrently and ``|`` separates the
+    steps of a pipeline.  Both only act as separators when followed by a
+    command (``!``), so arguments such as ``!math x*2; x=0:10`` are kept.
+    """
+    parts = _SEPARATOR.split(command.strip())
+    pipelines = [[parts[0]]]
+    for separator, step in zip(parts[1::2], parts[2::2]):
+        if separator == ";":
+            pipelines.append([step])
+        else:
+            pipelines[-1].append(step)
+    return pipelines
+
+
+def _pipe(args_str: str, output: Optional[str]) -> str:
+    """Pass ``output`` of the previous step to a command's arguments.
+
+    ``{}`` in the arguments is replaced by the output, otherwise the output is
+    appended.
+    """
+    if output is None:
+        return args_str
+    if "{}" in args_str:
+        return args_str.replace("{}", output)
+    return f"{args_str} {output}".strip()
+
+
+def _piped(context: Optional[dict], output: Optional[str]) -> Optional[dict]:
+    if output is None:
+        return context
+    return {**(context or {}), "input": output}
+
+
+def _format_compound(results: List[_PipelineResult]) -> str:
+    blocks = []
+    for result in results:
+        total = sum(seconds for _, seconds in result.timings)
+        header = f"\u25B6 {result.command} ({total * 1000:.0f} ms"
+        if len(result.timings) > 1:
+            steps = ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in result.timings)
+            header += f": {steps}"
+        blocks.append(f"{header})\n{result.output}")
+    return "\n\n".join(blocks)
+
+
+def _split_command(command: str) -> Tuple[str, str]:
+    parts = command[1:].split(maxsplit=1)
+    if not parts:
+        return "", ""
+    return parts[0], parts[1] if len(parts) > 1 else ""
+
+
+def _format_result(result: Any) -> str:
+    if isinstance(result, dict):
+        text = str(result.get("result"))
+        if result.get("error") and not is_failure(text):
+            return f"\u26A0\uFE0F {text}"
+        return text
+    return str(result)
+
+
+# Replies starting with these are errors: rejected or missing plugins,
+# timeouts, crashes and plugin-reported failures.
+_FAILURE_MARKERS = ("\u274C", "\u26A0", "\u23F1", "\U0001F525")
+
+
+def is_failure(result: str) -> bool:
+    """Return whether plugin output ``result`` reports an error."""
+    return result.startswith(_FAILURE_MARKERS)
 
 
 # Default manager used by module-level helper
-_DEFAULT_MANAGER = PluginManager()
+_DEFAULT_MANAGER = PluginManager.from_env()
 
 
 def handle_plugin_command(command: str, context: Optional[dict] = None) -> Optional[str]:
@@ -149,10 +628,40 @@ def handle_plugin_command(command: str, context: Optional[dict] = None) -> Optio
     return _DEFAULT_MANAGER.handle(command, context)
 
 
-def reload_plugins() -> None:
-    """Reload plugins for the default manager."""
-    _DEFAULT_MANAGER.reload()
+async def ahandle_plugin_command(command: str, context: Optional[dict] = None) -> Optional[str]:
+    """Async counterpart of :func:`handle_plugin_command`."""
+    return await _DEFAULT_MANAGER.ahandle(command, context)
+
+
+def is_side_effect_free(command: str) -> bool:
+    """Return ``True`` if every plugin of ``command`` is side-effect-free."""
+    if not command.startswith("!") or len(command) < 2:
+        return False
+    steps = [step for steps in split_commands(command) for step in steps]
+    return all(
+        len(step) > 1 and _DEFAULT_MANAGER.is_side_effect_free(_split_command(step)[0])
+        for step in steps
+    )
+
 
+def reload_plugins() -> Dict[str, List[str]]:
+    """Apply plugin changes on disk to the default manager."""
+    return _DEFAULT_MANAGER.refresh()
 
-__all__ = ["PluginManager", "handle_plugin_command", "reload_plugins"]
+
+def get_plugin_manager() -> PluginManager:
+    """Return the manager used by the module-level helpers."""
+    return _DEFAULT_MANAGER
+
+
+__all__ = [
+    "PluginManager",
+    "ahandle_plugin_command",
+    "get_plugin_manager",
+    "handle_plugin_command",
+    "is_failure",
+    "is_side_effect_free",
+    "reload_plugins",
+    "split_commands",
+]
 
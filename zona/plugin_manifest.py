@@ -0,0 +1,189 @@
+"""Static plugin manifest used to load plugins lazily.
+
+Importing every plugin at startup pulls in their dependencies (HTTP
+connectors, ``numexpr``...) even when a plugin is never used.  Instead the
+:class:`PluginManager` reads a manifest describing each plugin file, namely its
+name, path, content hash, kind and metadata.  The metadata is extracted from
+the source with :mod:`ast` without executing it:
+
+* class based plugins: the dict literal returned by ``get_metadata`` of the
+  :class:`~zona.plugins.PluginBase` subclass;
+* function based plugins: module level constants such as
+  ``SIDE_EFFECT_FREE = True`` or ``CACHE = {"ttl": 60}``.
+
+The manifest is cached as JSON.  A file is only re-hashed when its size or
+mtime changed, and only re-parsed when its content hash changed.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class PluginSpec:
+    """Manifest entry describing one plugin module."""
+
+    name: str
+    path: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    kind: str  # "class", "function" or "unknown"
+    class_name: Optional[str] = None
+    # ``None`` when the metadata cannot be determined without importing.
+    metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PluginSpec":
+        return cls(**data)
+
+
+def iter_plugin_files(plugin_dir: Path) -> Iterator[Path]:
+    """Yield plugin files that are regular files inside ``plugin_dir``.
+
+    Symbolic links, files resolving outside the directory and dunder modules
+    are skipped.
+    """
+    plugin_dir_resolved = plugin_dir.resolve()
+    for path in sorted(plugin_dir.glob("*.py")):
+        try:
+            real_path = path.resolve(strict=True)
+        except FileNotFoundError:
+            continue
+        try:
+            real_path.relative_to(plugin_dir_resolved)
+        except ValueError:
+            continue
+        if path.is_symlink() or real_path.name.startswith("__"):
+            continue
+        yield real_path
+
+
+def _is_plugin_base(node: ast.expr) -> bool:
+    if isinstance(node, ast.Name):
+        return node.id == "PluginBase"
+    if isinstance(node, ast.Attribute):
+        return node.attr == "PluginBase"
+    return False
+
+
+def _literal_return(func: ast.FunctionDef) -> Optional[Dict[str, Any]]:
+    for node in ast.walk(func):
+        if isinstance(node, ast.Return) and node.value is not None:
+            try:
+                value = ast.literal_eval(node.value)
+            except (ValueError, SyntaxError):
+                return None
+            return value if isinstance(value, dict) else None
+    return None
+
+
+def extract_spec(name: str, path: Path, source: bytes) -> Dict[str, Any]:
+    """Return ``kind``, ``class_name`` and ``metadata`` parsed from ``source``."""
+    try:
+        tree = ast.parse(source, filename=str(path))
+    except SyntaxError:
+        return {"kind": "unknown", "class_name": None, "metadata": None}
+
+    constants: Dict[str, Any] = {}
+    has_run = False
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and any(_is_plugin_base(b) for b in node.bases):
+            metadata: Optional[Dict[str, Any]] = None
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "get_metadata":
+                    metadata = _literal_return(item)
+            return {"kind": "class", "class_name": node.name, "metadata": metadata}
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "run":
+            has_run = True
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    try:
+                        constants[target.id] = ast.literal_eval(node.value)
+                    except (ValueError, SyntaxError):
+                        pass
+
+    metadata = {"name": name}
+    if "SIDE_EFFECT_FREE" in constants:
+        metadata["side_effect_free"] = bool(constants["SIDE_EFFECT_FREE"])
+    if "CACHE" in constants:
+        metadata["cache"] = constants["CACHE"]
+    return {
+        "kind": "function" if has_run else "unknown",
+        "class_name": None,
+        "metadata": metadata,
+    }
+
+
+def _load_cache(path: Optional[Path]) -> Dict[str, PluginSpec]:
+    if path is None or not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text())
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return {key: PluginSpec.from_dict(value) for key, value in data["plugins"].items()}
+    except Exception:
+        return {}
+
+
+def _save_cache(path: Path, specs: Dict[str, PluginSpec]) -> None:
+    payload = {
+        "version": MANIFEST_VERSION,
+        "plugins": {spec.path: asdict(spec) for spec in specs.values()},
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, indent=1, sort_keys=True))
+        os.replace(tmp_path, path)
+    except OSError:  # read-only install: keep the manifest in memory only
+        pass
+
+
+def build_manifest(plugin_dir: Path, cache_path: Optional[Path] = None) -> Dict[str, PluginSpec]:
+    """Return ``{name: PluginSpec}`` for ``plugin_dir``, updating the cache."""
+    cached = _load_cache(cache_path)
+    specs: Dict[str, PluginSpec] = {}
+    changed = False
+    for path in iter_plugin_files(plugin_dir):
+        stat = path.stat()
+        previous = cached.get(str(path))
+        if (
+            previous is not None
+            and previous.mtime_ns == stat.st_mtime_ns
+            and previous.size == stat.st_size
+        ):
+            specs[previous.name] = previous
+            continue
+        source = path.read_bytes()
+        digest = hashlib.sha256(source).hexdigest()
+        if previous is not None and previous.sha256 == digest:
+            previous.mtime_ns, previous.size = stat.st_mtime_ns, stat.st_size
+            specs[previous.name] = previous
+        else:
+            specs[path.stem] = PluginSpec(
+                name=path.stem,
+                path=str(path),
+                sha256=digest,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                **extract_spec(path.stem, path, source),
+            )
+        changed = True
+    if cache_path is not None and (changed or len(specs) != len(cached)):
+        _save_cache(cache_path, specs)
+    return specs
+
+
+__all__ = ["PluginSpec", "build_manifest", "extract_spec", "iter_plugin_files"]
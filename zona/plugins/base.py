@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 
@@ -7,9 +8,21 @@ class PluginBase(ABC):
 
     @abstractmethod
     def run(self, args: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Run the plugin with given args and context."""
+        """Run the plugin with given args and context.
+
+        Return ``{"result": text}``, adding ``"error": True`` when the call
+        failed, e.g. on invalid arguments.  Failures are not cached.
+        """
         raise NotImplementedError
 
+    async def arun(self, args: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the plugin from an event loop.
+
+        The default offloads :meth:`run` to a thread.  Plugins doing I/O
+        through async clients override it so they run on the loop directly.
+        """
+        return await asyncio.to_thread(self.run, args, context)
+
     @abstractmethod
     def get_metadata(self) -> Dict[str, str]:
         """Return plugin metadata such as name and version."""
@@ -12,4 +12,5 @@ class Plugin(PluginBase):
             "name": "echo",
             "description": "Echoes the provided arguments",
             "version": "1.0",
+            "side_effect_free": True,
         }
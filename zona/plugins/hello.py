@@ -1,2 +1,5 @@
+SIDE_EFFECT_FREE = True
+
+
 def run(args: str) -> str:
     return "\U0001F44B Hello from Zona Plugin!"
@@ -1,6 +1,7 @@
 import os
 from zona.plugins.base import PluginBase
 from app.integrations.logo import LogoConnector
+from app.integrations.transport import run_sync
 
 
 class Plugin(PluginBase):
@@ -12,13 +13,21 @@ class Plugin(PluginBase):
         self.connector = LogoConnector(api_key=api_key, base_url=base_url)
 
     def run(self, args: str, context: dict) -> dict:
+        return run_sync(self.arun(args, context))
+
+    async def arun(self, args: str, context: dict) -> dict:
         try:
             start_date, end_date = args.split()
         except ValueError:
-            return {"result": "Usage: !invoice_summary <start> <end>"}
-        invoices = self.connector.fetch_invoices(start_date, end_date)
+            return {"result": "Usage: !invoice_summary <start> <end>", "error": True}
+        invoices = await self.connector.fetch_invoices(start_date, end_date)
         total = sum(inv.get("amount", 0) for inv in invoices)
         return {"result": f"Toplam fatura tutarı: {total} TL"}
 
     def get_metadata(self) -> dict:
-        return {"name": "invoice_summary", "version": "0.1"}
+        return {
+            "name": "invoice_summary",
+            "version": "0.1",
+            "side_effect_free": True,
+            "cache": {"ttl": 300, "stale_ttl": 300},
+        }
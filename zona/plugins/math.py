@@ -1,22 +1,105 @@
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+
 try:
     import numexpr
+    import numpy as np
+    from numexpr.necompiler import getExprNames
 except Exception:  # pragma: no cover - handled at runtime
     numexpr = None
 
+SIDE_EFFECT_FREE = True
+CACHE = {"ttl": 3600, "scope": "global"}
+
+# Compiled expressions are reused across calls, keyed by expression text.
+CACHE_SIZE = int(os.getenv("ZONA_MATH_CACHE_SIZE", "128"))
+# Upper bound on the elements of a range binding such as ``x=0:1e6``.
+MAX_ELEMENTS = int(float(os.getenv("ZONA_MATH_MAX_ELEMENTS", "1e7")))
+
+if numexpr is not None and os.getenv("ZONA_MATH_THREADS"):
+    numexpr.set_num_threads(int(os.getenv("ZONA_MATH_THREADS")))
+
+_BINDING = re.compile(r"^([A-Za-z_]\w*)\s*=\s*(.+)$")
+_compiled: "OrderedDict[str, tuple]" = OrderedDict()
+_compiled_lock = Lock()
+
+
+def _compile(expression: str):
+    """Return ``(names, program)`` for ``expression`` from the LRU cache."""
+    with _compiled_lock:
+        entry = _compiled.get(expression)
+        if entry is not None:
+            _compiled.move_to_end(expression)
+            return entry
+    names, _ = getExprNames(expression, {})
+    program = numexpr.NumExpr(expression, signature=[(name, np.double) for name in names])
+    with _compiled_lock:
+        _compiled[expression] = (names, program)
+        while len(_compiled) > CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return names, program
+
+
+def _parse_binding(text: str):
+    """Parse ``name=value`` or ``name=start:stop[:step]``."""
+    match = _BINDING.match(text.strip())
+    if not match:
+        raise ValueError(f"invalid binding `{text.strip()}`")
+    name, value = match.groups()
+    parts = [float(part) for part in value.split(":")]
+    if len(parts) == 1:
+        return name, np.float64(parts[0])
+    if len(parts) not in (2, 3):
+        raise ValueError(f"invalid range `{value}`")
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) == 3 else 1.0
+    if step == 0 or (stop - start) / step > MAX_ELEMENTS:
+        raise ValueError(f"range `{value}` has more than {MAX_ELEMENTS} elements")
+    return name, np.arange(start, stop, step, dtype=np.double)
+
+
+def _format(value) -> str:
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
 
 def run(args: str) -> str:
     """Safely evaluate a mathematical expression.
 
-    Uses ``numexpr`` to compute the result. If the expression is invalid or
-    contains unsupported operations, an informative message is returned
-    instead of raising an exception.
+    Uses ``numexpr`` to compute the result. Variables are bound after the
+    expression, separated by ``;``: a scalar (``a=2``) or a range evaluated as
+    a vectorized array (``x=0:1e6`` or ``x=0:1:0.01``).  Array results are
+    summarised with their size, minimum, maximum, mean and sum.  If the
+    expression is invalid or contains unsupported operations, an informative
+    message is returned instead of raising an exception.
     """
 
     if numexpr is None:
         return "\u26A0\uFE0F Math error: numexpr library is not installed"
 
     try:
-        result = numexpr.evaluate(args)
-        return f"\U0001F9EE Result: {result.item()}"
+        parts = [part for part in args.split(";") if part.strip()]
+        if not parts:
+            raise ValueError("no expression given")
+        expression, *bindings = parts
+        variables = dict(_parse_binding(binding) for binding in bindings)
+        names, program = _compile(expression.strip())
+        missing = [name for name in names if name not in variables]
+        if missing:
+            raise ValueError(f"unbound variable `{missing[0]}`")
+        result = program(*(variables[name] for name in names))
+        if result.ndim == 0:
+            return f"\U0001F9EE Result: {result.item()}"
+        if result.size == 0:
+            return "\U0001F9EE Result: empty array"
+        stats = {
+            "n": result.size,
+            "min": result.min().item(),
+            "max": result.max().item(),
+            "mean": result.mean().item(),
+            "sum": result.sum().item(),
+        }
+        return "\U0001F9EE Result: " + ", ".join(f"{k}={_format(v)}" for k, v in stats.items())
     except Exception as e:
         return f"\u26A0\uFE0F Math error: {str(e)}"
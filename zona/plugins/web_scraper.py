@@ -1,43 +1,120 @@
+import codecs
+import os
+import threading
+from collections import OrderedDict
 from html.parser import HTMLParser
-from urllib.request import urlopen
+from urllib.parse import urlparse
+
+import httpx
+
 from zona.plugins import PluginBase
 
+# Reading stops after this many bytes even if no ``</title>`` was seen.
+MAX_BYTES = int(os.getenv("WEB_SCRAPER_MAX_BYTES", str(256 * 1024)))
+TIMEOUT = float(os.getenv("WEB_SCRAPER_TIMEOUT", "10"))
+# Titles remembered with their ``ETag``/``Last-Modified`` validators.
+CACHE_SIZE = int(os.getenv("WEB_SCRAPER_CACHE_SIZE", "256"))
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+# url -> (etag, last_modified, title)
+_validators: "OrderedDict[str, tuple]" = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Return the pooled client shared by every call of the plugin."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                timeout=TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={"User-Agent": "ZonaAi web_scraper"},
+            )
+        return _client
+
 
 class _TitleParser(HTMLParser):
     def __init__(self) -> None:
         super().__init__()
         self._in_title = False
         self.title = ""
+        self.done = False
 
     def handle_starttag(self, tag, attrs):
         if tag.lower() == "title":
             self._in_title = True
 
     def handle_endtag(self, tag):
-        if tag.lower() == "title":
+        if tag.lower() in {"title", "head"}:
             self._in_title = False
+            self.done = True
 
     def handle_data(self, data):
         if self._in_title:
             self.title += data
 
 
+def fetch_title(url: str, client: httpx.Client | None = None) -> str:
+    """Stream ``url`` until its title is parsed or ``MAX_BYTES`` were read."""
+    with _validators_lock:
+        cached = _validators.get(url)
+    headers = {}
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    with (client or get_client()).stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 304 and cached is not None:
+            return cached[2]
+        resp.raise_for_status()
+        decoder = codecs.getincrementaldecoder(resp.charset_encoding or "utf-8")("ignore")
+        parser = _TitleParser()
+        received = 0
+        for chunk in resp.iter_bytes():
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or received >= MAX_BYTES:
+                break
+        title = parser.title.strip()
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+    if etag or last_modified:
+        with _validators_lock:
+            _validators[url] = (etag, last_modified, title)
+            _validators.move_to_end(url)
+            while len(_validators) > CACHE_SIZE:
+                _validators.popitem(last=False)
+    return title
+
+
 class Plugin(PluginBase):
-    """Simple web scraper plugin using standard library only."""
+    """Fetch the title of a web page.
+
+    The body is streamed through an incremental parser and reading stops at
+    ``</title>``.  Connections are pooled across calls, and pages sending
+    ``ETag`` or ``Last-Modified`` are revalidated with a conditional request.
+    """
 
     def run(self, args: str, context: dict) -> dict:
         url = args.strip()
         if not url:
-            return {"result": "No URL provided"}
-        with urlopen(url) as resp:
-            html = resp.read().decode("utf-8", errors="ignore")
-        parser = _TitleParser()
-        parser.feed(html)
-        return {"result": parser.title.strip() or "No title found"}
+            return {"result": "No URL provided", "error": True}
+        if urlparse(url).scheme not in {"http", "https"}:
+            return {"result": "Only http and https URLs are supported", "error": True}
+        return {"result": fetch_title(url) or "No title found"}
 
     def get_metadata(self) -> dict:
         return {
             "name": "web_scraper",
             "description": "Fetches webpage title",
             "version": "1.0",
+            "side_effect_free": True,
+            "cache": {"ttl": 300, "scope": "global", "stale_ttl": 600},
         }
@@ -1,8 +1,8 @@
 import os
-import asyncio
 
 from zona.plugins import PluginBase
 from app.integrations.xero import XeroConnector
+from app.integrations.transport import run_sync
 
 
 class Plugin(PluginBase):
@@ -14,10 +14,13 @@ class Plugin(PluginBase):
         self.connector = XeroConnector(api_key=api_key, base_url=base_url)
 
     def run(self, args: str, context: dict) -> dict:
+        return run_sync(self.arun(args, context))
+
+    async def arun(self, args: str, context: dict) -> dict:
         start_date = args.strip()
         if not start_date:
-            return {"result": "Usage: !xero_summary <start_date>"}
-        invoices = asyncio.run(self.connector.fetch_invoices(start_date))
+            return {"result": "Usage: !xero_summary <start_date>", "error": True}
+        invoices = await self.connector.fetch_invoices(start_date)
         total = sum(inv.get("Total", 0) for inv in invoices)
         return {"result": f"Toplam fatura tutarı: ${total}"}
 
@@ -26,4 +29,6 @@ class Plugin(PluginBase):
             "name": "xero_summary",
             "description": "Xero fatura özeti",
             "version": "1.0",
+            "side_effect_free": True,
+            "cache": {"ttl": 300, "stale_ttl": 300},
         }